@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request
 
 from src.api import limiter
 from src.core.middleware import inject
+from src.core.tiered_cache import cache_metrics
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -12,3 +13,11 @@ router = APIRouter(prefix="/health", tags=["health"])
 async def health(request: Request):
     """API Health Check"""
     return {"status": "ok"}
+
+
+@router.get("/cache", status_code=200)
+@inject
+@limiter.limit("1000/minute")
+async def cache_health(request: Request):
+    """Per-tag hit rates of the tiered cache on this replica"""
+    return cache_metrics()
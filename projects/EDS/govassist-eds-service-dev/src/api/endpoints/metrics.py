@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from src.api import limiter
+from src.core.middleware import inject
+from src.core.redis_metrics import redis_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", status_code=200, response_class=PlainTextResponse)
+@inject
+@limiter.limit("1000/minute")
+async def metrics(request: Request):
+    """Redis client metrics of this replica, in Prometheus text format"""
+    return PlainTextResponse(
+        redis_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
@@ -8,6 +8,7 @@ from src.core.container import Container
 from src.core.dependencies import get_current_user
 from src.core.exceptions import ValidationError
 from src.elasticsearch.service import es_service
+from src.model.report_model import ReportExportFormat
 from src.schema.base_schema import UniqueValuesResult
 from src.schema.report_metadata_schema import (
     ReportMetadataFind,
@@ -578,12 +579,20 @@ async def preview_report(
 @inject
 async def export_report(
     report_id: int,
+    export_format: ReportExportFormat = Query(
+        default=ReportExportFormat.XLSX,
+        alias="format",
+        description="xlsx, csv_zip (one CSV per sub-report), csv_gz (tar.gz of CSVs) or parquet (zip of Parquet files)",
+    ),
     current_user: dict = Depends(get_current_user),
     service: ReportConfigurationService = Depends(
         Provide[Container.report_configuration_service]
     ),
+    redis_service: RedisService = Depends(Provide[Container.redis_service]),
 ):
-    return await service.export_report(report_id, current_user.id)
+    return await service.export_report(
+        report_id, current_user.id, redis_service, export_format
+    )
 
 
 @router.get("/{report_id}/export-status")
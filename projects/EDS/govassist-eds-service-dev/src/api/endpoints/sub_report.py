@@ -1,7 +1,7 @@
 from typing import Any, Dict, List
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 from src.core.container import Container
 from src.schema.report_schema import (
@@ -74,6 +74,10 @@ def delete_sub_report(
 @inject
 def publish_sub_report(
     sub_report_id: int,
+    full: bool = Query(
+        default=False,
+        description="Rebuild the whole index instead of syncing the rows changed since the last publish",
+    ),
     service: SubReportService = Depends(Provide[Container.sub_report_service]),
 ):
-    return service.publish_sub_report(sub_report_id)
+    return service.publish_sub_report(sub_report_id, full)
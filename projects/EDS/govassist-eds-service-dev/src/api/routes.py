@@ -23,6 +23,7 @@ from src.api.endpoints.integration import router as integration_router
 from src.api.endpoints.integration import webhook_router as integration_webhook_router
 from src.api.endpoints.key_metrics import router as key_metrics_router
 from src.api.endpoints.master_project import router as master_project_router
+from src.api.endpoints.metrics import router as metrics_router
 from src.api.endpoints.organization import router as organization_router
 from src.api.endpoints.par import router as par_router
 from src.api.endpoints.par_activity import router as par_activity_router
@@ -46,7 +47,7 @@ from src.core.dependencies import require_auth
 
 # Public routes (no authentication required)
 routers = APIRouter()
-router_list = [health_router, integration_webhook_router]
+router_list = [health_router, metrics_router, integration_webhook_router]
 
 for router in router_list:
     routers.include_router(router)
@@ -89,6 +89,12 @@ class Configs(BaseSettings):
         os.getenv("SQLALCHEMY_LOGGING", "False").lower() == "true"
     )
 
+    # Apply Excel ingestion as a delta against existing tables instead of
+    # clearing and reloading them
+    EXCEL_DELTA_INGESTION: bool = (
+        os.getenv("EXCEL_DELTA_INGESTION", "False").lower() == "true"
+    )
+
     # CORS
     cors_origins_str: ClassVar[str] = get_secret("CORS-ALLOWED-ORIGINS", required=False)
     BACKEND_CORS_ORIGINS: List[str] = (
@@ -224,6 +230,21 @@ class Configs(BaseSettings):
     # Redis Configuration
     REDIS_MAX_CONNECTIONS: int = 50
     REDIS_DEFAULT_TTL: int = 3600
+    # Compact cache encoding (see core/redis_codec); readers accept both formats,
+    # so enable writing it only once every service reading the cache is deployed
+    REDIS_COMPACT_SERIALIZATION: bool = (
+        os.getenv("REDIS_COMPACT_SERIALIZATION", "False").lower() == "true"
+    )
+    REDIS_CODEC: str = os.getenv("REDIS_CODEC", "msgpack")
+    REDIS_COMPRESSION_THRESHOLD: int = 1024
+    # Coalesce single-key commands issued in the same event-loop tick into one pipeline
+    REDIS_AUTO_BATCH: bool = os.getenv("REDIS_AUTO_BATCH", "True").lower() == "true"
+    REDIS_AUTO_BATCH_MAX_SIZE: int = 256
+    # Tiered (in-process + Redis) cache for rarely changing lookups
+    CACHE_DEFAULT_TTL: int = 3600
+    CACHE_LOCAL_TTL: float = 60.0
+    CACHE_LOCAL_MAX_ENTRIES: int = 2048
+    CACHE_INVALIDATION_CHANNEL: str = "tiered-cache-invalidation"
 
     BROKER_URL: str = (
         get_secret("BROKER-URL", required=True) or "redis://localhost:6379"
@@ -240,6 +261,20 @@ class Configs(BaseSettings):
         get_secret("AZURE-STORAGE-CONTAINER-NAME", required=False)
         or "eds-report-exports"
     )
+    # Exports are streamed to blob storage in staged blocks of this size
+    EXPORT_BLOB_BLOCK_SIZE: int = 8 * 1024 * 1024
+    # Sub-report sheets of one export that are fetched concurrently
+    REPORT_EXPORT_WORKERS: int = int(os.getenv("REPORT_EXPORT_WORKERS", "4"))
+    # Key-range slices of a sub-report published to Elasticsearch concurrently,
+    # and row batches each slice may have fetched ahead of its bulk sends
+    SUB_REPORT_PUBLISH_WORKERS: int = int(os.getenv("SUB_REPORT_PUBLISH_WORKERS", "4"))
+    SUB_REPORT_PUBLISH_QUEUE_DEPTH: int = 2
+    # A republish rebuilds the index instead of syncing it in place when the
+    # rows to write or delete exceed this fraction of the indexed documents
+    SUB_REPORT_SYNC_MAX_CHANGE_RATIO: float = 0.2
+    # Compiled report plans kept per process, keyed by config
+    REPORT_PLAN_CACHE_MAX_ENTRIES: int = 256
+    REPORT_PLAN_CACHE_TTL: float = 3600.0
 
     # Excel files sheet names
     EXCEL_FILE_SHEET_NAMES: Set[str] = {sheet.value for sheet in ExcelSheetName}
@@ -375,6 +410,16 @@ class Configs(BaseSettings):
         "Rate",
     }
     WORKFLOW_UPDATES: str = get_secret("WORKFLOW-UPDATES", required=True)
+    # Upper bound on Socket.IO emits per workflow; bursts in between are merged
+    WORKFLOW_UPDATES_MAX_EMITS_PER_SECOND: float = 4.0
+    # Workflow events go through Redis Streams sharded by workflow id; each API
+    # replica joins this group and reads the shards whose lease it holds
+    WORKFLOW_EVENTS_CONSUMER_GROUP: str = "workflow-socketio"
+    WORKFLOW_EVENTS_STREAM_MAXLEN: int = 10000
+    WORKFLOW_EVENTS_STREAM_SHARDS: int = 16
+    WORKFLOW_EVENTS_SHARD_LEASE_MS: int = 15000
+    # Per-workflow stream of logs and events, trimmed to roughly this many entries
+    WORKFLOW_STREAM_MAXLEN: int = 5000
 
     class Config:
         case_sensitive = True
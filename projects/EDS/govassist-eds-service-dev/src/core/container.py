@@ -499,7 +499,11 @@ class Container(containers.DeclarativeContainer):
     )
 
     socket_io_service = providers.Singleton(
-        lambda: SocketIOService(client_manager=AsyncRedisManager(configs.REDIS_URL))
+        lambda redis_service: SocketIOService(
+            client_manager=AsyncRedisManager(configs.REDIS_URL),
+            redis_service=redis_service,
+        ),
+        redis_service=redis_service,
     )
 
     # MongoDB repositories and services
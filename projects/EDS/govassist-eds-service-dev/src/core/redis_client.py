@@ -6,14 +6,25 @@ import ssl
 import time
 from contextlib import asynccontextmanager
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import redis.asyncio as redis
-from redis.asyncio.connection import ConnectionPool
 from redis.asyncio.retry import Retry
 from redis.backoff import ExponentialBackoff
 
+from src.core.redis_codec import redis_codec
 from src.core.redis_config import RedisConfig, SerializationMethod
+from src.core.redis_metrics import (
+    InstrumentedConnectionPool,
+    payload_size,
+    redis_metrics,
+)
+from src.core.single_flight import (
+    RELEASE_LOCK_SCRIPT,
+    new_token,
+    release_channel,
+    single_flight,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +45,11 @@ class CircuitBreaker:
         self.last_failure_time: Optional[float] = None
         self.state = CircuitBreakerState.CLOSED
 
+    def _transition(self, state: CircuitBreakerState):
+        if state != self.state:
+            redis_metrics.record_breaker_transition(self.state.value, state.value)
+            self.state = state
+
     def can_execute(self) -> bool:
         if self.state == CircuitBreakerState.CLOSED:
             return True
@@ -42,7 +58,7 @@ class CircuitBreaker:
                 self.last_failure_time
                 and time.time() - self.last_failure_time > self.timeout
             ):
-                self.state = CircuitBreakerState.HALF_OPEN
+                self._transition(CircuitBreakerState.HALF_OPEN)
                 return True
             return False
         else:  # HALF_OPEN
@@ -50,13 +66,13 @@ class CircuitBreaker:
 
     def on_success(self):
         self.failure_count = 0
-        self.state = CircuitBreakerState.CLOSED
+        self._transition(CircuitBreakerState.CLOSED)
 
     def on_failure(self):
         self.failure_count += 1
         self.last_failure_time = time.time()
         if self.failure_count >= self.failure_threshold:
-            self.state = CircuitBreakerState.OPEN
+            self._transition(CircuitBreakerState.OPEN)
 
 
 class RedisSerializer:
@@ -65,9 +81,11 @@ class RedisSerializer:
     @staticmethod
     def serialize(
         value: Any, method: SerializationMethod = SerializationMethod.NONE
-    ) -> str:
+    ) -> Union[str, bytes]:
         """Serialize value based on method"""
-        if method == SerializationMethod.JSON:
+        if method == SerializationMethod.COMPACT:
+            return redis_codec.encode(value)
+        elif method == SerializationMethod.JSON:
             return json.dumps(value)
         elif method == SerializationMethod.PICKLE:
             return pickle.dumps(value).decode("latin-1")
@@ -76,10 +94,18 @@ class RedisSerializer:
 
     @staticmethod
     def deserialize(
-        value: str, method: SerializationMethod = SerializationMethod.NONE
+        value: Union[str, bytes], method: SerializationMethod = SerializationMethod.NONE
     ) -> Any:
-        """Deserialize value based on method"""
-        if method == SerializationMethod.JSON:
+        """
+        Deserialize value based on method. Raw bytes are accepted so binary
+        payloads are never decoded as text; compact-encoded values are
+        recognised by their header whatever the method.
+        """
+        if redis_codec.is_encoded(value):
+            return redis_codec.decode(value)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        if method in (SerializationMethod.JSON, SerializationMethod.COMPACT):
             return json.loads(value)
         elif method == SerializationMethod.PICKLE:
             return pickle.loads(value.encode("latin-1"))
@@ -92,7 +118,7 @@ class RedisConnectionManager:
 
     def __init__(self, config: RedisConfig):
         self.config = config
-        self.pool: Optional[ConnectionPool] = None
+        self.pool: Optional[InstrumentedConnectionPool] = None
         self.client: Optional[redis.Redis] = None
         self._initialized = False
 
@@ -107,7 +133,7 @@ class RedisConnectionManager:
 
         logger.info("Initializing Redis connection...")
 
-        self.pool = ConnectionPool.from_url(
+        self.pool = InstrumentedConnectionPool.from_url(
             self.config.connection_string,
             ssl_cert_reqs=getattr(ssl, self.config.ssl_cert_reqs, ssl.CERT_NONE),
             max_connections=self.config.max_connections,
@@ -125,6 +151,7 @@ class RedisConnectionManager:
             ),
         )
 
+        redis_metrics.register_pool(self.pool)
         self.client = redis.Redis(connection_pool=self.pool)
         await self.client.ping()
         self._initialized = True
@@ -144,6 +171,97 @@ class RedisConnectionManager:
         return self._initialized and self.client is not None
 
 
+class CommandBatcher:
+    """
+    Coalesces commands issued in the same event-loop tick into one
+    non-transactional pipeline, so concurrent callers share a round trip.
+    Each caller still gets its own result or error.
+    """
+
+    def __init__(self, client: "RedisClient", max_size: int = 256):
+        self.client = client
+        self.max_size = max_size
+        self._pending: List[Tuple[str, tuple, dict, asyncio.Future]] = []
+        self._flush_scheduled = False
+        self._flushes: Set[asyncio.Task] = set()
+
+    def submit(self, command: str, *args, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((command, args, kwargs, future))
+        if len(self._pending) >= self.max_size:
+            self._start_flush()
+        elif not self._flush_scheduled:
+            # Runs after every callback already queued for this tick
+            self._flush_scheduled = True
+            loop.call_soon(self._start_flush)
+        return future
+
+    def _start_flush(self):
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._flush(pending))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, pending: List[Tuple[str, tuple, dict, asyncio.Future]]):
+        try:
+            if not self.client.connection.is_initialized:
+                await self.client.connection.initialize()
+            pipe = self.client.connection.client.pipeline(transaction=False)
+            for command, args, kwargs, _ in pending:
+                getattr(pipe, command)(*args, **kwargs)
+            results = await self.client._execute_batch(
+                pipe, [command for command, *_ in pending]
+            )
+        except Exception as e:
+            for *_, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (*_, future), result in zip(pending, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class BreakerRoutedClient:
+    """
+    Stands in for the raw client in helpers that take one, such as
+    single_flight, so the commands they issue go through the circuit breaker
+    and are timed like any other. Everything else (pubsub) is the raw client's.
+    """
+
+    ROUTED = {"get", "set", "exists"}
+
+    def __init__(self, client: "RedisClient"):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client.connection.client, name)
+        if name not in self.ROUTED:
+            return attr
+
+        async def routed(*args, **kwargs):
+            return await self._client._execute_with_circuit_breaker(
+                attr, *args, **kwargs
+            )
+
+        return routed
+
+    def register_script(self, script: str) -> Callable[..., Any]:
+        async def run(
+            keys: Optional[List[str]] = None, args: Optional[List[Any]] = None
+        ):
+            return await self._client.run_script(script, keys or [], args or [])
+
+        return run
+
+
 class RedisClient:
     """Mature, simple async Redis client with OOP design"""
 
@@ -154,8 +272,15 @@ class RedisClient:
         self.circuit_breaker = CircuitBreaker(
             config.circuit_breaker_failure_threshold, config.circuit_breaker_timeout
         )
+        redis_metrics.register_breaker(self.circuit_breaker)
         self._health_check_task: Optional[asyncio.Task] = None
         self._is_healthy = True
+        self._scripts: Dict[str, Any] = {}
+        self._batcher: Optional[CommandBatcher] = (
+            CommandBatcher(self, config.auto_batch_max_size)
+            if config.auto_batch
+            else None
+        )
 
     async def initialize(self):
         """Initialize the Redis client"""
@@ -189,6 +314,40 @@ class RedisClient:
 
     async def _execute_with_circuit_breaker(self, operation: Callable, *args, **kwargs):
         """Execute operation with circuit breaker pattern"""
+        command = self._command_name(operation)
+
+        def record(seconds: float, result: Any):
+            redis_metrics.record_command(
+                command, seconds, not isinstance(result, Exception)
+            )
+
+        return await self._guarded(operation, args, kwargs, record)
+
+    async def _execute_batch(self, pipe, commands: List[str]) -> List[Any]:
+        """
+        Execute an auto-batched pipeline. Each command is timed under its own
+        name with the shared round trip, and counted as an error if its own
+        result is one.
+        """
+
+        def record(seconds: float, results: Any):
+            if isinstance(results, Exception):
+                results = [results] * len(commands)
+            for command, result in zip(commands, results, strict=True):
+                redis_metrics.record_command(
+                    command, seconds, not isinstance(result, Exception)
+                )
+
+        return await self._guarded(pipe.execute, (), {"raise_on_error": False}, record)
+
+    async def _guarded(
+        self,
+        operation: Callable,
+        args: tuple,
+        kwargs: dict,
+        record: Callable[[float, Any], None],
+    ) -> Any:
+        """Run ``operation`` behind the circuit breaker; ``record`` gets its duration and result or error"""
         if not self.circuit_breaker.can_execute():
             raise redis.ConnectionError("Circuit breaker is OPEN")
 
@@ -198,15 +357,36 @@ class RedisClient:
         if not self.connection.client:
             raise redis.ConnectionError("Redis client not initialized")
 
+        start = time.perf_counter()
         try:
             result = await operation(*args, **kwargs)
+            record(time.perf_counter() - start, result)
             self.circuit_breaker.on_success()
             return result
         except Exception as e:
+            record(time.perf_counter() - start, e)
             self.circuit_breaker.on_failure()
             logger.error(f"Redis operation failed: {e}")
             raise
 
+    @staticmethod
+    def _command_name(operation: Callable) -> str:
+        """Metric label for an operation: its command name, pipeline or script"""
+        name = getattr(operation, "__name__", None)
+        if name is None:
+            return "script"
+        return "pipeline" if name == "execute" else name
+
+    async def _call(self, command: str, *args, **kwargs) -> Any:
+        """Run a single command, sharing a pipeline with concurrent callers when auto-batching"""
+        if self._batcher is not None:
+            return await self._batcher.submit(command, *args, **kwargs)
+        if not self.connection.is_initialized:
+            await self.connection.initialize()
+        return await self._execute_with_circuit_breaker(
+            getattr(self.connection.client, command), *args, **kwargs
+        )
+
     # Core Operations
     async def set(
         self,
@@ -217,42 +397,72 @@ class RedisClient:
     ) -> bool:
         """Set key-value pair with optional TTL"""
         serialized_value = self.serializer.serialize(value, serialization)
+        redis_metrics.record_payload("set", "write", payload_size(serialized_value))
         if ttl and ttl > 0:
-            return await self._execute_with_circuit_breaker(
-                self.connection.client.set, key, serialized_value, ex=ttl
-            )
-        return await self._execute_with_circuit_breaker(
-            self.connection.client.set, key, serialized_value
-        )
+            return await self._call("set", key, serialized_value, ex=ttl)
+        return await self._call("set", key, serialized_value)
 
     async def get(
         self, key: str, serialization: SerializationMethod = SerializationMethod.NONE
     ) -> Any:
         """Get value by key"""
-        value = await self._execute_with_circuit_breaker(
-            self.connection.client.get, key
-        )
+        value = await self._call("get", key)
         if value is None:
             return None
-        return self.serializer.deserialize(value.decode("utf-8"), serialization)
+        redis_metrics.record_payload("get", "read", payload_size(value))
+        return self.serializer.deserialize(value, serialization)
 
     async def delete(self, *keys: str) -> int:
         """Delete one or more keys"""
-        return await self._execute_with_circuit_breaker(
-            self.connection.client.delete, *keys
-        )
+        return await self._call("delete", *keys)
 
     async def exists(self, *keys: str) -> int:
         """Check if keys exist"""
-        return await self._execute_with_circuit_breaker(
-            self.connection.client.exists, *keys
-        )
+        return await self._call("exists", *keys)
 
     async def expire(self, key: str, ttl: int) -> bool:
         """Set TTL on existing key"""
-        return await self._execute_with_circuit_breaker(
-            self.connection.client.expire, key, ttl
-        )
+        return await self._call("expire", key, ttl)
+
+    async def mget_many(
+        self,
+        keys: List[str],
+        serialization: SerializationMethod = SerializationMethod.NONE,
+    ) -> List[Any]:
+        """Get several values in one round trip; missing keys come back as None"""
+        if not keys:
+            return []
+        values = await self._call("mget", keys)
+        for value in values:
+            if value is not None:
+                redis_metrics.record_payload("mget", "read", payload_size(value))
+        return [
+            None if value is None else self.serializer.deserialize(value, serialization)
+            for value in values
+        ]
+
+    async def mset_many(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[int] = None,
+        serialization: SerializationMethod = SerializationMethod.NONE,
+    ) -> bool:
+        """Set several values, all with the same optional TTL, in one round trip"""
+        if not mapping:
+            return True
+        serialized = {
+            key: self.serializer.serialize(value, serialization)
+            for key, value in mapping.items()
+        }
+        for value in serialized.values():
+            redis_metrics.record_payload("mset", "write", payload_size(value))
+        if not ttl or ttl <= 0:
+            return await self._call("mset", serialized)
+        # MSET takes no TTL, so pipeline one SET EX per key instead
+        async with self.pipeline() as pipe:
+            for key, value in serialized.items():
+                pipe.set(key, value, ex=ttl)
+        return True
 
     # Hash Operations
     async def hset(
@@ -288,27 +498,40 @@ class RedisClient:
         serialization: SerializationMethod = SerializationMethod.NONE,
     ) -> Any:
         """Get hash field value"""
-        value = await self._execute_with_circuit_breaker(
-            self.connection.client.hget, key, field
-        )
+        value = await self._call("hget", key, field)
         if value is None:
             return None
-        return self.serializer.deserialize(value.decode("utf-8"), serialization)
+        return self.serializer.deserialize(value, serialization)
 
     async def hgetall(
         self, key: str, serialization: SerializationMethod = SerializationMethod.NONE
     ) -> Dict[str, Any]:
         """Get all hash fields"""
-        data = await self._execute_with_circuit_breaker(
-            self.connection.client.hgetall, key
-        )
+        data = await self._call("hgetall", key)
         return {
-            field.decode("utf-8"): self.serializer.deserialize(
-                value.decode("utf-8"), serialization
-            )
+            field.decode("utf-8"): self.serializer.deserialize(value, serialization)
             for field, value in data.items()
         }
 
+    async def hgetall_many(self, *keys: str) -> List[Dict[str, str]]:
+        """Get all fields of several hashes in one round trip"""
+        if not keys:
+            return []
+        if not self.connection.is_initialized:
+            await self.connection.initialize()
+
+        pipe = self.connection.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        results = await self._execute_with_circuit_breaker(pipe.execute)
+        return [
+            {
+                field.decode("utf-8"): value.decode("utf-8")
+                for field, value in data.items()
+            }
+            for data in results
+        ]
+
     # List Operations
     async def lpush(
         self,
@@ -349,10 +572,7 @@ class RedisClient:
         values = await self._execute_with_circuit_breaker(
             self.connection.client.lrange, key, start, end
         )
-        return [
-            self.serializer.deserialize(v.decode("utf-8"), serialization)
-            for v in values
-        ]
+        return [self.serializer.deserialize(v, serialization) for v in values]
 
     async def lpop(
         self, key: str, serialization: SerializationMethod = SerializationMethod.NONE
@@ -363,7 +583,7 @@ class RedisClient:
         )
         if value is None:
             return None
-        return self.serializer.deserialize(value.decode("utf-8"), serialization)
+        return self.serializer.deserialize(value, serialization)
 
     async def rpop(
         self, key: str, serialization: SerializationMethod = SerializationMethod.NONE
@@ -374,7 +594,7 @@ class RedisClient:
         )
         if value is None:
             return None
-        return self.serializer.deserialize(value.decode("utf-8"), serialization)
+        return self.serializer.deserialize(value, serialization)
 
     # Set Operations
     async def sadd(
@@ -398,10 +618,7 @@ class RedisClient:
         values = await self._execute_with_circuit_breaker(
             self.connection.client.smembers, key
         )
-        return [
-            self.serializer.deserialize(v.decode("utf-8"), serialization)
-            for v in values
-        ]
+        return [self.serializer.deserialize(v, serialization) for v in values]
 
     async def srem(self, key: str, *values: Any) -> int:
         """Remove members from set"""
@@ -416,12 +633,21 @@ class RedisClient:
         )
 
     # Key Operations
-    async def keys(self, pattern: str) -> List[str]:
-        """Find keys matching pattern"""
-        keys = await self._execute_with_circuit_breaker(
-            self.connection.client.keys, pattern
+    async def keys(self, pattern: str, count: int = 500) -> List[str]:
+        """Find keys matching pattern (incremental SCAN, never the blocking KEYS)"""
+        return [key async for key in self.scan_iter(match=pattern, count=count)]
+
+    async def unlink(self, *keys: str) -> int:
+        """Remove keys, reclaiming their memory in the background"""
+        if not keys:
+            return 0
+        return await self._execute_with_circuit_breaker(
+            self.connection.client.unlink, *keys
         )
-        return [key.decode("utf-8") for key in keys]
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """Increment integer value of key"""
+        return await self._call("incr", key, amount)
 
     async def ttl(self, key: str) -> int:
         """Get TTL of key"""
@@ -462,16 +688,49 @@ class RedisClient:
         )
 
     # Distributed Locking
-    async def acquire_lock(self, key: str, timeout: float = 10.0) -> bool:
-        """Acquire distributed lock"""
-        return await self._execute_with_circuit_breaker(
-            self.connection.client.set, key, "locked", nx=True, ex=int(timeout)
+    async def acquire_lock(self, key: str, timeout: float = 10.0) -> Optional[str]:
+        """Acquire distributed lock; returns the owner token needed to release it"""
+        token = new_token()
+        acquired = await self._execute_with_circuit_breaker(
+            self.connection.client.set, key, token, nx=True, px=int(timeout * 1000)
         )
+        return token if acquired else None
 
-    async def release_lock(self, key: str) -> bool:
-        """Release distributed lock"""
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release distributed lock, only if still held by ``token``"""
+        released = await self.run_script(
+            RELEASE_LOCK_SCRIPT, [key], [token, release_channel(key)]
+        )
+        return bool(released)
+
+    async def single_flight(
+        self,
+        key: str,
+        load: Callable[[], Any],
+        build: Callable[[], Any],
+        lease_seconds: float = 30.0,
+        wait_timeout: float = 120.0,
+    ) -> Any:
+        """Load a value, or let exactly one caller rebuild it (see core/single_flight)"""
+        if not self.circuit_breaker.can_execute():
+            # Redis is down: build without coordinating rather than wait on it
+            value = await load()
+            return value if value is not None else await build()
+        if not self.connection.is_initialized:
+            await self.connection.initialize()
+        return await single_flight(
+            BreakerRoutedClient(self), key, load, build, lease_seconds, wait_timeout
+        )
+
+    # Scripting
+    async def run_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """Run a Lua script by SHA, loading it on first use"""
+        if not self.connection.is_initialized:
+            await self.connection.initialize()
+        if script not in self._scripts:
+            self._scripts[script] = self.connection.client.register_script(script)
         return await self._execute_with_circuit_breaker(
-            self.connection.client.delete, key
+            self._scripts[script], keys=keys, args=args
         )
 
     # Pipeline Operations
@@ -484,7 +743,7 @@ class RedisClient:
         pipe = self.connection.client.pipeline(transaction=transaction)
         try:
             yield pipe
-            await pipe.execute()
+            await self._execute_with_circuit_breaker(pipe.execute)
         except Exception:
             raise
         finally:
@@ -514,9 +773,7 @@ class RedisClient:
     # Pub/Sub Operations
     async def publish(self, channel: str, message: Any) -> int:
         """Publish message to channel"""
-        return await self._execute_with_circuit_breaker(
-            self.connection.client.publish, channel, message
-        )
+        return await self._call("publish", channel, message)
 
     async def subscribe(self, *channels: str):
         """Subscribe to channels"""
@@ -530,6 +787,31 @@ class RedisClient:
         """Unsubscribe from channels"""
         await pubsub.unsubscribe(*channels)
 
+    # Stream Operations
+    async def xadd(
+        self,
+        name: str,
+        fields: Dict[str, Any],
+        maxlen: Optional[int] = None,
+        approximate: bool = True,
+    ) -> str:
+        """Append an entry to a stream, optionally capping its length"""
+        return await self._execute_with_circuit_breaker(
+            self.connection.client.xadd,
+            name,
+            fields,
+            maxlen=maxlen,
+            approximate=approximate,
+        )
+
+    async def xrange(
+        self, name: str, min: str = "-", max: str = "+", count: Optional[int] = None
+    ) -> List[Any]:
+        """Read stream entries between two ids"""
+        return await self._execute_with_circuit_breaker(
+            self.connection.client.xrange, name, min=min, max=max, count=count
+        )
+
     # Scan Operations
     async def scan(
         self, cursor: int = 0, match: Optional[str] = None, count: Optional[int] = None
@@ -539,6 +821,20 @@ class RedisClient:
             self.connection.client.scan, cursor, match=match, count=count
         )
 
+    async def scan_iter(
+        self, match: Optional[str] = None, count: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Iterate keys matching ``match``, ``count`` per SCAN call"""
+        if not self.connection.is_initialized:
+            await self.connection.initialize()
+        cursor = 0
+        while True:
+            cursor, keys = await self.scan(cursor, match=match, count=count)
+            for key in keys:
+                yield key.decode("utf-8") if isinstance(key, bytes) else key
+            if not cursor:
+                break
+
     async def hscan(
         self,
         key: str,
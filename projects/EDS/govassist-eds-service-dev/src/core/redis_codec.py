@@ -0,0 +1,150 @@
+import json
+import zlib
+from typing import Any, Optional, Union
+
+from src.core.config import configs
+
+# Faster codecs, declared as dependencies; the stdlib fallbacks are only used
+# for writing when one is missing. Values another process wrote with them
+# still need them to be read.
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+# Encoded values start with MAGIC + version + body codec + compression. JSON
+# and plain text never start with a NUL byte, so values written before the
+# codec existed are told apart and decoded as JSON.
+MAGIC = b"\x00RC"
+VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+CODEC_JSON = 0
+CODEC_ORJSON = 1
+CODEC_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+_CODEC_IDS = {"json": CODEC_JSON, "orjson": CODEC_ORJSON, "msgpack": CODEC_MSGPACK}
+
+
+def _require(module: Any, name: str) -> Any:
+    if module is None:
+        raise RuntimeError(
+            f"Redis value was encoded with {name}, which is not installed here"
+        )
+    return module
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Same coercion JSON callers get from default=str
+    return str(value)
+
+
+class RedisCodec:
+    """
+    Compact, versioned encoding for values stored in Redis.
+
+    Bodies are msgpack or orjson (falling back to stdlib json when the
+    preferred library is not installed) and are compressed with zstd, or zlib
+    without it, once they exceed ``compression_threshold`` bytes.
+    """
+
+    def __init__(
+        self,
+        codec: str = configs.REDIS_CODEC,
+        compression_threshold: int = configs.REDIS_COMPRESSION_THRESHOLD,
+    ):
+        codec_id = _CODEC_IDS.get(codec, CODEC_JSON)
+        if codec_id == CODEC_MSGPACK and msgpack is None:
+            codec_id = CODEC_ORJSON
+        if codec_id == CODEC_ORJSON and orjson is None:
+            codec_id = CODEC_JSON
+        self.codec_id = codec_id
+        self.compression_threshold = compression_threshold
+        self.compression_id = COMPRESSION_ZSTD if zstandard else COMPRESSION_ZLIB
+        self._compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    @staticmethod
+    def is_encoded(raw: Union[bytes, str, None]) -> bool:
+        return isinstance(raw, bytes) and raw[: len(MAGIC)] == MAGIC
+
+    def _dumps(self, value: Any) -> bytes:
+        if self.codec_id == CODEC_MSGPACK:
+            return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+        if self.codec_id == CODEC_ORJSON:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _loads(codec_id: int, body: bytes) -> Any:
+        if codec_id == CODEC_MSGPACK:
+            return _require(msgpack, "msgpack").unpackb(
+                body, raw=False, strict_map_key=False
+            )
+        # orjson output is plain JSON, so stdlib json can read it too
+        if codec_id == CODEC_ORJSON and orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+
+    def _decompress(self, compression_id: int, body: bytes) -> bytes:
+        if compression_id == COMPRESSION_ZSTD:
+            decompressor = (
+                self._decompressor
+                or _require(zstandard, "zstandard").ZstdDecompressor()
+            )
+            return decompressor.decompress(body)
+        if compression_id == COMPRESSION_ZLIB:
+            return zlib.decompress(body)
+        return body
+
+    def encode(self, value: Any) -> bytes:
+        body = self._dumps(value)
+        compression_id = COMPRESSION_NONE
+        if len(body) > self.compression_threshold:
+            if self._compressor:
+                compressed = self._compressor.compress(body)
+            else:
+                compressed = zlib.compress(body, 6)
+            if len(compressed) < len(body):
+                body, compression_id = compressed, self.compression_id
+        return MAGIC + bytes((VERSION, self.codec_id, compression_id)) + body
+
+    def decode(self, raw: Union[bytes, str, None]) -> Optional[Any]:
+        """Decode a value written by ``encode``, or a legacy JSON value"""
+        if raw is None:
+            return None
+        if not self.is_encoded(raw):
+            if isinstance(raw, bytes):
+                raw = raw.decode("utf-8")
+            return json.loads(raw)
+
+        version, codec_id, compression_id = raw[len(MAGIC) : HEADER_SIZE]
+        if version != VERSION:
+            raise ValueError(f"Unsupported Redis codec version: {version}")
+        body = self._decompress(compression_id, raw[HEADER_SIZE:])
+        return self._loads(codec_id, body)
+
+
+redis_codec = RedisCodec()
+
+
+def encode_cache_value(value: Any) -> Union[bytes, str]:
+    """Encode a value the way CacheManager writes it, for synchronous writers"""
+    if configs.REDIS_COMPACT_SERIALIZATION:
+        return redis_codec.encode(value)
+    return json.dumps(value)
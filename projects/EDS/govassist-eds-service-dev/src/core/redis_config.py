@@ -8,6 +8,7 @@ from src.core.config import configs
 class SerializationMethod(Enum):
     JSON = "json"
     PICKLE = "pickle"
+    COMPACT = "compact"
     NONE = "none"
 
 
@@ -47,3 +48,7 @@ class RedisConfig:
 
     # Serialization
     default_serialization: SerializationMethod = SerializationMethod.JSON
+
+    # Automatic batching
+    auto_batch: bool = configs.REDIS_AUTO_BATCH
+    auto_batch_max_size: int = configs.REDIS_AUTO_BATCH_MAX_SIZE
@@ -0,0 +1,271 @@
+import threading
+import time
+import weakref
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+from redis.asyncio.connection import ConnectionPool
+
+# Bucket upper bounds; also used for the OpenTelemetry views (see redis_metric_views)
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+COMMAND_DURATION = "redis.client.command.duration"
+POOL_WAIT_DURATION = "redis.client.pool.wait.duration"
+PAYLOAD_SIZE = "redis.client.payload.size"
+
+BREAKER_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class LocalHistogram:
+    """Cumulative bucketed histogram per label set, for the /metrics endpoint"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self._series: Dict[LabelSet, List[float]] = {}
+
+    def record(self, value: float, labels: LabelSet):
+        # Layout: one count per bucket, then +Inf count, then sum
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def items(self) -> Iterable[Tuple[LabelSet, List[float]]]:
+        return list(self._series.items())
+
+
+class InstrumentedConnectionPool(ConnectionPool):
+    """Connection pool that reports how long, and how many, callers wait for a connection"""
+
+    async def get_connection(self, *args, **kwargs):
+        redis_metrics.pool_waiting += 1
+        start = time.perf_counter()
+        try:
+            return await super().get_connection(*args, **kwargs)
+        finally:
+            redis_metrics.pool_waiting -= 1
+            redis_metrics.record_pool_wait(time.perf_counter() - start)
+
+
+class RedisMetrics:
+    """
+    Redis client metrics: per-command latency, connection pool usage,
+    payload sizes and circuit breaker state.
+
+    Everything is recorded into OpenTelemetry instruments, exported by the
+    app's meter provider, and kept in-process for the local /metrics endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pool_waiting = 0
+        self._pools: "weakref.WeakSet[ConnectionPool]" = weakref.WeakSet()
+        self._breakers: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+        self._latency = LocalHistogram(LATENCY_BUCKETS)
+        self._pool_wait = LocalHistogram(LATENCY_BUCKETS)
+        self._payload = LocalHistogram(SIZE_BUCKETS)
+        self._transitions: Dict[LabelSet, int] = defaultdict(int)
+
+        meter = metrics.get_meter("src.core.redis_client")
+        self._otel_latency = meter.create_histogram(
+            COMMAND_DURATION, unit="s", description="Redis command latency"
+        )
+        self._otel_pool_wait = meter.create_histogram(
+            POOL_WAIT_DURATION,
+            unit="s",
+            description="Time spent getting a connection from the pool",
+        )
+        self._otel_payload = meter.create_histogram(
+            PAYLOAD_SIZE, unit="By", description="Size of values written and read"
+        )
+        self._otel_transitions = meter.create_counter(
+            "redis.client.circuit_breaker.transitions",
+            description="Circuit breaker state changes",
+        )
+        meter.create_observable_gauge(
+            "redis.client.pool.connections",
+            callbacks=[self._observe_pool],
+            description="Connections in use and idle, and callers waiting for one",
+        )
+        meter.create_observable_gauge(
+            "redis.client.circuit_breaker.state",
+            callbacks=[self._observe_breakers],
+            description="0 closed, 1 half open, 2 open",
+        )
+
+    # Registration
+    def register_pool(self, pool: ConnectionPool):
+        self._pools.add(pool)
+
+    def register_breaker(self, breaker: Any):
+        self._breakers.add(breaker)
+
+    # Recording
+    def record_command(self, command: str, seconds: float, ok: bool):
+        labels = (("command", command), ("outcome", "ok" if ok else "error"))
+        with self._lock:
+            self._latency.record(seconds, labels)
+        self._otel_latency.record(seconds, dict(labels))
+
+    def record_pool_wait(self, seconds: float):
+        with self._lock:
+            self._pool_wait.record(seconds, ())
+        self._otel_pool_wait.record(seconds)
+
+    def record_payload(self, command: str, direction: str, size: int):
+        labels = (("command", command), ("direction", direction))
+        with self._lock:
+            self._payload.record(size, labels)
+        self._otel_payload.record(size, dict(labels))
+
+    def record_breaker_transition(self, previous: str, current: str):
+        labels = (("from", previous), ("to", current))
+        with self._lock:
+            self._transitions[labels] += 1
+        self._otel_transitions.add(1, dict(labels))
+
+    # Observation
+    def pool_usage(self) -> Dict[str, int]:
+        in_use = idle = max_connections = 0
+        for pool in list(self._pools):
+            in_use += len(pool._in_use_connections)
+            idle += len(pool._available_connections)
+            max_connections += pool.max_connections
+        return {
+            "in_use": in_use,
+            "idle": idle,
+            "waiting": self.pool_waiting,
+            "max": max_connections,
+        }
+
+    def _observe_pool(self, options: CallbackOptions) -> Iterable[Observation]:
+        for state, value in self.pool_usage().items():
+            yield Observation(value, {"state": state})
+
+    def breaker_states(self) -> List[str]:
+        return [breaker.state.value for breaker in list(self._breakers)]
+
+    def _observe_breakers(self, options: CallbackOptions) -> Iterable[Observation]:
+        for state in self.breaker_states():
+            yield Observation(BREAKER_STATE_VALUES[state])
+
+    # Prometheus text exposition
+    @staticmethod
+    def _format_labels(
+        labels: LabelSet, extra: Tuple[Tuple[str, str], ...] = ()
+    ) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def _render_histogram(
+        self, name: str, help_text: str, histogram: LocalHistogram
+    ) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, series in histogram.items():
+            for bound, count in zip(histogram.buckets, series[:-2], strict=True):
+                lines.append(
+                    f"{name}_bucket{self._format_labels(labels, (('le', str(bound)),))} {count:g}"
+                )
+            lines.append(
+                f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {series[-2]:g}"
+            )
+            lines.append(f"{name}_count{self._format_labels(labels)} {series[-2]:g}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {series[-1]:g}")
+        return lines
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            lines = self._render_histogram(
+                "redis_client_command_duration_seconds",
+                "Redis command latency",
+                self._latency,
+            )
+            lines += self._render_histogram(
+                "redis_client_pool_wait_duration_seconds",
+                "Time spent getting a connection from the pool",
+                self._pool_wait,
+            )
+            lines += self._render_histogram(
+                "redis_client_payload_size_bytes",
+                "Size of values written and read",
+                self._payload,
+            )
+            lines += [
+                "# HELP redis_client_circuit_breaker_transitions_total Circuit breaker state changes",
+                "# TYPE redis_client_circuit_breaker_transitions_total counter",
+            ]
+            for labels, count in self._transitions.items():
+                lines.append(
+                    f"redis_client_circuit_breaker_transitions_total{self._format_labels(labels)} {count}"
+                )
+
+        lines += [
+            "# HELP redis_client_pool_connections Connections in use and idle, and callers waiting for one",
+            "# TYPE redis_client_pool_connections gauge",
+        ]
+        for state, value in self.pool_usage().items():
+            lines.append(f'redis_client_pool_connections{{state="{state}"}} {value}')
+        lines += [
+            "# HELP redis_client_circuit_breaker_state 0 closed, 1 half open, 2 open",
+            "# TYPE redis_client_circuit_breaker_state gauge",
+        ]
+        for state in self.breaker_states():
+            lines.append(
+                f"redis_client_circuit_breaker_state {BREAKER_STATE_VALUES[state]}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def redis_metric_views() -> List[Any]:
+    """Views giving the Redis histograms buckets suited to their units"""
+    from opentelemetry.sdk.metrics.view import (
+        ExplicitBucketHistogramAggregation,
+        View,
+    )
+
+    return [
+        View(
+            instrument_name=name,
+            aggregation=ExplicitBucketHistogramAggregation(boundaries=buckets),
+        )
+        for name, buckets in (
+            (COMMAND_DURATION, LATENCY_BUCKETS),
+            (POOL_WAIT_DURATION, LATENCY_BUCKETS),
+            (PAYLOAD_SIZE, SIZE_BUCKETS),
+        )
+    ]
+
+
+def payload_size(value: Any) -> int:
+    """Size of a serialized value; characters stand in for bytes on text"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    return len(str(value))
+
+
+redis_metrics = RedisMetrics()
@@ -0,0 +1,71 @@
+from typing import Any
+
+from loguru import logger
+from redis import Redis
+
+# Cache families whose keys are versioned, so the whole family can be
+# invalidated by bumping one counter instead of deleting every key
+REPORT_QUERY_CACHE_NAMESPACE = "report_query"
+REPORT_QUERY_CACHE_TTL = 7200
+
+# Generation of the data reports are built from, kept as the version of its
+# own namespace. Ingestion bumps it, so every cache entry keyed by an older
+# generation is orphaned at once; changes made outside ingestion only show
+# once an entry's TTL lapses.
+REPORT_DATA_NAMESPACE = "report_data"
+
+# Preview result pages and counts, keyed by data generation
+REPORT_PREVIEW_CACHE_NAMESPACE = "report_preview"
+REPORT_PREVIEW_CACHE_TTL = 900
+
+# Report export artifacts, keyed by data generation. A record names the
+# export building the artifact, and its blob once built.
+REPORT_EXPORT_ARTIFACT_NAMESPACE = "report_export"
+REPORT_EXPORT_ARTIFACT_TTL = 86400
+
+NAMESPACE_VERSION_PREFIX = "nsversion"
+
+
+def namespace_version_key(namespace: str) -> str:
+    """Counter holding a namespace's current version; lives outside the namespace"""
+    return f"{NAMESPACE_VERSION_PREFIX}:{namespace}"
+
+
+def build_versioned_key(namespace: str, version: int, key: str) -> str:
+    return f"{namespace}:v{version}:{key}"
+
+
+def versioned_key_sync(redis_client: Redis, namespace: str, key: str) -> str:
+    """Key under the namespace's current version, for synchronous (Celery) callers"""
+    version = redis_client.get(namespace_version_key(namespace))
+    return build_versioned_key(namespace, int(version or 0), key)
+
+
+def bump_namespace_sync(redis_client: Redis, namespace: str) -> int:
+    """Move a versioned namespace to a new version, for synchronous (Celery) callers"""
+    return redis_client.incr(namespace_version_key(namespace))
+
+
+def invalidate_report_queries(redis_client: Redis):
+    """Orphan every cached report query after a report or sub-report write"""
+    try:
+        bump_namespace_sync(redis_client, REPORT_QUERY_CACHE_NAMESPACE)
+    except Exception as e:
+        # The write already committed; stale entries still lapse with their TTL
+        logger.warning(f"Could not invalidate the report query cache: {e}")
+
+
+def report_preview_key(
+    generation: int, plan_hash: str, filters_hash: str, *parts: Any
+) -> str:
+    return build_versioned_key(
+        REPORT_PREVIEW_CACHE_NAMESPACE,
+        generation,
+        ":".join([plan_hash, filters_hash, *(str(part) for part in parts)]),
+    )
+
+
+def report_export_key(generation: int, export_hash: str, export_format: str) -> str:
+    return build_versioned_key(
+        REPORT_EXPORT_ARTIFACT_NAMESPACE, generation, f"{export_hash}:{export_format}"
+    )
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import redis
+import redis.asyncio as redis_async
+from loguru import logger
+
+T = TypeVar("T")
+
+# Deletes the lock only for its owner and wakes everyone waiting on it.
+# KEYS[1]: lock key, ARGV[1]: owner token, ARGV[2]: notification channel
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    redis.call("DEL", KEYS[1])
+    redis.call("PUBLISH", ARGV[2], "released")
+    return 1
+end
+return 0
+"""
+
+# Extends the lease only for its owner.
+# KEYS[1]: lock key, ARGV[1]: owner token, ARGV[2]: lease in milliseconds
+RENEW_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def lock_key(key: str) -> str:
+    return f"singleflight:{key}"
+
+
+def release_channel(key: str) -> str:
+    return f"singleflight:{key}:released"
+
+
+def new_token() -> str:
+    return uuid.uuid4().hex
+
+
+def single_flight_sync(
+    redis_client: redis.Redis,
+    key: str,
+    load: Callable[[], Optional[T]],
+    build: Callable[[], T],
+    lease_seconds: float = 30.0,
+    wait_timeout: float = 120.0,
+) -> T:
+    """
+    Return ``load()`` or, on a miss, make sure only one caller across all
+    processes runs ``build()`` for ``key``.
+
+    ``build`` must compute the value and store it where ``load`` reads it.
+    The caller holding the lease renews it while building; everyone else
+    blocks until the lease is released and then reads the fresh value. If
+    the builder dies, its lease lapses and a waiter takes over. Past
+    ``wait_timeout`` a waiter builds the value itself.
+    """
+    value = load()
+    if value is not None:
+        return value
+
+    name = lock_key(key)
+    channel = release_channel(key)
+    release = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+    renew = redis_client.register_script(RENEW_LOCK_SCRIPT)
+    lease_ms = int(lease_seconds * 1000)
+    deadline = time.monotonic() + wait_timeout
+
+    while time.monotonic() < deadline:
+        token = new_token()
+        if redis_client.set(name, token, nx=True, px=lease_ms):
+            stop = threading.Event()
+
+            def keep_alive(stop: threading.Event, token: str):
+                while not stop.wait(lease_seconds / 3):
+                    if not renew(keys=[name], args=[token, lease_ms]):
+                        logger.warning(f"Lost single-flight lease for {key}")
+                        return
+
+            renewer = threading.Thread(
+                target=keep_alive, args=(stop, token), daemon=True
+            )
+            renewer.start()
+            try:
+                # Another builder may have finished between our miss and the lock
+                value = load()
+                return value if value is not None else build()
+            finally:
+                stop.set()
+                renewer.join()
+                release(keys=[name], args=[token, channel])
+
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(channel)
+            # Wait unless the lease was released before we subscribed
+            while redis_client.exists(name) and time.monotonic() < deadline:
+                if pubsub.get_message(timeout=min(1.0, lease_seconds)):
+                    break
+        finally:
+            pubsub.close()
+
+        value = load()
+        if value is not None:
+            return value
+
+    logger.warning(f"Timed out waiting for single-flight build of {key}")
+    return build()
+
+
+async def single_flight(
+    redis_client: redis_async.Redis,
+    key: str,
+    load: Callable[[], Awaitable[Optional[T]]],
+    build: Callable[[], Awaitable[T]],
+    lease_seconds: float = 30.0,
+    wait_timeout: float = 120.0,
+) -> T:
+    """Async counterpart of ``single_flight_sync``"""
+    value = await load()
+    if value is not None:
+        return value
+
+    name = lock_key(key)
+    channel = release_channel(key)
+    release = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+    renew = redis_client.register_script(RENEW_LOCK_SCRIPT)
+    lease_ms = int(lease_seconds * 1000)
+    deadline = time.monotonic() + wait_timeout
+
+    while time.monotonic() < deadline:
+        token = new_token()
+        if await redis_client.set(name, token, nx=True, px=lease_ms):
+
+            async def keep_alive(token: str):
+                while True:
+                    await asyncio.sleep(lease_seconds / 3)
+                    if not await renew(keys=[name], args=[token, lease_ms]):
+                        logger.warning(f"Lost single-flight lease for {key}")
+                        return
+
+            renewer = asyncio.create_task(keep_alive(token))
+            try:
+                value = await load()
+                return value if value is not None else await build()
+            finally:
+                renewer.cancel()
+                await release(keys=[name], args=[token, channel])
+
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(channel)
+            while await redis_client.exists(name) and time.monotonic() < deadline:
+                if await pubsub.get_message(timeout=min(1.0, lease_seconds)):
+                    break
+        finally:
+            await pubsub.close()
+
+        value = await load()
+        if value is not None:
+            return value
+
+    logger.warning(f"Timed out waiting for single-flight build of {key}")
+    return await build()
@@ -0,0 +1,366 @@
+import asyncio
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type, Union
+
+import redis
+import redis.asyncio as redis_async
+from loguru import logger
+from pydantic import BaseModel
+
+from src.core.config import configs
+from src.core.redis_codec import redis_codec
+
+TagsArg = Union[Iterable[str], Callable[..., Iterable[str]]]
+
+
+class LocalLRU:
+    """
+    Bounded, thread-safe in-process LRU with per-entry expiry and tags.
+    ``get`` returns the stored object itself, so values must not be mutated.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Tuple[str, ...]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_tags(self, tags: Iterable[str]) -> int:
+        tags = set(tags)
+        with self._lock:
+            stale = [
+                key
+                for key, (_, _, entry_tags) in self._entries.items()
+                if tags & set(entry_tags)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+
+class CacheMetrics:
+    """Per-tag hit counters for both tiers"""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"local_hits": 0, "redis_hits": 0, "misses": 0}
+        )
+        self._lock = threading.Lock()
+
+    def record(self, tags: Tuple[str, ...], outcome: str):
+        with self._lock:
+            for tag in tags:
+                self._counts[tag][outcome] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {}
+            for tag, counts in self._counts.items():
+                total = sum(counts.values())
+                hits = counts["local_hits"] + counts["redis_hits"]
+                snapshot[tag] = {**counts, "hit_rate": hits / total if total else 0.0}
+            return snapshot
+
+
+class TieredCache:
+    """
+    Read-through cache with a bounded in-process LRU in front of Redis.
+
+    Entries carry tags. Invalidating a tag deletes its Redis entries (tracked
+    in one set per tag) and publishes the tag, so every replica drops its
+    local copies. Local entries also expire after ``local_ttl``, which bounds
+    staleness should an invalidation message be missed.
+
+    Values must be JSON-like; they are stored with the compact Redis codec.
+    Local entries are copied in and out, so callers may mutate what they get.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = configs.REDIS_URL,
+        prefix: str = "tcache",
+        channel: str = configs.CACHE_INVALIDATION_CHANNEL,
+        max_local_entries: int = configs.CACHE_LOCAL_MAX_ENTRIES,
+        local_ttl: float = configs.CACHE_LOCAL_TTL,
+    ):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.channel = channel
+        self.local_ttl = local_ttl
+        self.local = LocalLRU(max_local_entries)
+        self.metrics = CacheMetrics()
+        self._redis: Optional[redis.Redis] = None
+        self._async_redis: Optional[redis_async.Redis] = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=5.0, socket_connect_timeout=5.0
+            )
+        return self._redis
+
+    @property
+    def async_redis(self) -> redis_async.Redis:
+        if self._async_redis is None:
+            self._async_redis = redis_async.from_url(self.redis_url)
+        return self._async_redis
+
+    # Keys
+    def make_key(self, name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        def part(value: Any) -> Any:
+            if isinstance(value, BaseModel):
+                return value.model_dump(mode="json")
+            return value
+
+        raw = json.dumps(
+            [
+                [part(arg) for arg in args],
+                {key: part(value) for key, value in kwargs.items()},
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return f"{self.prefix}:{name}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    def tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    # Synchronous tier access
+    def get(self, key: str, tags: Tuple[str, ...]) -> Tuple[bool, Any]:
+        hit, value = self.local.get(key)
+        if hit:
+            self.metrics.record(tags, "local_hits")
+            return True, copy.deepcopy(value)
+        try:
+            raw = self.redis.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Tiered cache read failed for {key}: {e}")
+            raw = None
+        if raw is None:
+            self.metrics.record(tags, "misses")
+            return False, None
+        value = redis_codec.decode(raw)["v"]
+        self.local.set(key, copy.deepcopy(value), self.local_ttl, tags)
+        self.metrics.record(tags, "redis_hits")
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: int, tags: Tuple[str, ...]):
+        self.local.set(key, copy.deepcopy(value), min(self.local_ttl, ttl), tags)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, redis_codec.encode({"v": value}), ex=ttl)
+            for tag in tags:
+                pipe.sadd(self.tag_key(tag), key)
+                pipe.expire(self.tag_key(tag), ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Tiered cache write failed for {key}: {e}")
+
+    def invalidate(self, *tags: str):
+        """Drop every entry with any of the tags, here, in Redis and on other replicas"""
+        self.local.drop_tags(tags)
+        try:
+            tag_keys = [self.tag_key(tag) for tag in tags]
+            pipe = self.redis.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            keys = {key for members in pipe.execute() for key in members}
+            pipe = self.redis.pipeline(transaction=False)
+            if keys:
+                pipe.unlink(*keys)
+            pipe.unlink(*tag_keys)
+            pipe.publish(self.channel, json.dumps(list(tags)))
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Tiered cache invalidation failed for {tags}: {e}")
+
+    # Asynchronous tier access
+    async def get_async(self, key: str, tags: Tuple[str, ...]) -> Tuple[bool, Any]:
+        hit, value = self.local.get(key)
+        if hit:
+            self.metrics.record(tags, "local_hits")
+            return True, copy.deepcopy(value)
+        try:
+            raw = await self.async_redis.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Tiered cache read failed for {key}: {e}")
+            raw = None
+        if raw is None:
+            self.metrics.record(tags, "misses")
+            return False, None
+        value = redis_codec.decode(raw)["v"]
+        self.local.set(key, copy.deepcopy(value), self.local_ttl, tags)
+        self.metrics.record(tags, "redis_hits")
+        return True, value
+
+    async def set_async(self, key: str, value: Any, ttl: int, tags: Tuple[str, ...]):
+        self.local.set(key, copy.deepcopy(value), min(self.local_ttl, ttl), tags)
+        try:
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                pipe.set(key, redis_codec.encode({"v": value}), ex=ttl)
+                for tag in tags:
+                    pipe.sadd(self.tag_key(tag), key)
+                    pipe.expire(self.tag_key(tag), ttl)
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Tiered cache write failed for {key}: {e}")
+
+    async def invalidate_async(self, *tags: str):
+        self.local.drop_tags(tags)
+        try:
+            tag_keys = [self.tag_key(tag) for tag in tags]
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                keys = {key for members in await pipe.execute() for key in members}
+            async with self.async_redis.pipeline(transaction=False) as pipe:
+                if keys:
+                    pipe.unlink(*keys)
+                pipe.unlink(*tag_keys)
+                pipe.publish(self.channel, json.dumps(list(tags)))
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Tiered cache invalidation failed for {tags}: {e}")
+
+    async def listen_for_invalidations(self):
+        """Drop local entries for tags invalidated by other replicas; runs until cancelled"""
+        pubsub = self.async_redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                try:
+                    self.local.drop_tags(json.loads(message["data"]))
+                except (TypeError, json.JSONDecodeError) as e:
+                    logger.error(f"Invalid cache invalidation message: {e}")
+        finally:
+            await pubsub.close()
+
+
+tiered_cache = TieredCache()
+
+
+def _resolve_tags(
+    tags: TagsArg, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Tuple[str, ...]:
+    return tuple(tags(*args, **kwargs) if callable(tags) else tags)
+
+
+def cached(
+    tags: TagsArg,
+    ttl: int = configs.CACHE_DEFAULT_TTL,
+    model: Optional[Type[BaseModel]] = None,
+    name: Optional[str] = None,
+    cache: TieredCache = tiered_cache,
+):
+    """
+    Cache a function's result in the tiered cache.
+
+    ``tags`` is a list of tags or a callable taking the function's arguments.
+    When ``model`` is given, results (e.g. ORM objects) are validated against
+    it and stored, and returned, as JSON-ready dicts. Methods are keyed on
+    their arguments only, not on ``self``.
+    """
+
+    def decorator(func: Callable):
+        cache_name = name or func.__qualname__
+        skip_self = next(iter(inspect.signature(func).parameters), None) == "self"
+
+        def to_cacheable(result: Any) -> Any:
+            if model is None:
+                return result
+            return model.model_validate(result, from_attributes=True).model_dump(
+                mode="json"
+            )
+
+        def key_for(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+            return cache.make_key(cache_name, args[1:] if skip_self else args, kwargs)
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = key_for(args, kwargs)
+                entry_tags = _resolve_tags(tags, args, kwargs)
+                hit, value = await cache.get_async(key, entry_tags)
+                if hit:
+                    return value
+                value = to_cacheable(await func(*args, **kwargs))
+                await cache.set_async(key, value, ttl, entry_tags)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = key_for(args, kwargs)
+            entry_tags = _resolve_tags(tags, args, kwargs)
+            hit, value = cache.get(key, entry_tags)
+            if hit:
+                return value
+            value = to_cacheable(func(*args, **kwargs))
+            cache.set(key, value, ttl, entry_tags)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*tags: str, cache: TieredCache = tiered_cache):
+    """Invalidate the given tags after the decorated write succeeds"""
+
+    def decorator(func: Callable):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                await cache.invalidate_async(*tags)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            cache.invalidate(*tags)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def cache_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-tag hit counts and hit rate of the shared tiered cache"""
+    return tiered_cache.metrics.snapshot()
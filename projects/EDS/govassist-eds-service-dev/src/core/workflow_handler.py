@@ -1,8 +1,10 @@
+import hashlib
 import json
+import os
 import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
 import requests
@@ -11,23 +13,33 @@ from redis import Redis
 
 from src.celery_app import database
 from src.core.config import configs
+from src.core.redis_namespace import REPORT_DATA_NAMESPACE, bump_namespace_sync
 from src.repository.workflow_repository import WorkflowRepository
 from src.schema.workflow_schema import (
     ExcelSheetName,
     FileProcessingInfo,
     FileProcessingStatus,
     LogLevel,
+    WorkflowCheckpointStage,
+    WorkflowProgressCreate,
     WorkflowStateUpdate,
     WorkflowStatus,
     WorkflowStepEnum,
 )
 from src.services.workflow_crud_service import WorkflowCrudService
-from src.services.workflow_redis_manager import WorkflowRedisSchema
+from src.services.workflow_redis_manager import (
+    UPDATE_WORKFLOW_STATE_SCRIPT,
+    WorkflowRedisSchema,
+    WorkflowStateCodec,
+    WorkflowStream,
+    build_log_entry,
+    build_workflow_event,
+)
 from src.services.workflow_service import ExcelDataMigrationService, MigrationResult
 from src.schema.workflow_master_data_schema import WorkflowFundSchema, WorkflowProgramSchema,  WorkflowCostCenterSchema, WorkflowAccountSchema, WorkflowAwardSchema, WorkflowSponsorSchema, WorkflowParentTaskSchema
 from src.schema.workflow_master_data_schema import WorkflowProjectSchemaForValidation, WorkflowTransactionSchemaForValidation
+from src.util.excel_stream_writer import split_workbook_rows
 from openpyxl import Workbook
-import shutil
 class CeleryWorkflowManager:
     """Synchronous workflow manager for Celery tasks"""
 
@@ -40,91 +52,69 @@ class CeleryWorkflowManager:
         self.redis_client = redis_client
         self.schema = schema
         self.workflow_service = workflow_service
+        self._update_state_script = redis_client.register_script(
+            UPDATE_WORKFLOW_STATE_SCRIPT
+        )
 
     def update_workflow_status_sync(
-        self, workflow_id: str, data: WorkflowStateUpdate
+        self,
+        workflow_id: str,
+        data: WorkflowStateUpdate,
+        logs: Optional[List[Dict[str, Any]]] = None,
     ) -> bool:
-        """Generic Redis workflow state updater"""
+        """
+        Generic Redis workflow state updater. The state change, its event and
+        ``logs`` are written by the update script itself, all in one round trip.
+        """
         try:
-            redis_key = self.schema.workflow_state_key(workflow_id)
-            workflow_data = self.redis_client.get(redis_key)
-            if not workflow_data:
-                return False
-
-            workflow_dict = json.loads(workflow_data.decode())
-
             update_dict = data.model_dump(exclude_unset=True)
+            files = update_dict.pop("files", None) or {}
+            status = update_dict.get("status", "updated")
+
+            # One atomic server-side update per file, each emitting its own
+            # event; workflow fields and logs ride on the first
+            updates = [(None, {})] if not files else list(files.items())
+            workflow_fields = update_dict
+            pipe = self.redis_client.pipeline(transaction=False)
+            for file_id, file_fields in updates:
+                keys, args = WorkflowStateCodec.update_args(
+                    self.schema, workflow_id, workflow_fields, file_id, file_fields
+                )
+                args.append(WorkflowStream.emit_arg(workflow_id, status, logs))
+                self._update_state_script(keys=keys, args=args, client=pipe)
+                workflow_fields, logs = {}, None
 
-            # Handle top-level updates
-            for key, value in update_dict.items():
-                if key == "files" and isinstance(value, dict):
-                    # Update nested files
-                    for file_id, file_update in value.items():
-                        if file_id not in workflow_dict["files"]:
-                            workflow_dict["files"][file_id] = {}
-                        for f_key, f_value in file_update.items():
-                            if f_value is not None:
-                                workflow_dict["files"][file_id][f_key] = f_value
-                elif value is not None:
-                    workflow_dict[key] = value
-
-            now = datetime.now(timezone.utc).isoformat()
-
-            # Auto-set timestamps
-            if update_dict.get(
-                "status"
-            ) == WorkflowStatus.DOWNLOADING.value and not workflow_dict.get(
-                "started_at"
-            ):
-                workflow_dict["started_at"] = now
-            if update_dict.get("status") in [
-                WorkflowStatus.COMPLETED.value,
-                WorkflowStatus.FAILED.value,
-                WorkflowStatus.CANCELLED.value,
-            ]:
-                workflow_dict["completed_at"] = now
-
-            self.redis_client.set(
-                redis_key, json.dumps(workflow_dict), ex=86400 * 7  # 7-day expiry
-            )
-
-            # Emit workflow update via Redis Pub/Sub
-            self.emit_workflow_update_sync(
-                workflow_id, update_dict.get("status", "updated"), workflow_dict
-            )
-
-            return True
+            return all(pipe.execute())
 
         except Exception as e:
             logger.exception(f"Failed to update workflow {workflow_id}: {e}")
             return False
 
     def emit_workflow_update_sync(
-        self, workflow_id: str, status: str, workflow_data: Dict[str, Any]
+        self,
+        workflow_id: str,
+        status: str,
+        workflow_data: Dict[str, Any],
+        seq: Optional[int] = None,
     ):
-        """Emit workflow update via Redis Pub/Sub (Celery pushes to Redis, server emits via Socket.IO)"""
+        """Emit workflow update via the Redis streams (Celery pushes to Redis, server emits via Socket.IO)"""
         try:
             # Create the message to publish to Redis
-            message = {
-                "workflow_id": workflow_id,
-                "status": status,
-                "data": workflow_data,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-            }
+            message = build_workflow_event(workflow_id, status, workflow_data, seq)
 
-            # Publish to Redis channel (synchronous operation)
-            self.redis_client.publish(configs.WORKFLOW_UPDATES, json.dumps(message))
+            # Append to the workflow's stream and the shared events stream in one round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            WorkflowStream.queue(pipe, self.schema, workflow_id, event=message)
+            pipe.execute()
 
         except Exception as e:
             logger.error(f"Failed to publish workflow update to Redis: {e}")
 
     def get_workflow_progress(self, workflow_id: str) -> float:
-        redis_key = self.schema.workflow_state_key(workflow_id)
-        workflow_data = self.redis_client.get(redis_key)
-        if not workflow_data:
-            return 0.0
-        workflow_dict = json.loads(workflow_data.decode())
-        return workflow_dict.get("progress_percentage", 0.0)
+        progress = self.redis_client.hget(
+            self.schema.workflow_state_key(workflow_id), "progress_percentage"
+        )
+        return float(progress) if progress else 0.0
 
     def add_log_sync(
         self,
@@ -136,19 +126,48 @@ class CeleryWorkflowManager:
         step: Optional[str] = None,
     ):
         """Synchronous log addition for Celery tasks"""
-        log_entry = {
-            "workflow_id": workflow_db_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "level": level.value,
-            "message": message,
-            "file_name": file_name,
-            "step": step,
-        }
-        # Use the actual redis_client instance
-        self.redis_client.lpush(
-            self.schema.workflow_logs_key(workflow_id), json.dumps(log_entry)
+        self.add_logs_sync(
+            workflow_id,
+            [build_log_entry(workflow_db_id, level, message, file_name, step)],
         )
 
+    def add_logs_sync(self, workflow_id: str, log_entries: List[Dict[str, Any]]):
+        """Append several log entries to the workflow stream in one pipeline"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        WorkflowStream.queue(pipe, self.schema, workflow_id, logs=log_entries)
+        pipe.execute()
+
+    def iter_workflow_stream(
+        self, stream_key: str, kind: Optional[str] = None, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield a workflow stream in pages of decoded entries, oldest first"""
+        cursor = None
+        while True:
+            entries = WorkflowStream.decode(
+                self.redis_client.xrange(
+                    stream_key, min=WorkflowStream.range_start(cursor), count=batch_size
+                )
+            )
+            if not entries:
+                return
+            cursor = entries[-1]["id"]
+            yield [entry for entry in entries if kind is None or entry["kind"] == kind]
+
+    def persist_workflow_logs(self, workflow_id: str) -> int:
+        """Copy the workflow's logs into EdsWorkflowProgress with one streamed bulk insert"""
+        batches = (
+            [
+                WorkflowProgressCreate(**entry["data"]).model_dump(
+                    exclude={"level", "details"}
+                )
+                for entry in entries
+            ]
+            for entries in self.iter_workflow_stream(
+                self.schema.workflow_logs_key(workflow_id), kind=WorkflowStream.LOG
+            )
+        )
+        return self.workflow_service.bulk_insert_workflow_progress(batches)
+
     def set_workflow_result(self, workflow_id: str, result: Dict[str, Any]):
         """Synchronous version for Celery tasks"""
         self.redis_client.set(
@@ -157,6 +176,42 @@ class CeleryWorkflowManager:
             ex=86400 * 7,
         )
 
+    def save_checkpoint(
+        self, workflow_id: str, stage: WorkflowCheckpointStage, data: Dict[str, Any]
+    ):
+        """Record a completed stage and its artifacts so a retry can resume after it"""
+        redis_key = self.schema.workflow_checkpoint_key(workflow_id)
+        self.redis_client.hset(redis_key, stage.value, json.dumps(data, default=str))
+        self.redis_client.expire(redis_key, 86400 * 7)
+
+    def get_checkpoints(self, workflow_id: str) -> Dict[str, Any]:
+        """Checkpoints recorded by earlier attempts, keyed by stage"""
+        checkpoints = self.redis_client.hgetall(
+            self.schema.workflow_checkpoint_key(workflow_id)
+        )
+        return {
+            stage.decode("utf-8"): json.loads(data.decode("utf-8"))
+            for stage, data in checkpoints.items()
+        }
+
+    @staticmethod
+    def file_sha256(file_path: str) -> Optional[str]:
+        """Hash of a local file, or None if it no longer exists"""
+        if not file_path or not os.path.exists(file_path):
+            return None
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(configs.FILE_DOWNLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def artifacts_intact(self, files: List[Dict[str, Any]]) -> bool:
+        """Check checkpointed files are still on disk and unchanged"""
+        return all(
+            file.get("sha256") and self.file_sha256(file["content"]) == file["sha256"]
+            for file in files
+        )
+
     # TODO: Update this to use the new workflow state
     def download_sharepoint_files(
         self, workflow_id: str, items: List[Dict[str, Any]], workflow_db_id: int
@@ -199,26 +254,28 @@ class CeleryWorkflowManager:
                         ).model_dump(exclude_unset=True)
                     }
                 ),
-            )
-
-            self.add_log_sync(
-                workflow_id,
-                workflow_db_id,
-                LogLevel.INFO,
-                f"Downloading {file_name}",
-                file_name=file_name,
-                step=WorkflowStepEnum.DOWNLOAD.value,
+                logs=[
+                    build_log_entry(
+                        workflow_db_id,
+                        LogLevel.INFO,
+                        f"Downloading {file_name}",
+                        file_name=file_name,
+                        step=WorkflowStepEnum.DOWNLOAD.value,
+                    )
+                ],
             )
 
             try:
                 response = requests.get(file_download_url, timeout=30)
                 response.raise_for_status()
+                digest = hashlib.sha256()
                 with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
                     for chunk in response.iter_content(
                         chunk_size=configs.FILE_DOWNLOAD_CHUNK_SIZE
                     ):
                         if chunk:
                             tmp.write(chunk)
+                            digest.update(chunk)
                 logger.info("Downloaded file")
                 files.append(
                     {
@@ -226,6 +283,7 @@ class CeleryWorkflowManager:
                         "name": file_name,
                         "content": tmp.name,
                         "metadata": item,
+                        "sha256": digest.hexdigest(),
                     }
                 )
 
@@ -240,15 +298,15 @@ class CeleryWorkflowManager:
                             ).model_dump(exclude_unset=True)
                         }
                     ),
-                )
-
-                self.add_log_sync(
-                    workflow_id,
-                    workflow_db_id,
-                    LogLevel.INFO,
-                    f"{file_name} downloaded successfully",
-                    file_name=file_name,
-                    step=WorkflowStepEnum.DOWNLOAD.value,
+                    logs=[
+                        build_log_entry(
+                            workflow_db_id,
+                            LogLevel.INFO,
+                            f"{file_name} downloaded successfully",
+                            file_name=file_name,
+                            step=WorkflowStepEnum.DOWNLOAD.value,
+                        )
+                    ],
                 )
 
             except Exception as e:
@@ -266,15 +324,15 @@ class CeleryWorkflowManager:
                             ).model_dump(exclude_unset=True)
                         }
                     ),
-                )
-
-                self.add_log_sync(
-                    workflow_id,
-                    workflow_db_id,
-                    LogLevel.ERROR,
-                    f"Failed to download {file_name}: {str(e)}",
-                    file_name=file_name,
-                    step=WorkflowStepEnum.DOWNLOAD.value,
+                    logs=[
+                        build_log_entry(
+                            workflow_db_id,
+                            LogLevel.ERROR,
+                            f"Failed to download {file_name}: {str(e)}",
+                            file_name=file_name,
+                            step=WorkflowStepEnum.DOWNLOAD.value,
+                        )
+                    ],
                 )
         # Calculate percentage
         files_failed = len(items) - len(files)
@@ -338,14 +396,15 @@ class CeleryWorkflowManager:
                                 ).model_dump(exclude_unset=True)
                             }
                         ),
-                    )
-                    self.add_log_sync(
-                        workflow_id,
-                        workflow_db_id,
-                        LogLevel.INFO,
-                        f"{name} validation passed",
-                        file_name=name,
-                        step=WorkflowStepEnum.VALIDATION.value,
+                        logs=[
+                            build_log_entry(
+                                workflow_db_id,
+                                LogLevel.INFO,
+                                f"{name} validation passed",
+                                file_name=name,
+                                step=WorkflowStepEnum.VALIDATION.value,
+                            )
+                        ],
                     )
                 else:
                     self.update_workflow_status_sync(
@@ -358,14 +417,15 @@ class CeleryWorkflowManager:
                                 ).model_dump(exclude_unset=True)
                             }
                         ),
-                    )
-                    self.add_log_sync(
-                        workflow_id,
-                        workflow_db_id,
-                        LogLevel.WARNING,
-                        f"{name} validation failed",
-                        file_name=name,
-                        step=WorkflowStepEnum.VALIDATION.value,
+                        logs=[
+                            build_log_entry(
+                                workflow_db_id,
+                                LogLevel.WARNING,
+                                f"{name} validation failed",
+                                file_name=name,
+                                step=WorkflowStepEnum.VALIDATION.value,
+                            )
+                        ],
                     )
             except Exception as e:
                 self.update_workflow_status_sync(
@@ -378,14 +438,15 @@ class CeleryWorkflowManager:
                             ).model_dump(exclude_unset=True)
                         }
                     ),
-                )
-                self.add_log_sync(
-                    workflow_id,
-                    workflow_db_id,
-                    LogLevel.ERROR,
-                    f"Validation error for {name}: {str(e)}",
-                    file_name=name,
-                    step=WorkflowStepEnum.VALIDATION.value,
+                    logs=[
+                        build_log_entry(
+                            workflow_db_id,
+                            LogLevel.ERROR,
+                            f"Validation error for {name}: {str(e)}",
+                            file_name=name,
+                            step=WorkflowStepEnum.VALIDATION.value,
+                        )
+                    ],
                 )
 
         # Calculate percentage
@@ -403,9 +464,19 @@ class CeleryWorkflowManager:
         return valid_files, files_failed, scaled_progress
 
     def process_valid_files(
-        self, workflow_id: str, files: List[Dict[str, Any]], workflow_db_id: int
+        self,
+        workflow_id: str,
+        files: List[Dict[str, Any]],
+        workflow_db_id: int,
+        completed_files: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> Tuple[List[Dict[str, Any]], int, float]:
+        """
+        Migrate each file into the database. Files in ``completed_files``
+        (file id -> result summary from an earlier attempt) are skipped, and
+        every finished file is checkpointed so a retry can skip it too.
+        """
         results = []
+        completed_files = dict(completed_files or {})
 
         # Mark overall status as PROCESSING
         self.update_workflow_status_sync(
@@ -416,6 +487,18 @@ class CeleryWorkflowManager:
             name = file["name"]
             path = file["content"]
             file_id = file["id"]
+
+            if file_id in completed_files:
+                results.append(MigrationResult(**completed_files[file_id], details={}))
+                self.add_log_sync(
+                    workflow_id,
+                    workflow_db_id,
+                    LogLevel.INFO,
+                    f"{name} already processed by an earlier attempt, skipping",
+                    file_name=name,
+                    step=WorkflowStepEnum.PROCESSING.value,
+                )
+                continue
             self.add_log_sync(
                 workflow_id,
                 workflow_db_id,
@@ -443,7 +526,9 @@ class CeleryWorkflowManager:
                 with database.session() as session:
                     workflow_repository = WorkflowRepository(session)
                     workflow_service = ExcelDataMigrationService(workflow_repository)
-                    result = workflow_service.migrate_excel_file(path)
+                    result = workflow_service.migrate_excel_file(
+                        path, delta=configs.EXCEL_DELTA_INGESTION
+                    )
                     logger.info(f"{name} migration result")
 
             except Exception as e:
@@ -458,14 +543,6 @@ class CeleryWorkflowManager:
                     duration_seconds=duration,
                     details={},
                 )
-                self.add_log_sync(
-                    workflow_id,
-                    workflow_db_id,
-                    LogLevel.ERROR,
-                    f"Processing failed for {name}: {e}",
-                    file_name=name,
-                    step=WorkflowStepEnum.PROCESSING.value,
-                )
                 # Set file state: failed
                 self.update_workflow_status_sync(
                     workflow_id,
@@ -478,16 +555,20 @@ class CeleryWorkflowManager:
                             ).model_dump(exclude_unset=True)
                         }
                     ),
+                    logs=[
+                        build_log_entry(
+                            workflow_db_id,
+                            LogLevel.ERROR,
+                            f"Processing failed for {name}: {e}",
+                            file_name=name,
+                            step=WorkflowStepEnum.PROCESSING.value,
+                        )
+                    ],
                 )
             else:
-                self.add_log_sync(
-                    workflow_id,
-                    workflow_db_id,
-                    LogLevel.INFO,
-                    f"{name} processed successfully",
-                    file_name=name,
-                    step=WorkflowStepEnum.PROCESSING.value,
-                )
+                # Cached report results built from the old data are now stale
+                bump_namespace_sync(self.redis_client, REPORT_DATA_NAMESPACE)
+
                 # Set file state: processed
                 self.update_workflow_status_sync(
                     workflow_id,
@@ -500,9 +581,31 @@ class CeleryWorkflowManager:
                             ).model_dump(exclude_unset=True)
                         }
                     ),
+                    logs=[
+                        build_log_entry(
+                            workflow_db_id,
+                            LogLevel.INFO,
+                            f"{name} processed successfully",
+                            file_name=name,
+                            step=WorkflowStepEnum.PROCESSING.value,
+                        )
+                    ],
                 )
 
             results.append(result)
+            completed_files[file_id] = {
+                "success": result.success,
+                "total_records": result.total_records,
+                "inserted_records": result.inserted_records,
+                "failed_records": result.failed_records,
+                "errors": result.errors,
+                "duration_seconds": result.duration_seconds,
+            }
+            self.save_checkpoint(
+                workflow_id,
+                WorkflowCheckpointStage.PROCESSING,
+                {"files": completed_files},
+            )
 
         # Calculate percentage
         files_failed = len(files) - len(results)
@@ -527,10 +630,23 @@ class CeleryWorkflowManager:
         self.redis_client.delete(self.schema.workflow_status_key(workflow_id))
 
     def clear_workflow_state(self, workflow_id: str):
-        self.redis_client.delete(self.schema.workflow_state_key(workflow_id))
+        files_key = self.schema.workflow_files_key(workflow_id)
+        file_keys = [
+            self.schema.workflow_file_key(workflow_id, file_id.decode("utf-8"))
+            for file_id in self.redis_client.smembers(files_key)
+        ]
+        self.redis_client.delete(
+            self.schema.workflow_state_key(workflow_id), files_key, *file_keys
+        )
 
     def clear_workflow_logs(self, workflow_id: str):
-        self.redis_client.delete(self.schema.workflow_logs_key(workflow_id))
+        self.redis_client.delete(
+            self.schema.workflow_stream_key(workflow_id),
+            self.schema.workflow_logs_key(workflow_id),
+        )
+
+    def clear_workflow_checkpoints(self, workflow_id: str):
+        self.redis_client.delete(self.schema.workflow_checkpoint_key(workflow_id))
 
     def calculate_scaled_progress(
         self,
@@ -677,14 +793,11 @@ class CeleryWorkflowManager:
             return False, [str(e)]
 
     def validate_sheets_data(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        valid_files = []
         for file in files:
             sheets_wise_invalid_row_indexes = {}
             logger.info(f"Validating file present at path: {file["content"]}")
             file_path = file["content"]
 
-            copy_file_path = self.copy_excel_file(Path(file_path))
-            
             # Validate the data in the sheets
             invalid_data_mapping_coa = self.validate_coa_master_data(file_path)
             sheets_wise_invalid_row_indexes[ExcelSheetName.COA_MASTER_DATA.value] = list(set(invalid_data_mapping_coa['invalid_rows']).union(set(invalid_data_mapping_coa['non_identified_rows'])))
@@ -702,11 +815,18 @@ class CeleryWorkflowManager:
             sheets_wise_invalid_row_indexes[ExcelSheetName.TRANSACTIONAL_DETAIL_DATA.value] = list(set(invalid_data_mapping_transactional_detail_data['invalid_rows']).union(set(invalid_data_mapping_transactional_detail_data['non_identified_rows'])))
             logger.info(f"Number of invalid rows in transactional detail data sheet: {len(list(set(invalid_data_mapping_transactional_detail_data['invalid_rows']).union(set(invalid_data_mapping_transactional_detail_data['non_identified_rows']))))}")
 
-            valid_files.append(sheets_wise_invalid_row_indexes)
-            file["file_path_of_invalid_data"] = copy_file_path
-
-            self.keep_only_invalid_rows(copy_file_path, valid_files)
-            self.keep_only_valid_rows(file_path, valid_files)
+            # One streaming pass: valid rows replace the original, invalid rows go to a new file
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_invalid:
+                invalid_file_path = tmp_invalid.name
+            split_workbook_rows(
+                file_path,
+                sheets_wise_invalid_row_indexes,
+                valid_path=file_path,
+                invalid_path=invalid_file_path,
+            )
+            file["file_path_of_invalid_data"] = invalid_file_path
+            # The valid rows replaced the downloaded file, so re-hash it for checkpoints
+            file["sha256"] = self.file_sha256(file_path)
         return files
 
     def validate_coa_master_data(
@@ -1269,48 +1389,3 @@ class CeleryWorkflowManager:
         except Exception as e:
             logger.error(f"Failed to create empty Excel file with same structure: {e}")
             return None
-
-    def copy_excel_file(self, file_path: Path) -> str:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp_copy:
-            shutil.copy2(file_path, tmp_copy.name)
-            copy_path = tmp_copy.name
-            logger.info(f"Copied Excel file")
-            return copy_path
-
-    def keep_only_invalid_rows(self, copy_file_path, sheets_wise_invalid_row_indexes):
-        # Load all sheets from the file
-        all_sheets = pd.read_excel(copy_file_path, sheet_name=None, dtype=str, header=0)
-        for invalid_row_indexes_dict in sheets_wise_invalid_row_indexes:
-            for sheet_name, invalid_row_indexes in invalid_row_indexes_dict.items():
-                # Filter each relevant sheet
-                if sheet_name in all_sheets:
-                    df = all_sheets[sheet_name]
-                    all_sheets[sheet_name] = df.loc[invalid_row_indexes].reset_index(drop=True)
-
-        # Write all sheets back at once (preserves the ones we didn't touch)
-        with pd.ExcelWriter(copy_file_path, engine="openpyxl") as writer:
-            for sheet_name, df in all_sheets.items():
-                df.to_excel(writer, index=False, sheet_name=sheet_name)
-
-        logger.info(f"Updated file saved with only invalid rows")
-
-    def keep_only_valid_rows(self, file_path, sheets_wise_invalid_row_indexes):
-
-        # Load all sheets from the file
-        all_sheets = pd.read_excel(file_path, sheet_name=None, dtype=str, header=0)
-        for invalid_row_indexes_dict in sheets_wise_invalid_row_indexes:
-            for sheet_name, invalid_row_indexes in invalid_row_indexes_dict.items():
-                if sheet_name in all_sheets:
-                    df = all_sheets[sheet_name]
-
-                    # Drop the invalid rows, keep valid ones
-                    valid_df = df.drop(index=invalid_row_indexes).reset_index(drop=True)
-
-                    all_sheets[sheet_name] = valid_df
-
-        # Write all sheets back (preserves untouched sheets)
-        with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
-            for s_name, df in all_sheets.items():
-                df.to_excel(writer, index=False, sheet_name=s_name)
-
-        logger.info(f"Updated file saved with only valid rows")
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Versioned indices behind an alias, so an index can be rebuilt while it is
+being read.
+
+A rebuild goes into ``{alias}-v{version}``, created with refresh disabled
+and no replicas for a fast bulk load. Once loaded and checked, its settings
+are restored and the alias is moved to it in one atomic request; readers
+only ever see the previous version or the complete new one. The helpers
+are synchronous, for the Celery publishing tasks.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from elasticsearch import Elasticsearch, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+VERSION_SEPARATOR = "-v"
+
+# Previous versions kept after a swap, so a bad publish can be rolled back by
+# pointing the alias at one of them
+VERSIONS_TO_KEEP = 1
+
+BULK_LOAD_SETTINGS = {"index": {"refresh_interval": "-1", "number_of_replicas": 0}}
+DEFAULT_REPLICAS = 1
+
+
+class IndexVersionError(Exception):
+    """A new index version failed its checks and was not published"""
+
+
+def mapping_for(response: Dict[str, Any], index_name: str) -> Dict[str, Any]:
+    """
+    The entry of a get_mapping (or get_settings) response for ``index_name``.
+    Responses are keyed by concrete index, so when ``index_name`` is an alias
+    the entry of the index behind it is returned.
+    """
+    if index_name in response:
+        return response[index_name]
+    if len(response) == 1:
+        return next(iter(response.values()))
+    raise KeyError(index_name)
+
+
+def versioned_index_name(alias: str) -> str:
+    return f"{alias}{VERSION_SEPARATOR}{time.time_ns() // 1_000_000}"
+
+
+def index_versions(client: Elasticsearch, alias: str) -> List[str]:
+    """Every version index of ``alias``, oldest first"""
+    try:
+        indices = client.indices.get(index=f"{alias}{VERSION_SEPARATOR}*")
+    except NotFoundError:
+        return []
+
+    def version(name: str) -> int:
+        suffix = name[len(alias) + len(VERSION_SEPARATOR) :]
+        return int(suffix) if suffix.isdigit() else -1
+
+    return sorted((name for name in indices if version(name) >= 0), key=version)
+
+
+def aliased_indices(client: Elasticsearch, alias: str) -> List[str]:
+    """Indices ``alias`` currently points at"""
+    try:
+        return list(client.indices.get_alias(name=alias))
+    except NotFoundError:
+        return []
+
+
+def _current_replicas(client: Elasticsearch, alias: str) -> Optional[int]:
+    try:
+        settings = mapping_for(
+            client.indices.get_settings(index=alias, name="index.number_of_replicas"),
+            alias,
+        )
+        return int(settings["settings"]["index"]["number_of_replicas"])
+    except (NotFoundError, KeyError):
+        return None
+
+
+def _data_nodes(client: Elasticsearch) -> Optional[int]:
+    try:
+        return int(client.cluster.health()["number_of_data_nodes"])
+    except Exception as e:
+        logger.warning(f"Could not read the cluster's data nodes: {e}")
+        return None
+
+
+def create_index_version(
+    client: Elasticsearch, alias: str, mappings: Dict[str, Any]
+) -> str:
+    """Create a new, empty version of ``alias`` tuned for bulk loading"""
+    index_name = versioned_index_name(alias)
+    client.indices.create(
+        index=index_name, mappings=mappings, settings=BULK_LOAD_SETTINGS
+    )
+    logger.debug(f"Created index version {index_name} for {alias}")
+    return index_name
+
+
+def publish_index_version(
+    client: Elasticsearch, alias: str, index_name: str, expected_count: int
+):
+    """
+    Make a loaded version live: restore refresh and replicas, check the
+    document count, force-merge, then move ``alias`` to it atomically and
+    drop old versions. Raises IndexVersionError, leaving the alias where it
+    was, if the count doesn't match.
+    """
+    replicas = _current_replicas(client, alias)
+    data_nodes = _data_nodes(client)
+    if replicas is None:
+        # A replica can't share a node with its primary, so a new alias on
+        # a single-node cluster gets none rather than staying yellow
+        replicas = DEFAULT_REPLICAS
+        if data_nodes is not None:
+            replicas = min(replicas, data_nodes - 1)
+    client.indices.put_settings(
+        index=index_name,
+        settings={"index": {"refresh_interval": None, "number_of_replicas": replicas}},
+    )
+    client.indices.refresh(index=index_name)
+
+    count = client.count(index=index_name)["count"]
+    if count != expected_count:
+        raise IndexVersionError(
+            f"{index_name} has {count} documents, expected {expected_count}"
+        )
+
+    try:
+        client.indices.forcemerge(
+            index=index_name, max_num_segments=1, request_timeout=1800
+        )
+    except Exception as e:
+        # Only makes searches faster; not worth failing the publish over
+        logger.warning(f"Force merge of {index_name} failed: {e}")
+
+    # Wait for the replicas so readers keep their capacity after the swap,
+    # unless the cluster has too few nodes to ever allocate them all; the
+    # previous version is then yellow as well, and only primaries are awaited
+    allocatable = data_nodes is not None and replicas < data_nodes
+    try:
+        client.cluster.health(
+            index=index_name,
+            wait_for_status="green" if allocatable else "yellow",
+            timeout="120s",
+            request_timeout=130,
+        )
+    except Exception as e:
+        logger.warning(f"Replicas of {index_name} not ready, swapping anyway: {e}")
+
+    actions: List[Dict[str, Any]] = [
+        {"remove": {"index": previous, "alias": alias}}
+        for previous in aliased_indices(client, alias)
+        if previous != index_name
+    ]
+    if client.indices.exists(index=alias) and not client.indices.exists_alias(
+        name=alias
+    ):
+        # Indices published before versioning are concrete indices named
+        # like the alias; replace it in the same atomic request
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": index_name, "alias": alias}})
+    client.indices.update_aliases(actions=actions)
+    logger.info(f"Alias {alias} now points at {index_name}")
+
+    drop_old_versions(client, alias, keep=VERSIONS_TO_KEEP)
+
+
+def drop_old_versions(client: Elasticsearch, alias: str, keep: int = VERSIONS_TO_KEEP):
+    """Delete versions of ``alias`` older than the live one, keeping the newest ``keep``"""
+    versions = index_versions(client, alias)
+    live = [
+        versions.index(name)
+        for name in aliased_indices(client, alias)
+        if name in versions
+    ]
+    if not live:
+        return
+    older = versions[: max(live)]
+    for index_name in older[: max(len(older) - keep, 0)]:
+        discard_index_version(client, index_name)
+
+
+def discard_index_version(client: Elasticsearch, index_name: str):
+    """Delete a version that was never published, or is no longer needed"""
+    try:
+        client.indices.delete(index=index_name)
+        logger.debug(f"Deleted index version {index_name}")
+    except NotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not delete index version {index_name}: {e}")
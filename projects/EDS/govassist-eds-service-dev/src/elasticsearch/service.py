@@ -6,6 +6,7 @@ from loguru import logger
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from src.core.exceptions import InternalServerError, ValidationError
 from src.elasticsearch.client import close_es_client, create_es_client
+from src.elasticsearch.index_versions import mapping_for
 from src.elasticsearch.mappings.index_mappings import INDEX_MAPPINGS
 from src.schema.report_schema import FilterGroup, SearchPayload, SortCondition
 
@@ -171,7 +172,7 @@ class ElasticsearchService:
         """
         await self.initialize()
         mapping = await self.client.indices.get_mapping(index=index)
-        mapping_info = mapping[index]["mappings"]
+        mapping_info = mapping_for(mapping, index)["mappings"]
         field_type = self._get_field_type(mapping_info, field)
         nested_path = self._find_nested_path(mapping_info, field)
 
@@ -490,7 +491,7 @@ class ElasticsearchService:
         await self.initialize()
         try:
             mapping = await self.client.indices.get_mapping(index=index_name)
-            return mapping[index_name]["mappings"]
+            return mapping_for(mapping, index_name)["mappings"]
         except Exception as e:
             logger.error(f"Error getting mapping for index {index_name}: {str(e)}")
             raise InternalServerError(detail="Failed to get index mapping")
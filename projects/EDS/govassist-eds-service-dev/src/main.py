@@ -1,18 +1,21 @@
 import asyncio
-import json
 import os
 from contextlib import asynccontextmanager
 
-import redis.asyncio as redis_async
-from azure.monitor.opentelemetry.exporter import AzureMonitorTraceExporter
+from azure.monitor.opentelemetry.exporter import (
+    AzureMonitorMetricExporter,
+    AzureMonitorTraceExporter,
+)
 from beanie import init_beanie
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from loguru import logger
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.sdk.trace.sampling import ALWAYS_ON
@@ -51,12 +54,15 @@ from src.core.exceptions import (
     UnauthorizedError,
     ValidationError,
 )
+from src.core.redis_metrics import redis_metric_views
+from src.core.tiered_cache import tiered_cache
 from src.elasticsearch.service import es_service
 from src.model.nosql_document.ns_report_model import (
     FormulaAssistantChatHistory,
     ReportChatHistory,
 )
 from src.mongodb.integration import Integration
+from src.socket_io.workflow_event_consumer import WorkflowEventConsumer
 from src.util.class_object import singleton
 
 
@@ -98,6 +104,9 @@ class AppCreator:
                 # Store in app state for access
                 self.app.state.redis_client = self.redis_client
                 logger.info("Redis client stored in app state successfully")
+
+                # Drop local cache entries invalidated by other replicas
+                asyncio.create_task(self._cache_invalidation_listener())
                 logger.info("Application startup completed - all services ready!")
 
                 yield
@@ -222,6 +231,16 @@ class AppCreator:
             span_processor = BatchSpanProcessor(exporter)
             trace.get_tracer_provider().add_span_processor(span_processor)
 
+            # Metrics (Redis client latency, pool usage, breaker state) go to the same resource
+            metrics.set_meter_provider(
+                MeterProvider(
+                    metric_readers=[
+                        PeriodicExportingMetricReader(AzureMonitorMetricExporter())
+                    ],
+                    views=redis_metric_views(),
+                )
+            )
+
             # Instrument FastAPI only — skipping auto-instrumentation for requests, HTTP, DB, etc.
             FastAPIInstrumentor().instrument_app(self.app)
             logger.info("Azure Monitor instrumentation configured successfully")
@@ -269,12 +288,12 @@ class AppCreator:
             await es_service.cleanup()
 
     def _start_redis_listener(self):
-        """Start Redis Pub/Sub listener in background"""
+        """Start the workflow events consumer in background"""
         try:
             loop = asyncio.get_event_loop()
             if loop.is_running():
                 asyncio.create_task(self._redis_listener())
-                logger.info("Started Redis Pub/Sub listener for workflow updates")
+                logger.info("Started workflow events consumer for workflow updates")
             else:
                 logger.warning(
                     "Event loop not running, Redis listener will start when app starts"
@@ -285,47 +304,26 @@ class AppCreator:
             )
 
     async def _redis_listener(self):
-        """Listen to Redis Pub/Sub channel for workflow updates"""
+        """Consume workflow events as one member of the stream consumer group"""
         try:
-            # Create Redis connection for Pub/Sub
-            redis_client = redis_async.from_url(configs.REDIS_URL)
-            pubsub = redis_client.pubsub()
-
-            # Subscribe to workflow updates channel
-            await pubsub.subscribe(configs.WORKFLOW_UPDATES)
-            logger.info(
-                "Redis Pub/Sub listener connected and listening for workflow updates"
-            )
-
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    try:
-                        # Parse the message
-                        data = json.loads(message["data"])
-
-                        # Handle workflow updates from Celery
-                        workflow_id = data.get("workflow_id")
-                        status = data.get("status")
-                        workflow_data = data.get("data", {})
-
-                        if workflow_id and status:
-                            # Emit via Socket.IO
-                            await self.container.socket_io_service().emit_workflow_update_with_broadcast(
-                                workflow_id, status, workflow_data
-                            )
-                            # logger.info(f"Emitted workflow update from Redis: {workflow_id} - {status}")
-
-                    except json.JSONDecodeError as e:
-                        logger.error(f"Failed to parse Redis message: {e}")
-                    except Exception as e:
-                        logger.error(f"Error processing Redis message: {e}")
-
+            consumer = WorkflowEventConsumer(self.container.socket_io_service())
+            await consumer.run()
         except Exception as e:
-            logger.error(f"Redis Pub/Sub listener error: {e}")
+            logger.error(f"Workflow event consumer error: {e}")
             # Retry after delay
             await asyncio.sleep(5)
             asyncio.create_task(self._redis_listener())
 
+    async def _cache_invalidation_listener(self):
+        """Listen for tiered cache invalidations published by any replica"""
+        try:
+            await tiered_cache.listen_for_invalidations()
+        except Exception as e:
+            logger.error(f"Cache invalidation listener error: {e}")
+            # Retry after delay
+            await asyncio.sleep(5)
+            asyncio.create_task(self._cache_invalidation_listener())
+
 
 app_creator = AppCreator()
 app = app_creator.app
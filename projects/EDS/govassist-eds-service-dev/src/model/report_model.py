@@ -26,6 +26,13 @@ class ScheduleReportRerunPeriod(Enum):
     QUARTERLY = "QUARTERLY"
 
 
+class ReportExportFormat(str, Enum):
+    XLSX = "xlsx"
+    CSV_ZIP = "csv_zip"
+    CSV_GZIP = "csv_gz"
+    PARQUET = "parquet"
+
+
 class ReportConfiguration(BaseModel):
     __tablename__ = "eds_report_configurations"
     __table_args__ = {"extend_existing": True}
@@ -29,6 +29,8 @@ class SubReportWorkflow(BaseModel):
     # PENDING, IN_PROGRESS, COMPLETED, FAILED
     status = Column(String(50), nullable=True, default="PENDING")
     error_log = Column(Text, nullable=True)
+    # Records published so far while IN_PROGRESS, as "migrated/total"
+    progress = Column(String(50), nullable=True)
     execution_success_time = Column(DateTime, nullable=True)
 
     sub_report = relationship("SubReport", back_populates="workflows")
@@ -1,10 +1,11 @@
-from typing import Callable, List
+from typing import Any, Callable, Dict, Iterable, List
 
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from src.core.exceptions import DuplicatedError, ValidationError
-from src.model.workflow import EdsWorkflow
+from src.model.workflow import EdsWorkflow, EdsWorkflowProgress
 from src.repository.base_repository import BaseRepository
 from src.schema.workflow_schema import WorkflowProgressCreate
 
@@ -32,6 +33,26 @@ class WorkflowCrudRepository(BaseRepository):
                 session.rollback()
                 raise ValidationError(detail=str(e))
 
+    def bulk_insert_workflow_progress(
+        self, batches: Iterable[List[Dict[str, Any]]]
+    ) -> int:
+        """Insert progress rows batch by batch in a single transaction"""
+        with self._session_factory() as session:
+            try:
+                inserted = 0
+                for rows in batches:
+                    if rows:
+                        session.execute(insert(EdsWorkflowProgress), rows)
+                        inserted += len(rows)
+                session.commit()
+                return inserted
+            except IntegrityError as e:
+                session.rollback()
+                raise DuplicatedError(detail=str(e.orig)) from e
+            except SQLAlchemyError as e:
+                session.rollback()
+                raise ValidationError(detail=str(e)) from e
+
     def is_folder_processed(self, processed_folder_id: str) -> bool:
         with self._session_factory() as session:
             return session.query(EdsWorkflow).filter(EdsWorkflow.processed_folder_id == processed_folder_id).first()
@@ -1,7 +1,23 @@
+import hashlib
+import json
 from abc import ABC
-from typing import Any, Dict, Generic, List, Tuple, Type, TypeVar
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
+import pandas as pd
 from loguru import logger
+from sqlalchemy import insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
@@ -20,11 +36,38 @@ from src.model.workflow_master_model import (
 
 T = TypeVar("T")
 
+# Rows sent to the driver per executemany call in bulk_load
+BULK_LOAD_BATCH_SIZE = 10000
+
+# Bookkeeping columns that never take part in a row's content fingerprint
+FINGERPRINT_EXCLUDED_COLUMNS = {"id", "uuid", "created_at", "updated_at", "deleted_at"}
+
+# Repeated natural keys named in the warning when a delta load is aborted
+DUPLICATE_KEYS_LISTED = 20
+
+
+@dataclass
+class DeltaResult:
+    """Outcome of applying a delta load to a single table"""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    stale_ids: List[int] = field(default_factory=list)
+    # Natural key -> id for every row present after the load
+    ids: Dict[Tuple, int] = field(default_factory=dict)
+
 
 class BaseRepository(Generic[T], ABC):
-    def __init__(self, session: Session, model_class: Type[T]):
+    def __init__(
+        self,
+        session: Session,
+        model_class: Type[T],
+        natural_key: Optional[Sequence[str]] = None,
+    ):
         self.session = session
         self.model_class = model_class
+        self.natural_key = tuple(natural_key or ("number",))
 
     def bulk_insert(self, items: List[T], batch_size: int = 1000) -> int:
         """Bulk insert items with batch processing"""
@@ -56,15 +99,194 @@ class BaseRepository(Generic[T], ABC):
 
         return total_inserted
 
+    def bulk_load(
+        self,
+        data: Union[pd.DataFrame, Dict[str, Sequence], List[Dict[str, Any]]],
+        commit: bool = True,
+        batch_size: int = BULK_LOAD_BATCH_SIZE,
+    ) -> int:
+        """
+        Load rows straight from column arrays, a DataFrame or plain dicts
+        without building ORM objects.
+
+        On MSSQL the rows are bound with pyodbc ``fast_executemany`` into a
+        session temp table and published to the target with a single
+        ``INSERT ... SELECT``. Other dialects use a Core executemany insert.
+        """
+        count, _ = self._bulk_load(data, commit, batch_size)
+        return count
+
+    def bulk_load_returning(
+        self,
+        data: Union[pd.DataFrame, Dict[str, Sequence], List[Dict[str, Any]]],
+        returning: Sequence[str],
+        commit: bool = True,
+        batch_size: int = BULK_LOAD_BATCH_SIZE,
+    ) -> List[Tuple]:
+        """Same as bulk_load, returning the given columns of every inserted row (in no particular order)"""
+        _, rows = self._bulk_load(data, commit, batch_size, returning)
+        return rows
+
+    def _bulk_load(
+        self,
+        data: Union[pd.DataFrame, Dict[str, Sequence], List[Dict[str, Any]]],
+        commit: bool,
+        batch_size: int,
+        returning: Optional[Sequence[str]] = None,
+    ) -> Tuple[int, List[Tuple]]:
+        names, rows = self._prepare_rows(data)
+        if not rows:
+            logger.info("No items to insert")
+            return 0, []
+
+        try:
+            if self.session.get_bind().dialect.name == "mssql":
+                returned = self._bulk_load_mssql(names, rows, batch_size, returning)
+            else:
+                returned = self._bulk_load_portable(names, rows, batch_size, returning)
+
+            if commit:
+                self.session.commit()
+            else:
+                self.session.flush()
+
+        except IntegrityError:
+            self.session.rollback()
+            logger.error("Integrity error during bulk load")
+            raise
+        except SQLAlchemyError:
+            self.session.rollback()
+            logger.error("Database error during bulk load")
+            raise
+        except Exception:
+            self.session.rollback()
+            logger.error("Unexpected error during bulk load")
+            raise
+
+        logger.info(
+            f"Bulk loaded {len(rows)} records into {self.model_class.__tablename__}"
+        )
+        return len(rows), returned
+
+    def _prepare_rows(
+        self, data: Union[pd.DataFrame, Dict[str, Sequence], List[Dict[str, Any]]]
+    ) -> Tuple[List[str], List[Tuple]]:
+        """Normalise input into column names and row tuples, filling Python-side defaults"""
+        if isinstance(data, pd.DataFrame):
+            frame = data.astype(object).where(data.notna(), None)
+            columns = {name: frame[name].tolist() for name in frame.columns}
+        elif isinstance(data, dict):
+            columns = {name: list(values) for name, values in data.items()}
+        else:
+            names = list(dict.fromkeys(key for record in data for key in record))
+            columns = {name: [record.get(name) for record in data] for name in names}
+
+        table = self.model_class.__table__
+        unknown = set(columns) - set(table.columns.keys())
+        if unknown:
+            raise ValueError(
+                f"Unknown columns for {self.model_class.__tablename__}: {sorted(unknown)}"
+            )
+
+        row_count = len(next(iter(columns.values()), []))
+        if any(len(values) != row_count for values in columns.values()):
+            raise ValueError("All columns must have the same number of values")
+
+        # Core inserts skip ORM defaults such as uuid and created_at, so fill them here
+        for column in table.columns:
+            if column.key in columns or column.primary_key or column.default is None:
+                continue
+            default = column.default
+            if default.is_callable:
+                columns[column.key] = [default.arg(None) for _ in range(row_count)]
+            elif default.is_scalar:
+                columns[column.key] = [default.arg] * row_count
+
+        names = list(columns)
+        rows = list(zip(*(columns[name] for name in names), strict=True))
+        return names, rows
+
+    def _bulk_load_mssql(
+        self,
+        names: List[str],
+        rows: List[Tuple],
+        batch_size: int,
+        returning: Optional[Sequence[str]] = None,
+    ) -> List[Tuple]:
+        """Stage rows with fast_executemany, then publish them in one statement"""
+        connection = self.session.connection()
+        preparer = connection.dialect.identifier_preparer
+        table = self.model_class.__table__
+        target = preparer.format_table(table)
+        stage = preparer.quote(f"#stage_{table.name}")
+        column_list = ", ".join(preparer.quote(name) for name in names)
+        placeholders = ", ".join("?" for _ in names)
+        output = ""
+        if returning:
+            output = " OUTPUT " + ", ".join(
+                f"INSERTED.{preparer.quote(name)}" for name in returning
+            )
+
+        # Temp tables live as long as the connection, which the session keeps
+        # pinned for the rest of the transaction
+        connection.exec_driver_sql(
+            f"SELECT TOP 0 {column_list} INTO {stage} FROM {target}"
+        )
+        try:
+            cursor = connection.connection.cursor()
+            try:
+                cursor.fast_executemany = True
+                for i in range(0, len(rows), batch_size):
+                    cursor.executemany(
+                        f"INSERT INTO {stage} ({column_list}) VALUES ({placeholders})",
+                        rows[i : i + batch_size],
+                    )
+            finally:
+                cursor.close()
+
+            result = connection.exec_driver_sql(
+                f"INSERT INTO {target} ({column_list}){output} "
+                f"SELECT {column_list} FROM {stage}"
+            )
+            return [tuple(row) for row in result] if returning else []
+        finally:
+            connection.exec_driver_sql(f"DROP TABLE {stage}")
+
+    def _bulk_load_portable(
+        self,
+        names: List[str],
+        rows: List[Tuple],
+        batch_size: int,
+        returning: Optional[Sequence[str]] = None,
+    ) -> List[Tuple]:
+        """Core executemany insert for dialects without a staged fast path"""
+        table = self.model_class.__table__
+        statement = insert(table)
+        if returning:
+            statement = statement.returning(*[table.c[name] for name in returning])
+
+        returned = []
+        for i in range(0, len(rows), batch_size):
+            result = self.session.execute(
+                statement,
+                [
+                    dict(zip(names, row, strict=True))
+                    for row in rows[i : i + batch_size]
+                ],
+            )
+            if returning:
+                returned.extend(tuple(row) for row in result)
+        return returned
+
     def get_id_mapping(self, key_field: str = "number") -> Dict[Any, int]:
         """Get mapping of key_field to id"""
         try:
             records = (
                 self.session.query(
-                    getattr(self.model_class, "id"),
+                    self.model_class.id,
                     getattr(self.model_class, key_field),
                 )
-                .filter(getattr(self.model_class, "deleted_at").is_(None))
+                .filter(self.model_class.deleted_at.is_(None))
                 .all()
             )
 
@@ -87,6 +309,148 @@ class BaseRepository(Generic[T], ABC):
             logger.error("Unexpected error in get_id_mapping")
             raise
 
+    def get_natural_key_mapping(self) -> Dict[Tuple, int]:
+        """Get mapping of natural key tuple to id for active rows"""
+        try:
+            records = self.session.query(
+                self.model_class.id,
+                *[
+                    getattr(self.model_class, key_field)
+                    for key_field in self.natural_key
+                ],
+            ).filter(self.model_class.deleted_at.is_(None))
+
+            return {tuple(record[1:]): record[0] for record in records}
+
+        except SQLAlchemyError:
+            logger.error("Database error in get_natural_key_mapping")
+            raise
+
+    def content_columns(self) -> List[str]:
+        """Columns hashed into a row fingerprint (everything but keys and bookkeeping)"""
+        return [
+            column.key
+            for column in self.model_class.__table__.columns
+            if column.key not in FINGERPRINT_EXCLUDED_COLUMNS
+            and column.key not in self.natural_key
+        ]
+
+    def fingerprint(self, record: Dict[str, Any]) -> Tuple[Tuple, str]:
+        """Return the natural key and content hash of a record"""
+        key = tuple(record.get(key_field) for key_field in self.natural_key)
+        content = [record.get(column) for column in self.content_columns()]
+        digest = hashlib.sha1(
+            json.dumps(content, default=str).encode("utf-8")
+        ).hexdigest()
+        return key, digest
+
+    def get_fingerprints(self) -> Dict[Tuple, Tuple[int, str]]:
+        """Get mapping of natural key to (id, content hash) for active rows"""
+        try:
+            columns = ["id", *self.natural_key, *self.content_columns()]
+            rows = (
+                self.session.query(
+                    *[getattr(self.model_class, column) for column in columns]
+                )
+                .filter(self.model_class.deleted_at.is_(None))
+                .yield_per(5000)
+            )
+
+            fingerprints = {}
+            for row in rows:
+                record = dict(zip(columns, row, strict=True))
+                key, digest = self.fingerprint(record)
+                fingerprints[key] = (record["id"], digest)
+            return fingerprints
+
+        except SQLAlchemyError:
+            logger.error("Database error in get_fingerprints")
+            raise
+
+    def apply_delta(self, records: List[Dict[str, Any]]) -> DeltaResult:
+        """
+        Diff records against the table by natural key and content hash, then
+        insert new rows and update changed ones. Nothing is committed so the
+        caller can apply every table's delta in a single transaction; rows
+        missing from ``records`` are reported back as ``stale_ids``.
+
+        Raises ValueError if ``records`` repeat a natural key: a full load
+        inserts every such row, so a delta can't reproduce it.
+        """
+        result = DeltaResult()
+
+        staged, duplicates = {}, {}
+        for record in records:
+            key, digest = self.fingerprint(record)
+            if key in staged:
+                duplicates[key] = duplicates.get(key, 1) + 1
+            staged[key] = (record, digest)
+        if duplicates:
+            listed = ", ".join(
+                f"{key} x{count}"
+                for key, count in list(duplicates.items())[:DUPLICATE_KEYS_LISTED]
+            )
+            logger.warning(
+                f"{len(duplicates)} natural keys {self.natural_key} repeat in the "
+                f"{self.model_class.__tablename__} rows: {listed}"
+            )
+            raise ValueError(
+                f"Delta load of {self.model_class.__tablename__} aborted: "
+                f"{len(duplicates)} natural keys repeat in the source"
+            )
+
+        current = self.get_fingerprints()
+
+        inserts, updates = [], []
+        for key, (record, digest) in staged.items():
+            existing = current.get(key)
+            if existing is None:
+                inserts.append(record)
+            elif existing[1] != digest:
+                updates.append({**record, "id": existing[0]})
+            else:
+                result.unchanged += 1
+
+        result.stale_ids = [
+            row_id for key, (row_id, _) in current.items() if key not in staged
+        ]
+        result.ids = {key: current[key][0] for key in staged if key in current}
+
+        try:
+            if inserts:
+                returned = self.bulk_load_returning(
+                    inserts, ("id", *self.natural_key), commit=False
+                )
+                result.ids.update({tuple(row[1:]): row[0] for row in returned})
+            if updates:
+                self.session.bulk_update_mappings(self.model_class, updates)
+            self.session.flush()
+        except SQLAlchemyError:
+            logger.error(
+                f"Database error applying delta to {self.model_class.__name__}"
+            )
+            raise
+
+        result.inserted = len(inserts)
+        result.updated = len(updates)
+        logger.info(
+            f"Delta for {self.model_class.__tablename__}: inserted={result.inserted}, "
+            f"updated={result.updated}, unchanged={result.unchanged}, "
+            f"stale={len(result.stale_ids)}"
+        )
+        return result
+
+    def delete_by_ids(self, ids: List[int], batch_size: int = 1000) -> int:
+        """Delete rows by id without committing"""
+        deleted = 0
+        for i in range(0, len(ids), batch_size):
+            deleted += (
+                self.session.query(self.model_class)
+                .filter(self.model_class.id.in_(ids[i : i + batch_size]))
+                .delete(synchronize_session=False)
+            )
+        return deleted
+
     def delete_all(self) -> int:
         """Soft delete all records"""
         try:
@@ -118,7 +482,7 @@ class BaseRepository(Generic[T], ABC):
         try:
             return (
                 self.session.query(self.model_class)
-                .filter(getattr(self.model_class, "deleted_at").is_(None))
+                .filter(self.model_class.deleted_at.is_(None))
                 .count()
             )
         except AttributeError:
@@ -148,18 +512,25 @@ class WorkflowRepository:
             self.awards = BaseRepository(session, WorkflowMasterAward)
             self.sponsors = BaseRepository(session, WorkflowMasterSponsor)
             self.projects = BaseRepository(session, WorkflowMasterProjectDetails)
-            self.parent_tasks = BaseRepository(session, WorkflowMasterParentTask)
-            self.sub_tasks = BaseRepository(session, WorkflowMasterSubTask)
-            self.transactions = BaseRepository(session, WorkflowMasterTransaction)
+            self.parent_tasks = BaseRepository(
+                session, WorkflowMasterParentTask, ("project_id", "number")
+            )
+            self.sub_tasks = BaseRepository(
+                session,
+                WorkflowMasterSubTask,
+                ("parent_task_id", "number", "fund_id", "award_id"),
+            )
+            self.transactions = BaseRepository(
+                session,
+                WorkflowMasterTransaction,
+                ("sub_task_id", "transaction_number", "dist_line_num"),
+            )
         except Exception as e:
             raise RuntimeError(f"Failed to initialize repositories: {str(e)}")
 
-    def clear_all_data(self) -> Dict[str, int]:
-        """Clear all data in proper order (respecting foreign key constraints)"""
-        deletion_counts = {}
-
-        # Define deletion order (child to parent to respect FK constraints)
-        deletion_order = [
+    def _deletion_order(self) -> List[Tuple[str, BaseRepository]]:
+        """Tables ordered child to parent to respect FK constraints"""
+        return [
             ("transactions", self.transactions),
             ("sub_tasks", self.sub_tasks),
             ("parent_tasks", self.parent_tasks),
@@ -172,8 +543,12 @@ class WorkflowRepository:
             ("funds", self.funds),
         ]
 
+    def clear_all_data(self) -> Dict[str, int]:
+        """Clear all data in proper order (respecting foreign key constraints)"""
+        deletion_counts = {}
+
         try:
-            for table_name, repository in deletion_order:
+            for table_name, repository in self._deletion_order():
                 try:
                     count = repository.delete_all()
                     deletion_counts[table_name] = count
@@ -191,6 +566,31 @@ class WorkflowRepository:
             logger.error("Error during clear_all_data")
             raise
 
+    def delete_stale_records(self, stale_ids: Dict[Type, List[int]]) -> Dict[str, int]:
+        """Delete rows left out of a delta load, child tables first, without committing"""
+        deletion_counts = {}
+        for table_name, repository in self._deletion_order():
+            ids = stale_ids.get(repository.model_class)
+            if ids:
+                deletion_counts[table_name] = repository.delete_by_ids(ids)
+                logger.info(
+                    f"Deleted {deletion_counts[table_name]} stale records from {table_name}"
+                )
+        return deletion_counts
+
+    def commit(self):
+        """Commit the current transaction"""
+        try:
+            self.session.commit()
+        except SQLAlchemyError:
+            self.session.rollback()
+            logger.error("Database error during commit")
+            raise
+
+    def rollback(self):
+        """Roll back the current transaction"""
+        self.session.rollback()
+
     def health_check(self) -> Dict[str, Any]:
         """Health check for the repository - useful for debugging in Celery tasks"""
         health_status = {
@@ -240,62 +640,3 @@ class WorkflowRepository:
         except Exception:
             logger.warning("Error closing repository session")
             raise
-
-    def get_parent_task_mapping(
-        self, project_id_by_number: dict
-    ) -> Dict[Tuple[int, str], int]:
-        """
-        Returns a mapping of (project_id, parent_task_number) - parent_task_id
-        Only includes active (non-deleted) parent tasks.
-        """
-        try:
-            records = (
-                self.session.query(
-                    WorkflowMasterParentTask.id,
-                    WorkflowMasterParentTask.number,
-                    WorkflowMasterParentTask.project_id,
-                )
-                .filter(WorkflowMasterParentTask.deleted_at.is_(None))
-                .all()
-            )
-
-            mapping = {}
-            for record in records:
-                key = (project_id_by_number.get(record.project_id), record.number)
-                mapping[key] = record.id
-
-            return mapping
-
-        except Exception as e:
-            logger.error(f"Error fetching parent task mapping: {str(e)}")
-            raise
-
-    def _get_sub_task_by_project_award_map(self):
-        sub_tasks = (
-            self.session.query(
-                WorkflowMasterSubTask.id,
-                WorkflowMasterSubTask.number,
-                WorkflowMasterProjectDetails.number,
-                WorkflowMasterAward.number,
-            )
-            .join(
-                WorkflowMasterParentTask,
-                WorkflowMasterParentTask.id == WorkflowMasterSubTask.parent_task_id,
-            )
-            .join(
-                WorkflowMasterProjectDetails,
-                WorkflowMasterProjectDetails.id == WorkflowMasterParentTask.project_id,
-            )
-            .join(
-                WorkflowMasterAward,
-                WorkflowMasterAward.id == WorkflowMasterSubTask.award_id,
-            )
-            .all()
-        )
-
-        sub_task_by_project_award_map = {}
-        for sub_task in sub_tasks:
-            sub_task_by_project_award_map[(sub_task[2], sub_task[1], sub_task[3])] = (
-                sub_task[0]
-            )
-        return sub_task_by_project_award_map
@@ -1,6 +1,7 @@
 import logging
 import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Literal, Optional, Union
 from uuid import UUID
 
@@ -134,6 +135,13 @@ LARK_PARSER = Lark(
     start="start",
 )
 
+
+@lru_cache(maxsize=1024)
+def parse_formula(expression: str) -> Tree:
+    """Parse tree of a formula; the same formulas are validated on every preview and publish"""
+    return LARK_PARSER.parse(expression)
+
+
 MODEL_REGISTRY: Dict[str, object] = {
     "master_project_details": MasterProjectDetails,
     "master_parent_tasks": MasterParentTask,
@@ -608,7 +616,7 @@ class ReportFieldConfig(BaseModel):
 
         else:
             try:
-                tree = LARK_PARSER.parse(expr)
+                tree = parse_formula(expr)
                 visitor = FormulaFieldValidator()
                 visitor.visit(tree)
             except Exception as e:
@@ -69,6 +69,15 @@ class FileProcessingStatus(str, Enum):
     FAILED = "failed"
 
 
+class WorkflowCheckpointStage(str, Enum):
+    """Pipeline stages that record a checkpoint once completed"""
+
+    DOWNLOAD = "download"
+    VALIDATION = "validation"
+    SHEETS_VALIDATION = "sheets_validation"
+    PROCESSING = "processing"
+
+
 class FolderType(str, Enum):
     """Folder types"""
 
@@ -150,10 +159,14 @@ class WorkflowState(BaseModel):
     # Error handling
     error_messages: List[str] = Field(default_factory=list)
     retry_count: int = 0
+    resumed_stages: List[str] = Field(default_factory=list)
 
     # Logs (stored separately but referenced here)
     log_count: int = 0
 
+    # Sequence number of the last published state event
+    event_seq: int = 0
+
 
 class WorkflowStateUpdate(make_optional(WorkflowState)):
     pass
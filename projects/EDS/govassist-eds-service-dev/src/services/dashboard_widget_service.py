@@ -4,6 +4,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from src.core.exceptions import BadRequestError, InternalServerError, NotFoundError
+from src.core.tiered_cache import invalidates
 from src.model.preconfigured_widget_model import PreconfiguredWidget
 from src.repository.dashboard_repository import DashboardRepository
 from src.repository.dashboard_widget_repository import DashboardWidgetRepository
@@ -17,6 +18,7 @@ from src.schema.preconfigured_widget_schema import (
 )
 from src.schema.widget_favorite_schema import WidgetFavoriteFind
 from src.services.base_service import BaseService
+from src.services.preconfigured_widget_service import PRECONFIGURED_WIDGET_CACHE_TAG
 from src.services.widget_favorite_service import WidgetFavoriteService
 
 
@@ -184,6 +186,7 @@ class DashboardWidgetService(BaseService):
                 session.rollback()
                 raise InternalServerError(detail="Internal Server Error")
 
+    @invalidates(PRECONFIGURED_WIDGET_CACHE_TAG)
     def save_dashboard_widget_as_preconfigured_widget(
         self, preconfigured_widget: PreconfiguredWidgetCreate
     ) -> PreconfiguredWidgetInfo:
@@ -211,6 +214,7 @@ class DashboardWidgetService(BaseService):
             session.refresh(preconfigured_widget)
             return preconfigured_widget
 
+    @invalidates(PRECONFIGURED_WIDGET_CACHE_TAG)
     def delete_preconfigured_widget(self, preconfigured_widget_id: int) -> dict:
         """Delete a preconfigured widget."""
         with self._repository.session_factory() as session:
@@ -8,6 +8,7 @@ from typing import Any, Dict, List
 
 from src.elasticsearch.client import create_es_client
 from src.elasticsearch.constants import COMMON_FIELDS
+from src.elasticsearch.index_versions import mapping_for
 
 
 class IndexCompatibilityService:
@@ -32,9 +33,9 @@ class IndexCompatibilityService:
             # Fetch mapping from Elasticsearch
             response = await es_client.indices.get_mapping(index=index_name)
 
-            if index_name in response:
-                mapping = response[index_name]
-            else:
+            try:
+                mapping = mapping_for(response, index_name)
+            except KeyError:
                 mapping = response
 
             return mapping
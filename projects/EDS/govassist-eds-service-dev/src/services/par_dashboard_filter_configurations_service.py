@@ -1,14 +1,55 @@
-from typing import Callable
+from typing import Any, Callable, List, Optional
 
 from sqlalchemy.orm import Session
 
+from src.core.tiered_cache import cached, invalidates
 from src.repository.par_dashboard_filter_configurations_repository import (
     ParDashboardFilterConfigurationsRepository,
 )
+from src.schema.par_dashboard_filter_configurations_schema import (
+    ParDashboardFilterConfigurationsInfo,
+    ParDashboardFilterConfigurationsListResponse,
+)
 from src.services.base_service import BaseService
 
+FILTER_CONFIGURATION_CACHE_TAG = "dashboard_filter_configurations"
+
 
 class ParDashboardFilterConfigurationsService(BaseService):
     def __init__(self, session_factory: Callable[..., Session]):
         super().__init__(ParDashboardFilterConfigurationsRepository(session_factory))
         self._session_factory = session_factory
+
+    @cached(
+        tags=[FILTER_CONFIGURATION_CACHE_TAG],
+        model=ParDashboardFilterConfigurationsListResponse,
+    )
+    def get_list(
+        self, schema: Any, searchable_fields: Optional[List[str]] = None
+    ) -> Any:
+        return super().get_list(schema, searchable_fields)
+
+    @cached(
+        tags=[FILTER_CONFIGURATION_CACHE_TAG],
+        model=ParDashboardFilterConfigurationsInfo,
+    )
+    def get_by_id(self, id: int) -> Any:
+        return super().get_by_id(id)
+
+    @invalidates(FILTER_CONFIGURATION_CACHE_TAG)
+    def add(self, schema: Any) -> Any:
+        return super().add(schema)
+
+    @invalidates(FILTER_CONFIGURATION_CACHE_TAG)
+    def patch(
+        self,
+        id: int,
+        schema: Any,
+        exclude_none: bool = True,
+        exclude_unset: bool = False,
+    ) -> Any:
+        return super().patch(id, schema, exclude_none, exclude_unset)
+
+    @invalidates(FILTER_CONFIGURATION_CACHE_TAG)
+    def remove_by_id(self, id: int) -> Any:
+        return super().remove_by_id(id)
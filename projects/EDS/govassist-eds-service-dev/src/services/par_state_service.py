@@ -4,10 +4,12 @@ from enum import Enum
 from typing import Callable, List, Optional
 
 from src.core.exceptions import BadRequestError, InternalServerError
+from src.core.tiered_cache import cached
 from src.model.par_model import Par
 from src.repository.par_activity_repository import ParActivityRepository
 from src.repository.workflow_status_repository import WorkflowStatusRepository
 from src.schema.par_activity_schema import ParActivityCreate
+from src.services.workflow_status_service import WORKFLOW_STATUS_CACHE_TAG
 
 
 class ParStatus(Enum):
@@ -68,6 +70,7 @@ class ParStateService:
             raise BadRequestError("PAR has no current status")
         return par.current_status
 
+    @cached(tags=[WORKFLOW_STATUS_CACHE_TAG])
     def can_view(self, status: str) -> bool:
         """Check if the current status allows viewing"""
         try:
@@ -77,6 +80,7 @@ class ParStateService:
         except Exception:
             raise InternalServerError("Failed to check view permission")
 
+    @cached(tags=[WORKFLOW_STATUS_CACHE_TAG])
     def can_edit(self, status: str) -> bool:
         """Check if the current status allows editing"""
         try:
@@ -86,6 +90,7 @@ class ParStateService:
         except Exception:
             raise InternalServerError("Failed to check edit permission")
 
+    @cached(tags=[WORKFLOW_STATUS_CACHE_TAG])
     def get_status_description(self, status: str) -> Optional[str]:
         """Get the description for a status"""
         try:
@@ -97,6 +102,7 @@ class ParStateService:
             raise InternalServerError("Failed to get status description")
 
     # Status machine core methods
+    @cached(tags=[WORKFLOW_STATUS_CACHE_TAG])
     def get_possible_transitions(self, current_status: str) -> List[str]:
         """Get all possible transitions from the current status"""
         try:
@@ -143,9 +149,8 @@ class ParStateService:
         except (KeyError, AttributeError):
             return False
 
+    @cached(tags=[WORKFLOW_STATUS_CACHE_TAG])
     def validate_status(self, status: str) -> bool:
         """Validate if a status exists in the workflow"""
-        try:
-            return self.workflow_status_repository.get_by_name(status) is not None
-        except Exception:
-            return False
+        # Errors propagate rather than returning False, which would be cached
+        return self.workflow_status_repository.get_by_name(status) is not None
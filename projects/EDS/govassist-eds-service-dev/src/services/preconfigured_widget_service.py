@@ -1,11 +1,41 @@
-from typing import Callable
+from typing import Any, Callable, List, Optional
 
 from sqlalchemy.orm import Session
 
+from src.core.tiered_cache import cached, invalidates
 from src.repository.preconfigured_widget_repository import PreconfiguredWidgetRepository
+from src.schema.preconfigured_widget_schema import PreconfiguredWidgetListResponse
 from src.services.base_service import BaseService
 
+PRECONFIGURED_WIDGET_CACHE_TAG = "preconfigured_widgets"
+
 
 class PreconfiguredWidgetService(BaseService):
     def __init__(self, session_factory: Callable[..., Session]):
         super().__init__(PreconfiguredWidgetRepository(session_factory))
+
+    @cached(
+        tags=[PRECONFIGURED_WIDGET_CACHE_TAG], model=PreconfiguredWidgetListResponse
+    )
+    def get_list(
+        self, schema: Any, searchable_fields: Optional[List[str]] = None
+    ) -> Any:
+        return super().get_list(schema, searchable_fields)
+
+    @invalidates(PRECONFIGURED_WIDGET_CACHE_TAG)
+    def add(self, schema: Any) -> Any:
+        return super().add(schema)
+
+    @invalidates(PRECONFIGURED_WIDGET_CACHE_TAG)
+    def patch(
+        self,
+        id: int,
+        schema: Any,
+        exclude_none: bool = True,
+        exclude_unset: bool = False,
+    ) -> Any:
+        return super().patch(id, schema, exclude_none, exclude_unset)
+
+    @invalidates(PRECONFIGURED_WIDGET_CACHE_TAG)
+    def remove_by_id(self, id: int) -> Any:
+        return super().remove_by_id(id)
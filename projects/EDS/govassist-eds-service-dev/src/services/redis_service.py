@@ -1,13 +1,13 @@
-import json
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 
 from src.core.config import configs
 from src.core.redis_client import RedisClient
 from src.core.redis_config import SerializationMethod
+from src.core.redis_namespace import namespace_version_key
 from src.schema.workflow_schema import (
     FileProcessingInfo,
     FileProcessingStatus,
@@ -17,7 +17,16 @@ from src.schema.workflow_schema import (
     WorkflowState,
     WorkflowStepEnum,
 )
-from src.services.workflow_redis_manager import WorkflowRedisSchema
+from src.services.workflow_redis_manager import (
+    FILE_NAME_PLACEHOLDER,
+    UPDATE_WORKFLOW_STATE_SCRIPT,
+    WORKFLOW_STATE_TTL,
+    WorkflowRedisSchema,
+    WorkflowStateCodec,
+    WorkflowStream,
+    build_log_entry,
+    build_workflow_event,
+)
 
 
 class WorkflowKeyBuilder:
@@ -73,15 +82,15 @@ class LockManager:
         self.redis_client = redis_client
         self.key_builder = WorkflowKeyBuilder()
 
-    async def acquire_lock(self, resource: str, timeout: float = 10.0) -> bool:
-        """Acquire distributed lock"""
+    async def acquire_lock(self, resource: str, timeout: float = 10.0) -> Optional[str]:
+        """Acquire distributed lock; returns the owner token, or None if held elsewhere"""
         key = self.key_builder.lock_key(resource)
         return await self.redis_client.acquire_lock(key, timeout)
 
-    async def release_lock(self, resource: str) -> bool:
-        """Release distributed lock"""
+    async def release_lock(self, resource: str, token: str) -> bool:
+        """Release distributed lock held with ``token``"""
         key = self.key_builder.lock_key(resource)
-        return await self.redis_client.release_lock(key)
+        return await self.redis_client.release_lock(key, token)
 
 
 class CacheManager:
@@ -89,12 +98,18 @@ class CacheManager:
 
     def __init__(self, redis_client: RedisClient):
         self.redis_client = redis_client
+        # Reads accept either format, so this only switches what gets written
+        self.serialization = (
+            SerializationMethod.COMPACT
+            if configs.REDIS_COMPACT_SERIALIZATION
+            else SerializationMethod.JSON
+        )
 
     async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """Set cache value"""
         try:
             return await self.redis_client.set(
-                key, value, ttl, serialization=SerializationMethod.JSON
+                key, value, ttl, serialization=self.serialization
             )
         except Exception as e:
             logger.error(f"[CacheManager][set] Failed for key={key}: {e}")
@@ -104,12 +119,34 @@ class CacheManager:
         """Get cache value"""
         try:
             return await self.redis_client.get(
-                key, serialization=SerializationMethod.JSON
+                key, serialization=SerializationMethod.COMPACT
             )
         except Exception as e:
             logger.error(f"[CacheManager][get] Failed for key={key}: {e}")
             return None
 
+    async def get_many(self, keys: List[str]) -> List[Any]:
+        """Get several cache values in one round trip"""
+        try:
+            return await self.redis_client.mget_many(
+                keys, serialization=SerializationMethod.COMPACT
+            )
+        except Exception as e:
+            logger.error(f"[CacheManager][get_many] Failed: {e}")
+            return [None] * len(keys)
+
+    async def set_many(
+        self, mapping: Dict[str, Any], ttl: Optional[int] = None
+    ) -> bool:
+        """Set several cache values in one round trip"""
+        try:
+            return await self.redis_client.mset_many(
+                mapping, ttl, serialization=self.serialization
+            )
+        except Exception as e:
+            logger.error(f"[CacheManager][set_many] Failed: {e}")
+            return False
+
     async def delete(self, *keys: str) -> int:
         """Delete cache keys"""
         try:
@@ -227,10 +264,10 @@ class KeyManager:
     def __init__(self, redis_client: RedisClient):
         self.redis_client = redis_client
 
-    async def find(self, pattern: str) -> List[str]:
+    async def find(self, pattern: str, count: int = 500) -> List[str]:
         """Find keys matching pattern"""
         try:
-            return await self.redis_client.keys(pattern)
+            return await self.redis_client.keys(pattern, count)
         except Exception as e:
             logger.error(f"[KeyManager][find] Failed for pattern={pattern}: {e}")
             return []
@@ -244,6 +281,22 @@ class KeyManager:
             return False
 
 
+class NamespaceManager:
+    """
+    Reads versioned key families sharing a ``{namespace}:`` prefix. A family
+    is invalidated in O(1) by bumping its version (see
+    ``bump_namespace_sync``), leaving the old keys to expire.
+    """
+
+    def __init__(self, redis_client: RedisClient):
+        self.redis_client = redis_client
+
+    async def version(self, namespace: str) -> int:
+        """Current version of a versioned namespace"""
+        version = await self.redis_client.get(namespace_version_key(namespace))
+        return int(version or 0)
+
+
 class WorkflowManager:
     """Manages workflow state in Redis using RedisService"""
 
@@ -279,27 +332,42 @@ class WorkflowManager:
             total_files=len(processable_items),
             files=files,
         )
-        # Store in Redis as JSON string
-        await self.redis_service.cache_set(
-            self.schema.workflow_state_key(workflow_id),
-            workflow.model_dump(),
-            86400 * 7,
-        )
-        # emit workflow update to workflow updates channel
-        await self.emit_workflow_update_async(
-            workflow_id, "created", workflow.model_dump()
-        )
-        # Set expiry for logs list
-        await self.redis_service.expire(
-            self.schema.workflow_logs_key(workflow_id), 86400 * 7
-        )
-        await self.add_log(
-            workflow_id,
-            db_workflow_id,
-            LogLevel.INFO,
-            "Workflow created",
-            step=WorkflowStepEnum.INITIALIZATION.value,
-        )
+        # Store as one hash for the workflow plus one hash per file
+        workflow_fields, file_fields = WorkflowStateCodec.workflow_mapping(workflow)
+        state_key = self.schema.workflow_state_key(workflow_id)
+        files_key = self.schema.workflow_files_key(workflow_id)
+        async with self.redis_service.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(state_key)
+            pipe.hset(state_key, mapping=workflow_fields)
+            pipe.expire(state_key, WORKFLOW_STATE_TTL)
+            for file_id, fields in file_fields.items():
+                file_key = self.schema.workflow_file_key(workflow_id, file_id)
+                pipe.hset(file_key, mapping=fields)
+                pipe.expire(file_key, WORKFLOW_STATE_TTL)
+            if file_fields:
+                pipe.sadd(files_key, *file_fields.keys())
+                pipe.expire(files_key, WORKFLOW_STATE_TTL)
+            # Snapshot event and first log commit with the state
+            WorkflowStream.queue(
+                pipe,
+                self.schema,
+                workflow_id,
+                logs=[
+                    build_log_entry(
+                        db_workflow_id,
+                        LogLevel.INFO,
+                        "Workflow created",
+                        step=WorkflowStepEnum.INITIALIZATION.value,
+                    )
+                ],
+                event=build_workflow_event(
+                    workflow_id,
+                    "created",
+                    workflow.model_dump(mode="json"),
+                    workflow.event_seq,
+                    "snapshot",
+                ),
+            )
         logger.info("Workflow created")
         return workflow_id
 
@@ -316,55 +384,52 @@ class WorkflowManager:
         error_message: Optional[str] = None,
     ) -> bool:
         try:
-            workflow = await self.get_workflow(workflow_id)
-            if not workflow or file_id not in workflow.files:
-                return False
-            file_info = workflow.files[file_id]
-            file_info.status = status
+            file_fields = {"status": status}
             if progress is not None:
-                file_info.progress_percentage = min(100.0, max(0.0, progress))
-            if validation_errors:
-                file_info.validation_errors.extend(validation_errors)
-            if validation_warnings:
-                file_info.validation_warnings.extend(validation_warnings)
+                file_fields["progress_percentage"] = min(100.0, max(0.0, progress))
             if row_counts:
-                file_info.valid_rows_count = row_counts.get("valid", 0)
-                file_info.invalid_rows_count = row_counts.get("invalid", 0)
-                file_info.total_rows = row_counts.get("total", 0)
-            if error_message:
-                file_info.error_message = error_message
+                file_fields["valid_rows_count"] = row_counts.get("valid", 0)
+                file_fields["invalid_rows_count"] = row_counts.get("invalid", 0)
+                file_fields["total_rows"] = row_counts.get("total", 0)
             if status in [FileProcessingStatus.PROCESSED, FileProcessingStatus.FAILED]:
-                file_info.processed_at = datetime.now(timezone.utc)
-            workflow.files_processed = sum(
-                1
-                for f in workflow.files.values()
-                if f.status
-                in [FileProcessingStatus.PROCESSED, FileProcessingStatus.FAILED]
-            )
-            workflow.files_failed = sum(
-                1
-                for f in workflow.files.values()
-                if f.status == FileProcessingStatus.FAILED
+                file_fields["processed_at"] = datetime.now(timezone.utc)
+
+            # Counters and progress are derived server-side from the status
+            # transition; the state, its event and the log commit in one call
+            keys, args = WorkflowStateCodec.update_args(
+                self.schema,
+                workflow_id,
+                {},
+                file_id,
+                file_fields,
+                append={
+                    "validation_errors": validation_errors,
+                    "validation_warnings": validation_warnings,
+                    "error_messages": [error_message] if error_message else None,
+                },
+                track_counts=True,
+                require_file=True,
             )
-            if workflow.total_files > 0:
-                workflow.progress_percentage = (
-                    workflow.files_processed / workflow.total_files
-                ) * 100
-            await self.redis_service.cache_set(
-                self.schema.workflow_state_key(workflow_id),
-                workflow.model_dump(),
-                86400 * 7,
+            args.append(
+                WorkflowStream.emit_arg(
+                    workflow_id,
+                    "updated",
+                    logs=[
+                        build_log_entry(
+                            workflow_db_id,
+                            LogLevel.INFO,
+                            f"File {FILE_NAME_PLACEHOLDER} status updated to {status.value}",
+                            file_name=FILE_NAME_PLACEHOLDER,
+                            step=WorkflowStepEnum.PROCESSING.value,
+                            details={"progress": progress, "error": error_message},
+                        )
+                    ],
+                )
             )
-            await self.add_log(
-                workflow_id,
-                workflow_db_id,
-                LogLevel.INFO,
-                f"File {file_info.file_name} status updated to {status.value}",
-                file_name=file_info.file_name,
-                step=WorkflowStepEnum.PROCESSING.value,
-                details={"progress": progress, "error": error_message},
+            result = await self.redis_service.redis_client.run_script(
+                UPDATE_WORKFLOW_STATE_SCRIPT, keys, args
             )
-            return True
+            return bool(result)
         except Exception:
             logger.error("Failed to update file")
             return False
@@ -377,82 +442,110 @@ class WorkflowManager:
         message: str,
         file_name: Optional[str] = None,
         step: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
     ):
-        """Synchronous log addition for Celery tasks"""
-        log_entry = {
-            "workflow_id": workflow_db_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "level": level.value,
-            "message": message,
-            "file_name": file_name,
-            "step": step,
-        }
-        await self.redis_service.list_lpush(
-            self.schema.workflow_logs_key(workflow_id), log_entry
+        """Append a log entry to the workflow stream"""
+        log_entry = build_log_entry(
+            workflow_db_id, level, message, file_name, step, details
         )
+        async with self.redis_service.redis_client.pipeline() as pipe:
+            WorkflowStream.queue(pipe, self.schema, workflow_id, logs=[log_entry])
 
     async def get_workflow(self, workflow_id: str) -> Optional[WorkflowState]:
         try:
-            data = await self.redis_service.cache_get(
+            redis_client = self.redis_service.redis_client
+            workflow_hash = await redis_client.hgetall(
                 self.schema.workflow_state_key(workflow_id)
             )
-            if data:
-                if isinstance(data, bytes):
-                    data = data.decode("utf-8")
-                if isinstance(data, str):
-                    data = json.loads(data)
-                return WorkflowState.model_validate(data)
-            return None
+            if not workflow_hash:
+                return None
+            file_ids = await redis_client.smembers(
+                self.schema.workflow_files_key(workflow_id)
+            )
+            file_hashes = await redis_client.hgetall_many(
+                *[
+                    self.schema.workflow_file_key(workflow_id, file_id)
+                    for file_id in file_ids
+                ]
+            )
+            return WorkflowStateCodec.assemble(workflow_hash, file_hashes)
         except Exception:
             logger.error("Failed to get workflow")
             return None
 
+    async def read_workflow_stream(
+        self, workflow_id: str, cursor: Optional[str] = None, count: int = 100
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Logs and events recorded after ``cursor``, oldest first, and the cursor
+        to pass on the next call. Pass no cursor to read from the beginning.
+        """
+        return await self._read_stream(
+            self.schema.workflow_stream_key(workflow_id), cursor, count
+        )
+
+    async def _read_stream(
+        self, stream_key: str, cursor: Optional[str], count: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        entries = WorkflowStream.decode(
+            await self.redis_service.redis_client.xrange(
+                stream_key, min=WorkflowStream.range_start(cursor), count=count
+            )
+        )
+        return entries, entries[-1]["id"] if entries else cursor
+
     async def get_workflow_logs(
-        self, workflow_id: str, limit: int = 100, offset: int = 0
-    ) -> List[WorkflowLogEntry]:
+        self, workflow_id: str, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[WorkflowLogEntry], Optional[str]]:
         try:
-            logs_data = await self.redis_service.list_range(
-                self.schema.workflow_logs_key(workflow_id), offset, offset + limit - 1
+            # The log stream, not the capped one, so old logs are never missing
+            entries, next_cursor = await self._read_stream(
+                self.schema.workflow_logs_key(workflow_id), cursor, limit
             )
             logs = []
-            for log_data in logs_data:
+            for entry in entries:
+                if entry["kind"] != WorkflowStream.LOG:
+                    continue
                 try:
-                    logs.append(WorkflowLogEntry.model_validate_json(log_data))
+                    logs.append(WorkflowLogEntry.model_validate(entry["data"]))
                 except Exception:
                     continue  # Skip malformed logs
-            return logs
+            return logs, next_cursor
         except Exception:
             logger.error("Failed to get logs for workflow")
-            return []
+            return [], cursor
 
     async def register_task(self, workflow_id: str, task_id: str):
-        workflow = await self.get_workflow(workflow_id)
-        if workflow:
-            workflow.task_id = task_id
-            await self.redis_service.cache_set(
-                self.schema.workflow_state_key(workflow_id),
-                workflow.model_dump(),
-                86400 * 7,
-            )
+        keys, args = WorkflowStateCodec.update_args(
+            self.schema, workflow_id, {"task_id": task_id}
+        )
+        args.append(WorkflowStream.emit_arg(workflow_id, "updated"))
+        await self.redis_service.redis_client.run_script(
+            UPDATE_WORKFLOW_STATE_SCRIPT, keys, args
+        )
 
     async def emit_workflow_update_async(
-        self, workflow_id: str, status: str, workflow_data: Dict[str, Any]
+        self,
+        workflow_id: str,
+        status: str,
+        workflow_data: Dict[str, Any],
+        seq: Optional[int] = None,
+        event_type: str = "delta",
+        logs: Optional[List[Dict[str, Any]]] = None,
     ):
-        """Emit workflow update via Redis Pub/Sub (Celery pushes to Redis, server emits via Socket.IO)"""
+        """Emit workflow update via the Redis streams (server emits via Socket.IO)"""
         try:
             # Create the message to publish to Redis
-            message = {
-                "workflow_id": workflow_id,
-                "status": status,
-                "data": workflow_data,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-            }
-
-            # Publish to Redis channel (synchronous operation)
-            await self.redis_service.pubsub.publish(
-                configs.WORKFLOW_UPDATES, json.dumps(message)
+            message = build_workflow_event(
+                workflow_id, status, workflow_data, seq, event_type
             )
 
+            # Event and any accompanying logs are appended in one round trip
+            async with self.redis_service.redis_client.pipeline() as pipe:
+                WorkflowStream.queue(
+                    pipe, self.schema, workflow_id, logs=logs, event=message
+                )
+
         except Exception as e:
             logger.error(f"Failed to publish workflow update to Redis: {e}")
 
@@ -485,6 +578,7 @@ class RedisService:
         self.set = SetManager(redis_client)
         self.list = ListManager(redis_client)
         self.key = KeyManager(redis_client)
+        self.namespace = NamespaceManager(redis_client)
         self.pubsub = PubSubManager(redis_client)
 
         # Advanced workflow manager (schema-driven, index-aware)
@@ -499,6 +593,16 @@ class RedisService:
         """Get cache value (alias for cache.get)"""
         return await self.cache.get(key)
 
+    async def cache_get_many(self, keys: List[str]) -> List[Any]:
+        """Get several cache values (alias for cache.get_many)"""
+        return await self.cache.get_many(keys)
+
+    async def cache_set_many(
+        self, mapping: Dict[str, Any], ttl: Optional[int] = None
+    ) -> bool:
+        """Set several cache values (alias for cache.set_many)"""
+        return await self.cache.set_many(mapping, ttl)
+
     async def cache_delete(self, *keys: str) -> int:
         """Delete cache keys (alias for cache.delete)"""
         return await self.cache.delete(*keys)
@@ -517,13 +621,13 @@ class RedisService:
         """Delete session (alias for session.delete_session)"""
         return await self.session.delete_session(session_id)
 
-    async def acquire_lock(self, resource: str, timeout: float = 10.0) -> bool:
+    async def acquire_lock(self, resource: str, timeout: float = 10.0) -> Optional[str]:
         """Acquire lock (alias for lock.acquire_lock)"""
         return await self.lock.acquire_lock(resource, timeout)
 
-    async def release_lock(self, resource: str) -> bool:
+    async def release_lock(self, resource: str, token: str) -> bool:
         """Release lock (alias for lock.release_lock)"""
-        return await self.lock.release_lock(resource)
+        return await self.lock.release_lock(resource, token)
 
     # Hash convenience methods
     async def hash_set(self, key: str, mapping: Dict[str, Any]) -> bool:
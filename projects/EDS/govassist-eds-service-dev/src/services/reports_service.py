@@ -1,15 +1,17 @@
+import asyncio
 import logging
 from datetime import UTC
 from datetime import datetime as dt
 from datetime import timedelta as td
-from typing import Any, Callable
+from typing import Any, Callable, Dict, List
 
 from azure.storage.blob import BlobSasPermissions, generate_blob_sas
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from src.celery_app import redis_client
 from src.core.config import configs
 from src.core.exceptions import (
     BadRequestError,
@@ -18,6 +20,15 @@ from src.core.exceptions import (
     ValidationError,
 )
 from src.core.extensions import blob_service_client
+from src.core.redis_namespace import (
+    REPORT_DATA_NAMESPACE,
+    REPORT_EXPORT_ARTIFACT_TTL,
+    REPORT_PREVIEW_CACHE_TTL,
+    invalidate_report_queries,
+    report_export_key,
+    report_preview_key,
+)
+from src.core.tiered_cache import cached
 from src.elasticsearch.service import es_service
 from src.model.master_model import (
     MasterAward,
@@ -34,6 +45,7 @@ from src.model.report_model import (
     ReportConfiguration,
     ReportConfigurationTagAssociation,
     ReportExport,
+    ReportExportFormat,
     ReportTemplate,
     ReportTemplateTagAssociation,
     Tag,
@@ -54,23 +66,26 @@ from src.schema.report_schema import (
     ReportAgentResponseFeedback,
     ReportConfigurationQueryElasticsearch,
     ReportFind,
-    SubReportConfigBaseSchema,
 )
 from src.services.base_service import BaseService
 from src.services.redis_service import RedisService
 from src.util.get_fields_from_models import get_fields_from_models
-from src.util.reports import (
-    TABLE_CONFIG,
-    build_filter_condition,
-    build_sqlalchemy_query,
-    make_report_redis_key,
-    resolve_join_chain,
+from src.util.report_plan import (
+    CompiledReportPlan,
+    get_report_plan,
+    report_export_hash,
+    report_filters_hash,
 )
+from src.util.reports import TABLE_CONFIG
 from src.tasks.report_export import report_export
 logger = logging.getLogger(__name__)
 from celery.exceptions import TimeoutError as CeleryTimeoutError
 from kombu.exceptions import OperationalError
 
+# Background prefetches of preview pages, by cache key; holding the tasks
+# keeps them from being collected before they finish
+_preview_prefetches: Dict[str, asyncio.Task] = {}
+
 
 class ReportMetadataService(BaseService):
     def __init__(self, session_factory: Callable[..., Session]):
@@ -188,6 +203,7 @@ class ReportConfigurationService(BaseService):
             for field, value in report_config.items():
                 setattr(report, field, value)
             session.commit()
+            invalidate_report_queries(redis_client)
             return self._repository.read_by_id(report_id, eager=True)
 
     def remove_by_id(self, report_id: int):
@@ -207,6 +223,7 @@ class ReportConfigurationService(BaseService):
                     synchronize_session=False
                 )
                 session.commit()
+                invalidate_report_queries(redis_client)
             except SQLAlchemyError as e:
                 logger.error(f"Error deleting report: {e}")
                 raise InternalServerError()
@@ -220,6 +237,7 @@ class ReportConfigurationService(BaseService):
             exclude_eagers=["sub_reports"],
         )
 
+    @cached(tags=["report_fields"])
     def get_fields(self, searchable_fields, search=None, ordering="column_name"):
         common_exclude_fields = {"deleted_at", "created_at", "updated_at", "uuid", "id"}
         TABLE_CONFIG = {
@@ -442,21 +460,16 @@ class ReportConfigurationService(BaseService):
             },
         ]
 
-    def build_preview_response(
-        self, report_config: dict, result, page=1, page_size=10, total_count=0
-    ):
-        config_fields = report_config["config"]
-
-        # Extract field labels
-        fields_by_uuid = {
+    @staticmethod
+    def preview_fields(report_config: dict) -> Dict[str, Dict[str, Any]]:
+        return {
             field["uuid"]: {"uuid": field["uuid"], "label": field["label"]}
-            for field in config_fields
+            for field in report_config["config"]
         }
 
-        # Paginate result
-        total_pages = max(1, (total_count + page_size - 1) // page_size)
-
-        # Build row data
+    def build_preview_rows(self, report_config: dict, result) -> List[Dict[str, Any]]:
+        """Preview rows keyed by field uuid, JSON-ready so they can be cached as is"""
+        fields_by_uuid = self.preview_fields(report_config)
         founds = []
         for row in result:
             found_row = {}
@@ -465,6 +478,16 @@ class ReportConfigurationService(BaseService):
                 found_row[field_info["uuid"]] = data
 
             founds.append(found_row)
+        return jsonable_encoder(founds)
+
+    def build_preview_response(
+        self, report_config: dict, founds, page=1, page_size=10, total_count=0
+    ):
+        # Extract field labels
+        fields_by_uuid = self.preview_fields(report_config)
+
+        # Paginate result
+        total_pages = max(1, (total_count + page_size - 1) // page_size)
 
         # Build response
         return {
@@ -513,80 +536,143 @@ class ReportConfigurationService(BaseService):
             if not sub_report_config:
                 raise NotFoundError(detail="Sub report config not present.")
 
-            find_dict = find.model_dump()
+            filters = find.model_dump()["filters"]
             try:
-                sub_report_config["filters"] = find_dict["filters"]
-                SubReportConfigBaseSchema.model_validate(sub_report_config)
+                plan = get_report_plan(session, sub_report_config)
+                plan.validate_filters(filters)
             except Exception as e:
                 logger.error(f"Error validating report config: {e}")
                 raise ValidationError(detail=str(e))
 
             try:
-                redis_key = make_report_redis_key(
-                    report_id, sub_report_id, sub_report_config
+                page_size = int(find.page_size)
+                generation = await redis_service.namespace.version(
+                    REPORT_DATA_NAMESPACE
                 )
-                cached_result = await redis_service.cache_get(redis_key)
-                if (
-                    cached_result is not None
-                    and "db_query" in cached_result
-                    and "count_query" in cached_result
-                ):
-                    raw_sql = cached_result["db_query"]
-                    count_sql = cached_result["count_query"]
+                filters_hash = report_filters_hash(filters)
 
-                else:
-                    base, join_plan = resolve_join_chain(
-                        sub_report_config["config"], sub_report_config["group_by"]
-                    )
-                    # For now we are not supporting ordering in the preview API, So by default data will be ordered by id of the base table.
-                    stmt, count_stmt, data_type_map, formula_map = (
-                        build_sqlalchemy_query(
-                            session, sub_report_config, base, join_plan, None
-                        )
-                    )
-
-                    filter_expr = build_filter_condition(
-                        sub_report_config["filters"], data_type_map, formula_map
-                    )
-                    if filter_expr is not None:
-                        stmt = stmt.where(filter_expr)
-                        count_stmt = count_stmt.where(filter_expr)
-
-                    count_sql = f"SELECT COUNT(*) FROM ({count_stmt.compile(compile_kwargs={'literal_binds': True})}) AS subquery"
-
-                    raw_sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
-
-                    await redis_service.cache_set(
-                        redis_key,
-                        {
-                            "db_query": raw_sql,
-                            "count_query": str(count_sql),
-                            "field_types": data_type_map,
-                        },
-                        7200,
+                def cache_key(*parts) -> str:
+                    return report_preview_key(
+                        generation, plan.plan_hash, filters_hash, *parts
                     )
 
-                # NOTE: The sql in the redis cache is already generated by the sqlalchemy query builder , So there we don't have issue with sql injection
-                # and here we are just adding the pagination to the sql string.
-                # NOTE: This is for mssql server.
-                paginated_sql = f"""
-                    {raw_sql}
-                    OFFSET {(find.page - 1) * int(find.page_size)} ROWS
-                    FETCH NEXT {int(find.page_size)} ROWS ONLY
-                """
-
-                result = session.execute(text(paginated_sql)).fetchall()
-                count = session.execute(text(count_sql)).scalar()
+                # The count doesn't depend on the page, so it is cached once
+                # per filter and computed alongside the first page
+                founds, count = await asyncio.gather(
+                    self._cached_preview_value(
+                        redis_service,
+                        cache_key("page", find.page, page_size),
+                        self._fetch_preview_page,
+                        plan,
+                        filters,
+                        find.page,
+                        page_size,
+                    ),
+                    self._cached_preview_value(
+                        redis_service,
+                        cache_key("count"),
+                        self._fetch_preview_count,
+                        plan,
+                        filters,
+                    ),
+                )
+                self._prefetch_preview_pages(
+                    redis_service, cache_key, plan, filters, find.page, page_size, count
+                )
 
                 return self.build_preview_response(
-                    sub_report_config, result, find.page, int(find.page_size), count
+                    sub_report_config, founds, find.page, page_size, count
                 )
 
             except Exception as e:
                 logger.error(f"Error building join plan: {e}", exc_info=True)
                 raise ValidationError(detail=f"Error building join plan: {e}")
 
-    async def export_report(self, report_id: int, current_user_id: int):
+    def _fetch_preview_page(
+        self, plan: CompiledReportPlan, filters, page: int, page_size: int
+    ) -> List[Dict[str, Any]]:
+        """One page of preview rows; uses its own session, so it can run next to the count"""
+        with self._repository.session_factory() as session:
+            stmt, _ = plan.statements(filters)
+            # For now we are not supporting ordering in the preview API, So by default data will be ordered by id of the base table.
+            # Offset and limit are bound like the filter values, so page
+            # flips reuse the plan's compiled SQL
+            page_stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+            result = plan.execute(session, page_stmt).fetchall()
+            return self.build_preview_rows(plan.config, result)
+
+    def _fetch_preview_count(self, plan: CompiledReportPlan, filters) -> int:
+        with self._repository.session_factory() as session:
+            return plan.execute(session, plan.count_statement(filters)).scalar()
+
+    async def _cached_preview_value(
+        self, redis_service: RedisService, key: str, fetch: Callable, *args
+    ):
+        """Cached preview page or count; on a miss only one request runs the query"""
+
+        async def load():
+            return await redis_service.cache_get(key)
+
+        async def build():
+            value = await asyncio.to_thread(fetch, *args)
+            await redis_service.cache_set(key, value, REPORT_PREVIEW_CACHE_TTL)
+            return value
+
+        return await redis_service.redis_client.single_flight(key, load, build)
+
+    def _prefetch_preview_pages(
+        self,
+        redis_service: RedisService,
+        cache_key: Callable[..., str],
+        plan: CompiledReportPlan,
+        filters,
+        page: int,
+        page_size: int,
+        total_count: int,
+    ):
+        """Warm the pages next to ``page`` in the background, so paging is served from cache"""
+        total_pages = max(1, (total_count + page_size - 1) // page_size)
+        for adjacent in (page + 1, page - 1):
+            key = cache_key("page", adjacent, page_size)
+            if not 1 <= adjacent <= total_pages or key in _preview_prefetches:
+                continue
+            task = asyncio.create_task(
+                self._prefetch_preview_page(
+                    redis_service, key, plan, filters, adjacent, page_size
+                )
+            )
+            _preview_prefetches[key] = task
+            task.add_done_callback(
+                lambda _, key=key: _preview_prefetches.pop(key, None)
+            )
+
+    async def _prefetch_preview_page(
+        self,
+        redis_service: RedisService,
+        key: str,
+        plan: CompiledReportPlan,
+        filters,
+        page: int,
+        page_size: int,
+    ):
+        try:
+            if await redis_service.cache_get(key) is not None:
+                return
+            founds = await asyncio.to_thread(
+                self._fetch_preview_page, plan, filters, page, page_size
+            )
+            await redis_service.cache_set(key, founds, REPORT_PREVIEW_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Prefetching preview page {page} failed: {e}")
+
+    async def export_report(
+        self,
+        report_id: int,
+        current_user_id: int,
+        redis_service: RedisService,
+        export_format: ReportExportFormat = ReportExportFormat.XLSX,
+    ):
+        export_format = ReportExportFormat(export_format)
         with self._repository.session_factory() as session:
             report = (
                 session.query(ReportConfiguration)
@@ -596,43 +682,110 @@ class ReportConfigurationService(BaseService):
             if not report:
                 raise NotFoundError(detail=f"Report with id {report_id} not found")
 
-            # Check if the report is already being exported
-            export = (
-                session.query(ReportExport)
-                .filter(
-                    ReportExport.report_id == report_id,
-                    ReportExport.status.in_(["PENDING", "IN_PROGRESS"]),
-                )
-                .first()
+            # Identical exports of unchanged data share one artifact
+            generation = await redis_service.namespace.version(REPORT_DATA_NAMESPACE)
+            artifact_key = report_export_key(
+                generation,
+                report_export_hash(report.name, report.sub_reports),
+                export_format.value,
             )
-            if export:
-                one_day_ago = dt.now(UTC) - td(days=1)
-                if export.created_at >= one_day_ago:
-                    # Still within 1 day → block export
-                    raise BadRequestError(detail="Report is already being exported.")
-                else:
-                    # More than 1 day old → delete it
-                    logger.warning(f"Deleting stale export {export.id} for report {report_id}")
-                    session.delete(export)
+
+            async def load_artifact():
+                record = await redis_service.cache_get(artifact_key)
+                if not isinstance(record, dict):
+                    return None
+                export = session.get(ReportExport, record.get("export_id"))
+                # The blob lookup is a blocking Azure call
+                usable = await asyncio.to_thread(
+                    self._export_artifact_usable, export, record
+                )
+                return record if usable else None
+
+            async def queue_export():
+                # Check if the report is already being exported
+                export = (
+                    session.query(ReportExport)
+                    .filter(
+                        ReportExport.report_id == report_id,
+                        ReportExport.status.in_(["PENDING", "IN_PROGRESS"]),
+                    )
+                    .first()
+                )
+                if export:
+                    one_day_ago = dt.now(UTC) - td(days=1)
+                    if export.created_at >= one_day_ago:
+                        # Still within 1 day → block export
+                        raise BadRequestError(detail="Report is already being exported.")
+                    else:
+                        # More than 1 day old → delete it
+                        logger.warning(f"Deleting stale export {export.id} for report {report_id}")
+                        session.delete(export)
+                        session.commit()
+
+                # Create a new export
+                export = ReportExport(report_id=report_id, created_by_id=current_user_id)
+                session.add(export)
+                session.commit()
+                session.refresh(export)
+
+                # Identical requests attach to this export until it completes.
+                # Written before queuing, so a fast task's completed record
+                # is never overwritten by this pending one
+                record = {"export_id": export.id, "blob_name": None}
+                await redis_service.cache_set(
+                    artifact_key, record, REPORT_EXPORT_ARTIFACT_TTL
+                )
+
+                try:
+                    result = report_export.apply_async(
+                        args=[export.id, export_format.value, artifact_key]
+                    )
+                    logger.info(f"Queued report export task: {result.id}")
+                except (OperationalError, CeleryTimeoutError) as e:
+                    logger.error(f"Failed to queue report export: {e}")
+                    await redis_service.cache_delete(artifact_key)
+                    export.status = "FAILED"
+                    export.error_message = "Task queue is temporarily unavailable"
                     session.commit()
+                    return {"export_id": export.id, "queued": False}
 
-            # Create a new export
-            export = ReportExport(report_id=report_id, created_by_id=current_user_id)
-            session.add(export)
-            session.commit()
-            session.refresh(export)
-            
-            try:
-                result = report_export.apply_async(args=[export.id])
-                logger.info(f"Queued report export task: {result.id}")
-            except (OperationalError, CeleryTimeoutError) as e:
-                logger.error(f"Failed to queue report export: {e}")
+                return record
+
+            # Only one of several identical requests queues an export; the
+            # others wait for it and attach to the same one
+            record = await redis_service.redis_client.single_flight(
+                artifact_key, load_artifact, queue_export
+            )
+            if record.get("queued") is False:
                 return JSONResponse(
                     status_code=503,
                     content={
                         "message": "Task queue is temporarily unavailable"
                     },
                 )
+
+            if record.get("blob_name"):
+                # The data hasn't changed since this artifact was built, so it
+                # is handed out again instead of being regenerated
+                export = ReportExport(
+                    report_id=report_id,
+                    created_by_id=current_user_id,
+                    status="COMPLETED",
+                    file_name=record["blob_name"],
+                )
+                session.add(export)
+                session.commit()
+                logger.info(
+                    f"Reusing export {record['export_id']} for report {report_id}"
+                )
+                return JSONResponse(
+                    status_code=200,
+                    content={
+                        "message": "Export is ready.",
+                        "file_url": self._export_file_url(record["blob_name"]),
+                    },
+                )
+
             return JSONResponse(
                 status_code=200,
                 content={
@@ -640,6 +793,35 @@ class ReportConfigurationService(BaseService):
                 },
             )
 
+    @staticmethod
+    def _export_artifact_usable(export, record: Dict[str, Any]) -> bool:
+        """Whether an artifact record still points at a running export or an existing blob"""
+        if not export:
+            return False
+        if record.get("blob_name"):
+            return (
+                export.status == "COMPLETED"
+                and blob_service_client.get_blob_client(
+                    configs.AZURE_STORAGE_CONTAINER_NAME, record["blob_name"]
+                ).exists()
+            )
+        return export.status in ["PENDING", "IN_PROGRESS"] and (
+            export.created_at >= dt.now(UTC) - td(days=1)
+        )
+
+    @staticmethod
+    def _export_file_url(blob_name: str) -> str:
+        """Download URL for an export blob, with a SAS token valid for an hour"""
+        sas_token = generate_blob_sas(
+            account_name=blob_service_client.account_name,
+            container_name=configs.AZURE_STORAGE_CONTAINER_NAME,
+            blob_name=blob_name,
+            account_key=blob_service_client.credential.account_key,  # Only works if using key credential
+            permission=BlobSasPermissions(read=True),
+            expiry=dt.now(UTC) + td(hours=1),
+        )
+        return f"https://{blob_service_client.account_name}.blob.core.windows.net/{configs.AZURE_STORAGE_CONTAINER_NAME}/{blob_name}?{sas_token}"
+
     async def export_status(self, report_id: int):
         with self._repository.session_factory() as session:
             export = (
@@ -657,17 +839,7 @@ class ReportConfigurationService(BaseService):
                 "stale_at": export.stale_at,
             }
             if export.status == "COMPLETED" and export.file_name:
-                sas_token = generate_blob_sas(
-                    account_name=blob_service_client.account_name,
-                    container_name=configs.AZURE_STORAGE_CONTAINER_NAME,
-                    blob_name=export.file_name,
-                    account_key=blob_service_client.credential.account_key,  # Only works if using key credential
-                    permission=BlobSasPermissions(read=True),
-                    expiry=dt.now(UTC) + td(hours=1),
-                )
-                res["file_url"] = (
-                    f"https://{blob_service_client.account_name}.blob.core.windows.net/{configs.AZURE_STORAGE_CONTAINER_NAME}/{export.file_name}?{sas_token}"
-                )
+                res["file_url"] = self._export_file_url(export.file_name)
             return res
 
     def get_supported_data_types(self):
@@ -1,34 +1,70 @@
-import json
 import logging
+import threading
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Callable, Dict, List, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
+from elasticsearch.helpers import scan
 from sqlalchemy import func, text
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
 from src.agents.tools.es_tools import es_client
 from src.celery_app import redis_client
+from src.core.config import configs
 from src.core.exceptions import NotFoundError, ValidationError
+from src.core.redis_codec import encode_cache_value, redis_codec
+from src.core.redis_namespace import (
+    REPORT_DATA_NAMESPACE,
+    REPORT_QUERY_CACHE_NAMESPACE,
+    REPORT_QUERY_CACHE_TTL,
+    bump_namespace_sync,
+    invalidate_report_queries,
+    versioned_key_sync,
+)
+from src.core.single_flight import single_flight_sync
+from src.elasticsearch.index_versions import (
+    create_index_version,
+    discard_index_version,
+    mapping_for,
+    publish_index_version,
+)
 from src.model.report_model import ReportConfiguration
 from src.model.sub_report_model import SubReport, SubReportWorkflow
 from src.repository.sub_report_repository import SubReportRepository
-from src.schema.report_schema import (
-    LARK_PARSER,
-    FormulaFieldValidator,
-    SubReportConfigBaseSchema,
-)
+from src.schema.report_schema import FormulaFieldValidator, parse_formula
 from src.services.base_service import BaseService
+from src.util.pipeline import run_pipelined
 from src.util.project_detail import convert_to_dict
-from src.util.reports import (
-    build_filter_condition,
-    build_sqlalchemy_query,
-    make_report_redis_key,
-    resolve_join_chain,
+from src.util.report_plan import CompiledReportPlan, get_report_plan
+from src.util.report_sync import (
+    WATERMARK_OVERLAP,
+    build_sync_queries,
+    document_id,
+    key_positions,
+    key_ranges,
+    raise_for_bulk_errors,
 )
+from src.util.reports import make_report_redis_key
 
 logger = logging.getLogger(__name__)
 
+# Slices per publish worker, so a slice of sparse ids doesn't leave workers idle
+SLICES_PER_WORKER = 4
+PROGRESS_INTERVAL_SECONDS = 10
+
 
 class WorkflowStatus(str, Enum):
     PENDING = "PENDING"
@@ -64,22 +100,43 @@ class SubReportService(BaseService):
         super().__init__(SubReportRepository(session_factory))
         self.batch_size = 500
 
+    def patch(
+        self,
+        id: int,
+        schema: Any,
+        exclude_none: bool = True,
+        exclude_unset: bool = False,
+    ) -> Any:
+        sub_report = super().patch(id, schema, exclude_none, exclude_unset)
+        invalidate_report_queries(redis_client)
+        return sub_report
+
+    def remove_by_id(self, id: int) -> Any:
+        removed = super().remove_by_id(id)
+        invalidate_report_queries(redis_client)
+        return removed
+
     def _create_index_with_mapping(
-        self, index_name: str, field_types_dict: Dict[str, str]
+        self,
+        index_name: str,
+        field_types_dict: Dict[str, str],
+        meta: Optional[Dict[str, Any]] = None,
     ) -> str:
-        """Create Elasticsearch index with appropriate mapping from SQL types."""
+        """
+        Create a new version of the sub-report's index with a mapping from
+        SQL types. ``index_name`` is the alias readers use; it keeps pointing
+        at the current version until the new one is published.
+        """
 
         properties = {
             col: get_es_mapping(py_type) for col, py_type in field_types_dict.items()
         }
-        body = {"mappings": {"properties": properties}}
+        mappings: Dict[str, Any] = {"properties": properties}
+        if meta:
+            mappings["_meta"] = meta
 
         try:
-            if es_client.indices.exists(index=index_name):
-                es_client.indices.delete(index=index_name)
-
-            es_client.indices.create(index=index_name, body=body)
-            return index_name
+            return create_index_version(es_client, index_name, mappings)
         except Exception as e:
             logger.error(f"Error creating index {index_name}: {e}")
             raise
@@ -95,12 +152,55 @@ class SubReportService(BaseService):
             logger.error("Error getting total count from query")
             raise
 
+    def _count_in_background(self, count_query: str) -> "Future[int]":
+        """
+        Run the count query on its own session and connection, so progress
+        reporting can learn the total without holding up the data query
+        """
+
+        def count() -> int:
+            with self._repository.session_factory() as count_session:
+                return self._get_total_count_from_query(count_session, count_query)
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-count")
+        future = executor.submit(count)
+        executor.shutdown(wait=False)
+        return future
+
+    def stream_query(
+        self,
+        session: Session,
+        query: str,
+        batch_size: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Tuple[List[str], Sequence[Any]]]:
+        """
+        Execute ``query`` once and yield ``(columns, rows)`` batches from a
+        server-side cursor. Unlike OFFSET paging, the database never re-scans
+        the rows before each page, and only one batch is held in memory.
+
+        The connection is busy until the generator is exhausted or closed, so
+        don't run other statements on ``session`` while iterating.
+        """
+        batch_size = batch_size or self.batch_size
+        result = session.execute(
+            text(query).execution_options(stream_results=True, yield_per=batch_size),
+            params or {},
+        )
+        try:
+            columns = list(result.keys())
+            for rows in result.partitions(batch_size):
+                yield columns, rows
+        finally:
+            result.close()
+
     def _update_workflow_status(
         self,
         session: Session,
         workflow_id: int,
         status: WorkflowStatus,
         log_entry: str = None,
+        progress: str = None,
     ) -> None:
         update_fields = {
             "status": status.value,
@@ -111,6 +211,8 @@ class SubReportService(BaseService):
 
         if log_entry:
             update_fields["error_log"] = log_entry
+        if progress:
+            update_fields["progress"] = progress
 
         rows_updated = (
             session.query(SubReportWorkflow)
@@ -125,52 +227,40 @@ class SubReportService(BaseService):
         else:
             logger.warning(f"No workflow found with ID {workflow_id} — update skipped")
 
-    def _process_batch(
+    def _bulk_insert_to_elasticsearch(
         self,
-        session: Session,
-        query: str,
         index_name: str,
+        rows: List[tuple],
+        columns: List[str],
         batch_number: int,
-        offset: int,
-    ) -> bool:
-        """Process a single batch of data"""
-        try:
-            paginated_query = (
-                f"{query} OFFSET {offset} ROWS FETCH NEXT {self.batch_size} ROWS ONLY"
-            )
-            result = session.execute(text(paginated_query))
-            columns = [col[0] for col in result.cursor.description]
-            rows = result.fetchall()
-            result.close()
-
-            if not rows:
-                return True
-
-            self._bulk_insert_to_elasticsearch(index_name, rows, columns, batch_number)
-            return True
-
-        except Exception as e:
-            logger.error(f"Batch {batch_number} failed: {e}")
-            return False
-
-    def _bulk_insert_to_elasticsearch(
-        self, index_name: str, rows: List[tuple], columns: List[str], batch_number: int
+        key_columns: Optional[List[str]] = None,
     ) -> None:
-        """Insert documents to Elasticsearch using bulk API (optimized)"""
+        """
+        Insert documents to Elasticsearch using bulk API (optimized). With
+        ``key_columns`` each document's id is built from those columns,
+        which are left out of the document, so re-inserting a row replaces it.
+        """
+        positions = key_positions(columns, key_columns or [])
 
         def generate_bulk_payload():
             for row in rows:
                 doc = {}
-                for col, val in zip(columns, row):
+                for position, (col, val) in enumerate(zip(columns, row)):
+                    if position in positions:
+                        continue
                     if isinstance(val, datetime):
                         doc[col] = val.isoformat()
                     else:
                         doc[col] = val
-                yield {"index": {"_index": index_name}}
+                action = {"_index": index_name}
+                if positions:
+                    action["_id"] = document_id(row, positions)
+                yield {"index": action}
                 yield doc
 
         try:
-            es_client.bulk(body=generate_bulk_payload(), request_timeout=300)
+            response = es_client.bulk(body=generate_bulk_payload(), request_timeout=300)
+            raise_for_bulk_errors(response)
             logger.debug(
                 f"Batch {batch_number}: Successfully inserted {len(rows)} documents to Elasticsearch"
             )
@@ -178,9 +268,47 @@ class SubReportService(BaseService):
             logger.debug(f"Batch {batch_number}: Elasticsearch bulk insert failed: {e}")
             raise
 
-    def _migrate_data(self, sub_report_id: int) -> bool:
-        """Migrate data from SQL to Elasticsearch in batches without retry"""
+    def _delete_documents(self, index_name: str, document_ids: Iterable[str]) -> int:
+        """Delete documents by id in bulk batches; returns how many were requested"""
+        deleted = 0
+        batch: List[str] = []
+
+        def flush():
+            response = es_client.bulk(
+                body=[{"delete": {"_index": index_name, "_id": _id}} for _id in batch],
+                request_timeout=300,
+            )
+            raise_for_bulk_errors(response)
+
+        for _id in document_ids:
+            batch.append(_id)
+            if len(batch) >= self.batch_size:
+                flush()
+                deleted += len(batch)
+                batch = []
+        if batch:
+            flush()
+            deleted += len(batch)
+        return deleted
+
+    def _index_meta(self, index_name: str) -> Dict[str, Any]:
+        """``_meta`` of the index published for a sub-report; empty if there is none"""
+        try:
+            mapping = es_client.indices.get_mapping(index=index_name)
+            return mapping_for(mapping, index_name)["mappings"].get("_meta", {})
+        except Exception:
+            return {}
+
+    def _migrate_data(self, sub_report_id: int, full: bool = False) -> bool:
+        """
+        Publish a sub-report's rows to Elasticsearch. A republish only syncs
+        the rows changed since the last publish when it can; ``full`` forces
+        a rebuild into a new index version.
+        """
         with self._repository.session_factory() as session:
+            workflow = None
+            status = None
+            error_log = None
             try:
                 # Get sub_report to get index_name
                 sub_report = (
@@ -203,76 +331,42 @@ class SubReportService(BaseService):
                     )
                     return False
 
-                redis_key = make_report_redis_key(
-                    sub_report.report_configuration_id, sub_report_id, sub_report.config
+                db_query, count_query, field_types = self.get_query_and_field_types(
+                    session, sub_report
                 )
-                cached_result = redis_client.get(redis_key)
-                if cached_result is not None and isinstance(cached_result, bytes):
-                    cached_result = json.loads(cached_result.decode("utf-8"))
-
-                if (
-                    cached_result is not None
-                    and isinstance(cached_result, dict)
-                    and "db_query" in cached_result
-                    and "count_query" in cached_result
-                    and "field_types" in cached_result
-                ):
-                    db_query = cached_result["db_query"]
-                    count_query = cached_result["count_query"]
-                    field_types = cached_result["field_types"]
-                else:
-                    db_query, count_query, field_types = (
-                        self._build_query_and_extract_field_types(session, sub_report)
-                    )
-
-                self._create_index_with_mapping(sub_report.index_name, field_types)
+                sync_queries = self._build_sync_queries(session, sub_report)
 
                 # Start workflow
                 self._update_workflow_status(
                     session, workflow.id, WorkflowStatus.IN_PROGRESS
                 )
 
-                # Use existing count query from db_query
-                total_count = self._get_total_count_from_query(session, count_query)
-                if total_count == 0:
-                    self._update_workflow_status(
-                        session,
-                        workflow.id,
-                        WorkflowStatus.COMPLETED,
-                        log_entry="No records to migrate",
-                    )
-                    return True
-
-                total_batches = (total_count + self.batch_size - 1) // self.batch_size
-                logger.debug(
-                    f"Starting migration: {total_count} total records, {total_batches} batches of {self.batch_size}"
+                # The live index can be synced in place only if it was
+                # published from the same config and records a watermark
+                meta = (
+                    self._index_meta(sub_report.index_name)
+                    if sync_queries and not full
+                    else {}
                 )
-
-                error_log = None
-                status = None
-                for batch_number in range(1, total_batches + 1):
-                    offset = (batch_number - 1) * self.batch_size
-                    logger.debug(
-                        f"Processing batch {batch_number}/{total_batches} (offset: {offset})"
+                result = None
+                if (
+                    meta.get("watermark")
+                    and meta.get("config_hash") == sync_queries["config_hash"]
+                ):
+                    result = self._sync_index(
+                        session, sub_report, sync_queries, meta["watermark"]
                     )
-
-                    success = self._process_batch(
+                if result is None:
+                    result = self._rebuild_index(
                         session,
+                        sub_report,
+                        workflow.id,
                         db_query,
-                        sub_report.index_name,
-                        batch_number,
-                        offset,
+                        count_query,
+                        field_types,
+                        sync_queries,
                     )
-                    if not success:
-                        error_log = f"Batch {batch_number} failed"
-                        status = WorkflowStatus.FAILED
-                        break
-                    else:
-                        logger.debug(
-                            f"Batch {batch_number}/{total_batches} completed successfully"
-                        )
-                else:
-                    status = WorkflowStatus.COMPLETED
+                status, error_log = result
 
             except Exception as e:
                 logger.error(f"Migration failed for sub_report_id: {sub_report_id}")
@@ -280,15 +374,262 @@ class SubReportService(BaseService):
                 error_log = f"Migration error: {str(e)}"
 
             finally:
-                self._update_workflow_status(
-                    session,
-                    workflow.id,
-                    status,
-                    log_entry=error_log,
-                )
+                if workflow:
+                    self._update_workflow_status(
+                        session,
+                        workflow.id,
+                        status,
+                        log_entry=error_log,
+                    )
+                if status == WorkflowStatus.COMPLETED:
+                    # Exports of published sub-reports read the index, so
+                    # artifacts built before this publish are stale
+                    bump_namespace_sync(redis_client, REPORT_DATA_NAMESPACE)
                 return status == WorkflowStatus.COMPLETED
 
-    def publish_sub_report(self, sub_report_id: int) -> Dict[str, Any]:
+    def _rebuild_index(
+        self,
+        session: Session,
+        sub_report: SubReport,
+        workflow_id: int,
+        db_query: str,
+        count_query: str,
+        field_types: Dict[str, str],
+        sync_queries: Optional[Dict[str, Any]],
+    ) -> Tuple[WorkflowStatus, Optional[str]]:
+        """
+        Load the full query into a new index version, then publish it. The
+        query is split into key-range slices loaded by parallel workers when
+        its root table has integer ids, and run as one slice otherwise.
+        """
+        query, key_columns, meta = db_query, None, None
+        if sync_queries:
+            # Keyed documents, and a watermark taken before reading, so the
+            # next publish can sync incrementally from here
+            query = sync_queries["publish_query"]
+            key_columns = sync_queries["key_columns"]
+            meta = {
+                "config_hash": sync_queries["config_hash"],
+                "watermark": datetime.now(timezone.utc).isoformat(),
+            }
+
+        index_version = self._create_index_with_mapping(
+            sub_report.index_name, field_types, meta
+        )
+        try:
+            # The total is only used for progress reporting, so it is
+            # counted alongside the data queries rather than before them
+            total_count = self._count_in_background(count_query)
+            slices = self._plan_slices(session, sync_queries)
+            logger.debug(
+                f"Starting migration of sub-report {sub_report.id} in {len(slices)} slices"
+            )
+
+            migrated = [0]
+            progress_lock = threading.Lock()
+            stop = threading.Event()
+
+            def load_slice(params: Optional[Dict[str, int]]):
+                slice_query = sync_queries["slice_query"] if params else query
+
+                def send(batch: Tuple[int, Tuple[List[str], Sequence[Any]]]):
+                    batch_number, (columns, rows) = batch
+                    self._bulk_insert_to_elasticsearch(
+                        index_version, rows, columns, batch_number, key_columns
+                    )
+                    with progress_lock:
+                        migrated[0] += len(rows)
+
+                # Each worker reads on its own session; fetching the next
+                # batch overlaps sending the previous one to the cluster
+                with self._repository.session_factory() as slice_session:
+                    batches = self.stream_query(
+                        slice_session, slice_query, params=params
+                    )
+                    try:
+                        run_pipelined(
+                            enumerate(batches, start=1),
+                            send,
+                            depth=configs.SUB_REPORT_PUBLISH_QUEUE_DEPTH,
+                            stop=stop,
+                        )
+                    finally:
+                        batches.close()
+
+            with ThreadPoolExecutor(
+                max_workers=configs.SUB_REPORT_PUBLISH_WORKERS,
+                thread_name_prefix="sub-report-publish",
+            ) as executor:
+                pending = {executor.submit(load_slice, params) for params in slices}
+                try:
+                    while pending:
+                        done, pending = wait(
+                            pending,
+                            timeout=PROGRESS_INTERVAL_SECONDS,
+                            return_when=FIRST_EXCEPTION,
+                        )
+                        for future in done:
+                            future.result()
+                        total = (
+                            total_count.result()
+                            if total_count.done() and not total_count.exception()
+                            else "?"
+                        )
+                        # Written once per poll, so the workflow row is updated
+                        # at most every PROGRESS_INTERVAL_SECONDS
+                        self._update_workflow_status(
+                            session,
+                            workflow_id,
+                            WorkflowStatus.IN_PROGRESS,
+                            progress=f"{migrated[0]}/{total}",
+                        )
+                except Exception:
+                    stop.set()
+                    raise
+
+            # Readers move to the new version only once it is complete
+            publish_index_version(
+                es_client, sub_report.index_name, index_version, migrated[0]
+            )
+        except Exception:
+            discard_index_version(es_client, index_version)
+            raise
+
+        return (
+            WorkflowStatus.COMPLETED,
+            None if migrated[0] else "No records to migrate",
+        )
+
+    def _plan_slices(
+        self, session: Session, sync_queries: Optional[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, int]]]:
+        """Key-range parameters for ``slice_query``, or ``[None]`` to read the query whole"""
+        if not sync_queries or not sync_queries.get("bounds_query"):
+            return [None]
+        low, high = session.execute(text(sync_queries["bounds_query"])).one()
+        if low is None:
+            return [None]
+        slice_count = configs.SUB_REPORT_PUBLISH_WORKERS * SLICES_PER_WORKER
+        return [
+            {"slice_start": start, "slice_end": end}
+            for start, end in key_ranges(low, high + 1, slice_count)
+        ]
+
+    def _sync_index(
+        self,
+        session: Session,
+        sub_report: SubReport,
+        sync_queries: Dict[str, Any],
+        watermark: str,
+    ) -> Optional[Tuple[WorkflowStatus, Optional[str]]]:
+        """
+        Bring the live index up to date in place: upsert the rows whose source
+        rows changed since ``watermark``, index rows that appeared without a
+        change of their own, and delete documents the query no longer returns.
+
+        Returns None, having written nothing, when the rows to write or delete
+        are more than ``SUB_REPORT_SYNC_MAX_CHANGE_RATIO`` of the index. Rows
+        are upserted next to the live documents and stale ones deleted last,
+        so syncing e.g. re-inserted master rows, whose keys all change, would
+        show readers both copies and cost more than a rebuild.
+        """
+        index_name = sub_report.index_name
+        key_columns = sync_queries["key_columns"]
+        started_at = datetime.now(timezone.utc)
+        # updated_at columns hold naive UTC times
+        since = (datetime.fromisoformat(watermark) - WATERMARK_OVERLAP).replace(
+            tzinfo=None
+        )
+
+        # Diff the query's keys against the indexed ids: ids left over are
+        # stale, keys not indexed are missing
+        stale = {
+            hit["_id"]
+            for hit in scan(
+                es_client,
+                index=index_name,
+                query={"query": {"match_all": {}}, "_source": False},
+                size=5000,
+            )
+        }
+        indexed = len(stale)
+        missing: Set[str] = set()
+        batches = self.stream_query(session, sync_queries["keys_query"])
+        try:
+            for columns, rows in batches:
+                positions = key_positions(columns, key_columns)
+                for row in rows:
+                    _id = document_id(row, positions)
+                    if _id in stale:
+                        stale.discard(_id)
+                    else:
+                        missing.add(_id)
+        finally:
+            batches.close()
+
+        changed = session.execute(
+            text(sync_queries["changed_count_query"]), {"watermark": since}
+        ).scalar()
+        if changed + len(missing) + len(stale) > (
+            configs.SUB_REPORT_SYNC_MAX_CHANGE_RATIO * indexed
+        ):
+            logger.info(
+                f"Rebuilding {index_name} instead of syncing: {changed} changed, "
+                f"{len(missing)} added and {len(stale)} stale of {indexed} documents"
+            )
+            return None
+
+        upserted: Set[str] = set()
+        batches = self.stream_query(
+            session, sync_queries["changed_query"], params={"watermark": since}
+        )
+        try:
+            for batch_number, (columns, rows) in enumerate(batches, start=1):
+                self._bulk_insert_to_elasticsearch(
+                    index_name, rows, columns, batch_number, key_columns
+                )
+                positions = key_positions(columns, key_columns)
+                upserted.update(document_id(row, positions) for row in rows)
+        finally:
+            batches.close()
+
+        # Rows that changed after the diff are upserted, not stale
+        missing -= upserted
+        stale -= upserted
+        if missing:
+            # E.g. a joined row was hard-deleted, changing the key of rows
+            # that were not updated themselves
+            batches = self.stream_query(session, sync_queries["publish_query"])
+            try:
+                for batch_number, (columns, rows) in enumerate(batches, start=1):
+                    positions = key_positions(columns, key_columns)
+                    rows = [
+                        row for row in rows if document_id(row, positions) in missing
+                    ]
+                    if rows:
+                        self._bulk_insert_to_elasticsearch(
+                            index_name, rows, columns, batch_number, key_columns
+                        )
+            finally:
+                batches.close()
+
+        deleted = self._delete_documents(index_name, stale)
+        es_client.indices.refresh(index=index_name)
+        es_client.indices.put_mapping(
+            index=index_name,
+            meta={
+                "config_hash": sync_queries["config_hash"],
+                "watermark": started_at.isoformat(),
+            },
+        )
+        logger.info(
+            f"Synced {index_name}: {len(upserted)} changed, {len(missing)} added, {deleted} deleted"
+        )
+        return WorkflowStatus.COMPLETED, None
+
+    def publish_sub_report(
+        self, sub_report_id: int, full: bool = False
+    ) -> Dict[str, Any]:
         from src.tasks.sub_report_tasks import migrate_sub_report_data
 
         with self._repository.session_factory() as session:
@@ -319,7 +660,7 @@ class SubReportService(BaseService):
                     return {"message": "Sub-report migration is already in progress"}
 
                 workflow = self._create_workflow_record(session, sub_report_id)
-                migrate_sub_report_data.delay(sub_report_id)
+                migrate_sub_report_data.delay(sub_report_id, full)
 
                 return {"message": "Sub-report migration started successfully"}
 
@@ -339,41 +680,91 @@ class SubReportService(BaseService):
         session.commit()
         return workflow
 
-    def _build_query_and_extract_field_types(
+    def get_query_and_field_types(
         self, session: Session, sub_report: SubReport
     ) -> Tuple[str, str, Dict[str, str]]:
-        """Build SQLAlchemy query and extract field types from sub_report config"""
-        try:
-            # Validate the sub_report config
-            sub_report_config = sub_report.config
-            if not sub_report_config:
-                raise ValidationError(detail="Sub report config not present.")
+        """
+        Query and field types from the report query cache. On a miss exactly
+        one worker rebuilds and stores them while the others wait for it.
+        """
+        redis_key = versioned_key_sync(
+            redis_client,
+            REPORT_QUERY_CACHE_NAMESPACE,
+            make_report_redis_key(
+                sub_report.report_configuration_id, sub_report.id, sub_report.config
+            ),
+        )
 
-            SubReportConfigBaseSchema.model_validate(sub_report_config)
+        def load() -> Optional[Dict[str, Any]]:
+            cached_result = redis_codec.decode(redis_client.get(redis_key))
+            if (
+                isinstance(cached_result, dict)
+                and "db_query" in cached_result
+                and "count_query" in cached_result
+                and "field_types" in cached_result
+            ):
+                return cached_result
+            return None
 
-            # Build the SQLAlchemy query similar to reports service
-            filters = sub_report_config["filters"]
-            base, join_plan = resolve_join_chain(
-                sub_report_config["config"], sub_report_config.get("group_by", [])
+        def build() -> Dict[str, Any]:
+            db_query, count_query, field_types = (
+                self._build_query_and_extract_field_types(session, sub_report)
             )
-            stmt, count_stmt, data_type_map, formula_map = build_sqlalchemy_query(
-                session, sub_report_config, base, join_plan
+            result = {
+                "db_query": db_query,
+                "count_query": count_query,
+                "field_types": field_types,
+            }
+            redis_client.set(
+                redis_key, encode_cache_value(result), ex=REPORT_QUERY_CACHE_TTL
             )
+            return result
 
-            # Apply filters if they exist
-            if filters:
-                filter_expr = build_filter_condition(
-                    filters, data_type_map, formula_map
-                )
-                if filter_expr is not None:
-                    stmt = stmt.where(filter_expr)
-                    count_stmt = count_stmt.where(filter_expr)
+        result = single_flight_sync(redis_client, redis_key, load, build)
+        return result["db_query"], result["count_query"], result["field_types"]
 
-            # Compile the queries to strings
-            db_query = str(stmt.compile(compile_kwargs={"literal_binds": True}))
-            count_query = f"SELECT COUNT(*) FROM ({count_stmt.compile(compile_kwargs={'literal_binds': True})}) AS subquery"
+    def _report_plan(
+        self, session: Session, sub_report: SubReport
+    ) -> Tuple[CompiledReportPlan, Optional[Dict[str, Any]]]:
+        """The sub-report's compiled plan and its validated filters"""
+        sub_report_config = sub_report.config
+        if not sub_report_config:
+            raise ValidationError(detail="Sub report config not present.")
+
+        plan = get_report_plan(session, sub_report_config)
+        filters = sub_report_config.get("filters")
+        plan.validate_filters(filters)
+        return plan, filters
+
+    def _build_statements(
+        self, session: Session, sub_report: SubReport
+    ) -> Tuple[Select, Select, Dict[str, str]]:
+        """Filtered SQLAlchemy data and count statements of the sub-report"""
+        plan, filters = self._report_plan(session, sub_report)
+        stmt, count_stmt = plan.statements(filters)
+        return stmt, count_stmt, plan.data_type_map
 
-            return db_query, count_query, data_type_map
+    def _build_sync_queries(
+        self, session: Session, sub_report: SubReport
+    ) -> Optional[Dict[str, Any]]:
+        """Queries for keyed, incremental publishing; None if the sub-report's rows can't be keyed"""
+        try:
+            stmt, _, _ = self._build_statements(session, sub_report)
+            return build_sync_queries(stmt, sub_report.config)
+        except Exception as e:
+            logger.warning(
+                f"Sub-report {sub_report.id} can't be synced incrementally: {e}"
+            )
+            return None
+
+    def _build_query_and_extract_field_types(
+        self, session: Session, sub_report: SubReport
+    ) -> Tuple[str, str, Dict[str, str]]:
+        """Build SQLAlchemy query and extract field types from sub_report config"""
+        try:
+            plan, filters = self._report_plan(session, sub_report)
+            db_query, count_query = plan.compile_sql(filters)
+            return db_query, count_query, plan.data_type_map
 
         except Exception:
             logger.error("Error building query and extracting field types")
@@ -381,7 +772,7 @@ class SubReportService(BaseService):
 
     def validate_formula(self, formula: str) -> dict:
         try:
-            tree = LARK_PARSER.parse(formula)
+            tree = parse_formula(formula)
 
             visitor = FormulaFieldValidator()
             visitor.visit(tree)
@@ -15,6 +15,7 @@ from src.elasticsearch.constants import (
     TimeGranularity,
     get_field_display_name,
 )
+from src.elasticsearch.index_versions import mapping_for
 from src.elasticsearch.models import (
     ChartComponentFields,
     ChartConfig,
@@ -496,7 +497,7 @@ async def get_nested_fields(index_name: str) -> List[NestedFieldConfig]:
 
     # Get index mapping
     mapping = await es_service.client.indices.get_mapping(index=index_name)
-    properties = mapping[index_name]["mappings"]["properties"]
+    properties = mapping_for(mapping, index_name)["mappings"]["properties"]
 
     nested_fields = []
 
@@ -860,7 +861,7 @@ async def get_chart_config_data(
             from src.elasticsearch.service import es_service
 
             mapping = await es_service.client.indices.get_mapping(index=index_name)
-            fields_mapping = mapping[index_name]["mappings"]["properties"]
+            fields_mapping = mapping_for(mapping, index_name)["mappings"]["properties"]
 
             example_fields = {}
             for field_name, field_info in fields_mapping.items():
@@ -1,4 +1,4 @@
-from typing import Callable, List
+from typing import Any, Callable, Dict, Iterable, List
 
 from sqlalchemy.orm import Session
 
@@ -17,5 +17,10 @@ class WorkflowCrudService(BaseService):
     ) -> List[WorkflowProgressCreate]:
         return self.repository.bulk_add_workflow_progress(progress)
 
+    def bulk_insert_workflow_progress(
+        self, batches: Iterable[List[Dict[str, Any]]]
+    ) -> int:
+        return self.repository.bulk_insert_workflow_progress(batches)
+
     def is_folder_processed(self, processed_folder_id: str) -> bool:
         return self.repository.is_folder_processed(processed_folder_id)
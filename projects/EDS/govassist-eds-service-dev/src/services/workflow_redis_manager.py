@@ -1,4 +1,186 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
 from src.core.config import configs
+from src.schema.workflow_schema import FileProcessingInfo, LogLevel, WorkflowState
+
+# State hashes live as long as the workflow's logs and results
+WORKFLOW_STATE_TTL = 86400 * 7
+
+# Hash fields holding JSON lists rather than plain scalars
+WORKFLOW_JSON_FIELDS = {"error_messages", "output_files", "resumed_stages"}
+FILE_JSON_FIELDS = {"validation_errors", "validation_warnings", "error_messages"}
+
+
+def _field_adapters(model) -> Dict[str, TypeAdapter]:
+    return {
+        name: TypeAdapter(field.annotation)
+        for name, field in model.model_fields.items()
+    }
+
+
+# Give hash strings in published deltas the types snapshots have
+WORKFLOW_FIELD_ADAPTERS = _field_adapters(WorkflowState)
+FILE_FIELD_ADAPTERS = _field_adapters(FileProcessingInfo)
+
+# Applies one state event atomically: workflow fields, one file's fields, list
+# appends and derived counters. Finished workflows keep their status and so do
+# processed files. Fields set to the value they already hold don't count as
+# changes. An update that changes something bumps event_seq, so published
+# deltas can be ordered; one that changes nothing leaves it alone. Returns the
+# fields it changed, or nil if the workflow (or a required file) is gone.
+#
+# With ARGV[2] the same call also appends the given logs and, if something
+# changed, the state event (carrying the raw changes) to the workflow stream
+# and the shared events stream, so a progress step costs one round trip and is
+# applied all or nothing. Logs also go to the uncapped log stream, which keeps
+# them all until they are persisted.
+# Logs may name the updated file as FILE_NAME_PLACEHOLDER; it is filled in from
+# the file's state hash.
+#
+# KEYS[1]: workflow state hash, KEYS[2]: file state hash, KEYS[3]: file id set,
+# KEYS[4]: workflow stream, KEYS[5]: the workflow's shard of the events stream,
+# KEYS[6]: workflow log stream
+# ARGV[1]: JSON {workflow, file, append, file_id, ttl, now, track_counts, require_file}
+# ARGV[2]: optional JSON {event, logs, stream_maxlen, events_maxlen}
+UPDATE_WORKFLOW_STATE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return false
+end
+
+local update = cjson.decode(ARGV[1])
+local workflow_fields = update["workflow"]
+local file_fields = update["file"]
+local append = update["append"]
+local file_id = update["file_id"]
+local changed = {}
+local file_changed = {}
+local final_status = {completed = true, cancelled = true}
+
+local status = workflow_fields["status"]
+if status then
+    local current = redis.call("HGET", KEYS[1], "status")
+    if current and final_status[current] and status ~= current then
+        workflow_fields["status"] = nil
+    else
+        if status == "downloading" and redis.call("HEXISTS", KEYS[1], "started_at") == 0 then
+            workflow_fields["started_at"] = update["now"]
+        end
+        if (final_status[status] or status == "failed") and not workflow_fields["completed_at"] then
+            workflow_fields["completed_at"] = update["now"]
+        end
+    end
+end
+
+for field, value in pairs(workflow_fields) do
+    if redis.call("HGET", KEYS[1], field) ~= value then
+        redis.call("HSET", KEYS[1], field, value)
+        changed[field] = value
+    end
+end
+
+if file_id ~= "" then
+    if update["require_file"] and redis.call("SISMEMBER", KEYS[3], file_id) == 0 then
+        return false
+    end
+
+    local previous = redis.call("HGET", KEYS[2], "status")
+    local file_status = file_fields["status"]
+    if file_status and previous == "processed" and file_status ~= previous then
+        file_fields["status"] = nil
+        file_status = nil
+    end
+
+    if redis.call("HEXISTS", KEYS[2], "file_id") == 0 then
+        file_fields["file_id"] = file_id
+    end
+    for field, value in pairs(file_fields) do
+        if redis.call("HGET", KEYS[2], field) ~= value then
+            redis.call("HSET", KEYS[2], field, value)
+            file_changed[field] = value
+        end
+    end
+    for field, values in pairs(append) do
+        local existing = redis.call("HGET", KEYS[2], field)
+        local items = existing and cjson.decode(existing) or {}
+        for _, value in ipairs(values) do
+            table.insert(items, value)
+        end
+        local encoded = cjson.encode(items)
+        redis.call("HSET", KEYS[2], field, encoded)
+        file_changed[field] = encoded
+    end
+    redis.call("SADD", KEYS[3], file_id)
+    redis.call("EXPIRE", KEYS[2], update["ttl"])
+
+    if update["track_counts"] and file_status and file_status ~= previous then
+        local was_done = previous == "processed" or previous == "failed"
+        local is_done = file_status == "processed" or file_status == "failed"
+        if is_done ~= was_done then
+            changed["files_processed"] = redis.call("HINCRBY", KEYS[1], "files_processed", is_done and 1 or -1)
+        end
+        if (file_status == "failed") ~= (previous == "failed") then
+            changed["files_failed"] = redis.call("HINCRBY", KEYS[1], "files_failed", file_status == "failed" and 1 or -1)
+        end
+        local total = tonumber(redis.call("HGET", KEYS[1], "total_files") or "0")
+        if changed["files_processed"] and total > 0 then
+            local progress = tostring(changed["files_processed"] / total * 100)
+            redis.call("HSET", KEYS[1], "progress_percentage", progress)
+            changed["progress_percentage"] = progress
+        end
+    end
+end
+
+local has_changes = next(changed) ~= nil or next(file_changed) ~= nil
+if has_changes then
+    changed["event_seq"] = redis.call("HINCRBY", KEYS[1], "event_seq", 1)
+end
+if file_id ~= "" then
+    local file_name = redis.call("HGET", KEYS[2], "file_name")
+    if file_name then
+        file_changed["file_name"] = file_name
+    end
+end
+redis.call("EXPIRE", KEYS[1], update["ttl"])
+redis.call("EXPIRE", KEYS[3], update["ttl"])
+local result = cjson.encode({workflow = changed, file = file_changed, file_id = file_id})
+
+if ARGV[2] then
+    local emit = cjson.decode(ARGV[2])
+    local file_name = file_changed["file_name"] or file_id
+    local escaped = string.gsub(string.sub(cjson.encode(file_name), 2, -2), "%%", "%%%%")
+    for _, log in ipairs(emit["logs"]) do
+        log = string.gsub(log, "{file_name}", escaped)
+        redis.call("XADD", KEYS[4], "MAXLEN", "~", emit["stream_maxlen"], "*", "kind", "log", "data", log)
+        redis.call("XADD", KEYS[6], "*", "kind", "log", "data", log)
+    end
+    if #emit["logs"] > 0 then
+        redis.call("EXPIRE", KEYS[6], update["ttl"])
+    end
+    if has_changes then
+        redis.call("XADD", KEYS[4], "MAXLEN", "~", emit["stream_maxlen"], "*", "kind", "event", "data", emit["event"], "changes", result)
+        redis.call("XADD", KEYS[5], "MAXLEN", "~", emit["events_maxlen"], "*", "event", emit["event"], "changes", result)
+    end
+    redis.call("EXPIRE", KEYS[4], update["ttl"])
+end
+
+return result
+"""
+
+# Stands in for the file name in logs emitted by UPDATE_WORKFLOW_STATE_SCRIPT
+FILE_NAME_PLACEHOLDER = "{file_name}"
+
+
+def workflow_events_shard(workflow_id: str) -> int:
+    """Events stream shard of a workflow; all of its events go to the same one"""
+    return (
+        zlib.crc32(workflow_id.encode("utf-8")) % configs.WORKFLOW_EVENTS_STREAM_SHARDS
+    )
 
 
 class WorkflowRedisSchema:
@@ -16,16 +198,47 @@ class WorkflowRedisSchema:
 
     # Workflow state keys
     def workflow_state_key(self, workflow_id: str) -> str:
-        """Main workflow state storage"""
-        return self._build_key("workflow", "state", workflow_id)
+        """Main workflow state storage (hash)"""
+        # Not "state": that name held the state as a JSON string before
+        return self._build_key("workflow", "state_fields", workflow_id)
+
+    def workflow_stream_key(self, workflow_id: str) -> str:
+        """Workflow logs and events (capped stream)"""
+        return self._build_key("workflow", "stream", workflow_id)
 
     def workflow_logs_key(self, workflow_id: str) -> str:
-        """Workflow logs (list)"""
-        return self._build_key("workflow", "logs", workflow_id)
+        """All of a workflow's logs until they are persisted (uncapped stream)"""
+        # Not "logs": that name held the logs as a list before
+        return self._build_key("workflow", "log_stream", workflow_id)
 
     def workflow_files_key(self, workflow_id: str) -> str:
-        """Individual file processing states (hash)"""
-        return self._build_key("workflow", "files", workflow_id)
+        """Ids of the files tracked by a workflow (set)"""
+        # Not "files": that name held a hash of file states before
+        return self._build_key("workflow", "file_ids", workflow_id)
+
+    def workflow_file_key(self, workflow_id: str, file_id: str) -> str:
+        """Individual file processing state (hash)"""
+        return self._build_key("workflow", "file", workflow_id, file_id)
+
+    def workflow_checkpoint_key(self, workflow_id: str) -> str:
+        """Completed stage checkpoints (hash of stage -> artifacts)"""
+        return self._build_key("workflow", "checkpoint", workflow_id)
+
+    def workflow_events_stream_key(self, workflow_id: str) -> str:
+        """Shard of the workflow update events stream that holds this workflow's events"""
+        return self.workflow_events_shard_key(workflow_events_shard(workflow_id))
+
+    def workflow_events_shard_key(self, shard: int) -> str:
+        """One shard of the workflow update events (stream, read by a consumer group)"""
+        return self._build_key("workflow", "events", str(shard))
+
+    def workflow_events_lease_key(self, shard: int) -> str:
+        """Consumer currently reading an events shard (string with TTL)"""
+        return self._build_key("workflow", "events_lease", str(shard))
+
+    def workflow_events_consumers_key(self) -> str:
+        """Live events consumers by last heartbeat (sorted set)"""
+        return self._build_key("workflow", "events_consumers")
 
     # Cache keys
     def folder_last_processing_key(
@@ -43,3 +256,306 @@ class WorkflowRedisSchema:
     def workflow_status_key(self, folder_id: str) -> str:
         """Workflow status"""
         return self._build_key("workflow", "status", folder_id)
+
+
+def build_workflow_event(
+    workflow_id: str,
+    status: str,
+    data: Dict[str, Any],
+    seq: Optional[int] = None,
+    event_type: str = "delta",
+) -> Dict[str, Any]:
+    """Event appended to the workflow events stream for one state change"""
+    return {
+        "workflow_id": workflow_id,
+        "status": status,
+        "type": event_type,
+        "seq": seq,
+        "data": data,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def build_log_entry(
+    workflow_db_id: int,
+    level: LogLevel,
+    message: str,
+    file_name: Optional[str] = None,
+    step: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Log entry as stored in the workflow stream and later in EdsWorkflowProgress"""
+    entry = {
+        "workflow_id": workflow_db_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "level": level.value,
+        "message": message,
+        "file_name": file_name,
+        "step": step,
+    }
+    if details:
+        entry["details"] = details
+    return entry
+
+
+class WorkflowStream:
+    """
+    One capped Redis Stream per workflow holding its logs and state events in
+    order. Entries are ``{kind, data}`` with ``kind`` either "log" or "event";
+    stream ids double as cursors for incremental reads.
+
+    Events can push old logs out of that stream, so logs are also appended to
+    an uncapped log stream of the same shape. That one is read for the log API
+    and persisted to the database when the workflow finishes.
+    """
+
+    LOG = "log"
+    EVENT = "event"
+
+    @staticmethod
+    def queue(
+        pipe,
+        schema: "WorkflowRedisSchema",
+        workflow_id: str,
+        logs: Optional[List[Dict[str, Any]]] = None,
+        event: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Queue the XADDs for some logs and/or an event on a pipeline (sync or
+        async). The event is also added to the workflow's shard of the events
+        stream that the Socket.IO consumers read.
+        """
+        stream_key = schema.workflow_stream_key(workflow_id)
+        logs_key = schema.workflow_logs_key(workflow_id)
+        for log in logs or []:
+            fields = {"kind": WorkflowStream.LOG, "data": json.dumps(log, default=str)}
+            pipe.xadd(
+                stream_key,
+                fields,
+                maxlen=configs.WORKFLOW_STREAM_MAXLEN,
+                approximate=True,
+            )
+            pipe.xadd(logs_key, fields)
+        if logs:
+            pipe.expire(logs_key, WORKFLOW_STATE_TTL)
+        if event is not None:
+            data = json.dumps(event, default=str)
+            pipe.xadd(
+                stream_key,
+                {"kind": WorkflowStream.EVENT, "data": data},
+                maxlen=configs.WORKFLOW_STREAM_MAXLEN,
+                approximate=True,
+            )
+            pipe.xadd(
+                schema.workflow_events_stream_key(workflow_id),
+                {"event": data},
+                maxlen=configs.WORKFLOW_EVENTS_STREAM_MAXLEN,
+                approximate=True,
+            )
+        pipe.expire(stream_key, WORKFLOW_STATE_TTL)
+
+    @staticmethod
+    def decode(entries: List[Tuple[Any, Dict[Any, Any]]]) -> List[Dict[str, Any]]:
+        """Turn XRANGE results into ``{id, kind, data}`` dicts"""
+        decoded = []
+        for entry_id, fields in entries:
+            fields = {
+                (key.decode("utf-8") if isinstance(key, bytes) else key): value
+                for key, value in fields.items()
+            }
+            kind = fields.get("kind")
+            if isinstance(kind, bytes):
+                kind = kind.decode("utf-8")
+            decoded.append(
+                {
+                    "id": (
+                        entry_id.decode("utf-8")
+                        if isinstance(entry_id, bytes)
+                        else entry_id
+                    ),
+                    "kind": kind,
+                    "data": (
+                        WorkflowStream.load_event(fields["data"], fields.get("changes"))
+                        if kind == WorkflowStream.EVENT
+                        else json.loads(fields["data"])
+                    ),
+                }
+            )
+        return decoded
+
+    @staticmethod
+    def load_event(event: Any, changes: Any = None) -> Dict[str, Any]:
+        """
+        Decode a stored event. Events appended by UPDATE_WORKFLOW_STATE_SCRIPT
+        keep their changes in the script's raw form next to the envelope.
+        """
+        event = json.loads(event)
+        if changes is not None:
+            data = WorkflowStateCodec.decode_changes(changes) or {}
+            event["seq"] = data.pop("event_seq", None)
+            event["data"] = data
+        return event
+
+    @staticmethod
+    def emit_arg(
+        workflow_id: str,
+        status: str,
+        logs: Optional[List[Dict[str, Any]]] = None,
+        event_type: str = "delta",
+    ) -> str:
+        """ARGV[2] for UPDATE_WORKFLOW_STATE_SCRIPT: the event and logs to append with the update"""
+        return json.dumps(
+            {
+                "event": json.dumps(
+                    build_workflow_event(workflow_id, status, {}, None, event_type),
+                    default=str,
+                ),
+                "logs": [json.dumps(log, default=str) for log in logs or []],
+                "stream_maxlen": configs.WORKFLOW_STREAM_MAXLEN,
+                "events_maxlen": configs.WORKFLOW_EVENTS_STREAM_MAXLEN,
+            }
+        )
+
+    @staticmethod
+    def range_start(cursor: Optional[str]) -> str:
+        """XRANGE start for entries after ``cursor`` (exclusive), or from the beginning"""
+        return f"({cursor}" if cursor else "-"
+
+
+class WorkflowStateCodec:
+    """
+    Maps WorkflowState to Redis hashes: one hash of scalar fields per workflow
+    and one hash per file, so an event only touches the fields it changes.
+    """
+
+    @staticmethod
+    def encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+        """Encode model fields as hash values, dropping unset (None) ones"""
+        encoded = {}
+        for key, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, dict)):
+                encoded[key] = json.dumps(value, default=str)
+            elif isinstance(value, Enum):
+                encoded[key] = str(value.value)
+            elif isinstance(value, datetime):
+                encoded[key] = value.isoformat()
+            else:
+                encoded[key] = str(value)
+        return encoded
+
+    @staticmethod
+    def decode_fields(fields: Dict[Any, Any], json_fields: set) -> Dict[str, Any]:
+        """Decode hash values back into model fields"""
+        decoded = {}
+        for key, value in fields.items():
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            if isinstance(value, bytes):
+                value = value.decode("utf-8")
+            decoded[key] = json.loads(value) if key in json_fields else value
+        return decoded
+
+    @staticmethod
+    def coerce_fields(
+        fields: Dict[str, Any], adapters: Dict[str, TypeAdapter]
+    ) -> Dict[str, Any]:
+        """Give decoded hash values their model field types, in JSON form"""
+        coerced = {}
+        for key, value in fields.items():
+            adapter = adapters.get(key)
+            try:
+                coerced[key] = (
+                    adapter.dump_python(adapter.validate_python(value), mode="json")
+                    if adapter
+                    else value
+                )
+            except ValidationError:
+                coerced[key] = value
+        return coerced
+
+    @classmethod
+    def update_args(
+        cls,
+        schema: WorkflowRedisSchema,
+        workflow_id: str,
+        workflow_fields: Dict[str, Any],
+        file_id: Optional[str] = None,
+        file_fields: Optional[Dict[str, Any]] = None,
+        append: Optional[Dict[str, List[Any]]] = None,
+        track_counts: bool = False,
+        require_file: bool = False,
+    ) -> Tuple[List[str], List[str]]:
+        """Keys and args for UPDATE_WORKFLOW_STATE_SCRIPT"""
+        keys = [
+            schema.workflow_state_key(workflow_id),
+            schema.workflow_file_key(workflow_id, file_id or "_"),
+            schema.workflow_files_key(workflow_id),
+            schema.workflow_stream_key(workflow_id),
+            schema.workflow_events_stream_key(workflow_id),
+            schema.workflow_logs_key(workflow_id),
+        ]
+        update = {
+            "workflow": cls.encode_fields(workflow_fields),
+            "file": cls.encode_fields(file_fields or {}),
+            "append": {key: values for key, values in (append or {}).items() if values},
+            "file_id": file_id or "",
+            "ttl": WORKFLOW_STATE_TTL,
+            "now": datetime.now(timezone.utc).isoformat(),
+            "track_counts": track_counts,
+            "require_file": require_file,
+        }
+        return keys, [json.dumps(update, default=str)]
+
+    @classmethod
+    def decode_changes(cls, result: Any) -> Optional[Dict[str, Any]]:
+        """Turn the script result into a partial WorkflowState dict"""
+        if not result:
+            return None
+        if isinstance(result, bytes):
+            result = result.decode("utf-8")
+        changes = json.loads(result)
+        state = cls.coerce_fields(
+            cls.decode_fields(changes.get("workflow") or {}, WORKFLOW_JSON_FIELDS),
+            WORKFLOW_FIELD_ADAPTERS,
+        )
+        if changes.get("file_id"):
+            state["files"] = {
+                changes["file_id"]: cls.coerce_fields(
+                    cls.decode_fields(changes.get("file") or {}, FILE_JSON_FIELDS),
+                    FILE_FIELD_ADAPTERS,
+                )
+            }
+        return state
+
+    @classmethod
+    def workflow_mapping(
+        cls, workflow: WorkflowState
+    ) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+        """Hash mappings for a new workflow and each of its files"""
+        workflow_fields = cls.encode_fields(workflow.model_dump(exclude={"files"}))
+        file_fields = {
+            file_id: cls.encode_fields(file_info.model_dump())
+            for file_id, file_info in workflow.files.items()
+        }
+        return workflow_fields, file_fields
+
+    @classmethod
+    def assemble(
+        cls, workflow_hash: Dict[Any, Any], file_hashes: List[Dict[Any, Any]]
+    ) -> Optional[WorkflowState]:
+        """Build the full WorkflowState from its workflow and file hashes"""
+        if not workflow_hash:
+            return None
+        state = cls.decode_fields(workflow_hash, WORKFLOW_JSON_FIELDS)
+        files = {}
+        for file_hash in file_hashes:
+            if not file_hash:
+                continue
+            file_info = FileProcessingInfo.model_validate(
+                cls.decode_fields(file_hash, FILE_JSON_FIELDS)
+            )
+            files[file_info.file_id] = file_info
+        state["files"] = files
+        return WorkflowState.model_validate(state)
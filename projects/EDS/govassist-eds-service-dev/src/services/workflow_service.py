@@ -3,14 +3,14 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Type, Union, Set
+from typing import Any, Dict, List, Set, Tuple, Type, Union
 import tempfile
 import pandas as pd
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 from loguru import logger
 from pydantic import BaseModel, ValidationError
 
-from src.repository.workflow_repository import WorkflowRepository
+from src.repository.workflow_repository import BaseRepository, WorkflowRepository
 from src.schema.workflow_master_data_schema import (
     WorkflowAccountSchema,
     WorkflowAwardSchema,
@@ -48,6 +48,70 @@ class ValidationResult:
     validation_errors: List[str]
 
 
+def map_ids(mapping: Dict[Any, int], keys: Union[pd.Series, pd.DataFrame]) -> pd.Series:
+    """
+    Resolve a column of keys (or a frame of composite key columns) to ids in
+    one vectorized lookup. Unknown keys resolve to None.
+    """
+    if not mapping:
+        return pd.Series([None] * len(keys), index=keys.index, dtype=object)
+
+    if isinstance(keys, pd.DataFrame):
+        lookup = pd.Series(mapping, dtype=object)
+        ids = lookup.reindex(pd.MultiIndex.from_frame(keys))
+        ids.index = keys.index
+    else:
+        ids = keys.map(mapping)
+
+    ids = ids.astype("Int64").astype(object)
+    return ids.where(ids.notna(), None)
+
+
+class DimensionCache:
+    """
+    Natural key to id lookups shared by every phase of one migration.
+
+    Each table is read from the database at most once, then kept current from
+    the ids returned by the rows this migration writes, so later phases never
+    reload a table an earlier phase just loaded.
+    """
+
+    def __init__(self):
+        self._mappings: Dict[Type, Dict[Any, int]] = {}
+
+    @staticmethod
+    def _key(repository: BaseRepository, key: Tuple) -> Any:
+        # Single column natural keys are stored unwrapped (e.g. by "number")
+        return key[0] if len(repository.natural_key) == 1 else key
+
+    def mapping(self, repository: BaseRepository) -> Dict[Any, int]:
+        """Natural key -> id for a table, loaded on first use"""
+        if repository.model_class not in self._mappings:
+            self._mappings[repository.model_class] = {
+                self._key(repository, key): row_id
+                for key, row_id in repository.get_natural_key_mapping().items()
+                if key[0] is not None
+            }
+        return self._mappings[repository.model_class]
+
+    def update(self, repository: BaseRepository, ids: Dict[Tuple, int]):
+        """Add inserted rows to an already cached table"""
+        mapping = self.mapping(repository)
+        mapping.update({self._key(repository, key): row_id for key, row_id in ids.items()})
+
+    def replace(self, repository: BaseRepository, ids: Dict[Tuple, int]):
+        """Replace a table's mapping with exactly the given rows"""
+        self._mappings[repository.model_class] = {
+            self._key(repository, key): row_id for key, row_id in ids.items()
+        }
+
+    def resolve(
+        self, repository: BaseRepository, keys: Union[pd.Series, pd.DataFrame]
+    ) -> pd.Series:
+        """Resolve natural keys to ids for a whole column or frame"""
+        return map_ids(self.mapping(repository), keys)
+
+
 class ExcelDataMigrationService:
     """Main service for Excel data migration"""
 
@@ -67,11 +131,33 @@ class ExcelDataMigrationService:
         # Store the empty structure file path
         self.empty_structure_file_path = None
 
+        # Id lookups shared across phases of a migration
+        self.dimensions = DimensionCache()
+
+        # Delta load state (see migrate_excel_file)
+        self.delta = False
+        self._delta_failed = False
+        self._stale_ids: Dict[Type, List[int]] = {}
+
     def migrate_excel_file(
-        self, file_path: Union[str, Path], clear_existing: bool = True
+        self,
+        file_path: Union[str, Path],
+        clear_existing: bool = True,
+        delta: bool = False,
     ):
-        """Main method to migrate entire Excel file"""
+        """
+        Main method to migrate entire Excel file
+
+        With ``delta=True`` existing tables are kept in place: each row is
+        fingerprinted by natural key and content hash, only inserts, updates
+        and deletes are applied, and all of them commit in one transaction.
+        ``clear_existing`` is ignored in delta mode.
+        """
         start_time = datetime.utcnow()
+        self.dimensions = DimensionCache()
+        self.delta = delta
+        self._delta_failed = False
+        self._stale_ids = {}
         try:
             logger.info("Starting Excel migration")
 
@@ -81,7 +167,9 @@ class ExcelDataMigrationService:
                 raise FileNotFoundError("Excel file not found")
 
             # Clear existing data if requested
-            if clear_existing:
+            if delta:
+                logger.info("Delta migration: existing data is kept in place")
+            elif clear_existing:
                 deletion_counts = self.repository.clear_all_data()
                 logger.info(f"Cleared existing data: {deletion_counts}")
 
@@ -109,6 +197,9 @@ class ExcelDataMigrationService:
                 excel_file, awards_by_number_map
             )
 
+            if delta:
+                self._finalize_delta()
+
             # Calculate totals
             total_records = sum(result.total_records for result in results.values())
             inserted_records = sum(
@@ -136,6 +227,8 @@ class ExcelDataMigrationService:
             )
 
         except Exception as e:
+            if delta:
+                self.repository.rollback()
             duration = (datetime.utcnow() - start_time).total_seconds()
             logger.error("Migration failed")
             return MigrationResult(
@@ -253,9 +346,6 @@ class ExcelDataMigrationService:
         try:
             # Validate data
             validation_result = self._validate_records(records, schema_class)
-            # # Store invalid records in a file
-            # if validation_result.invalid_records:
-            #     self.store_invalid_records(validation_result.invalid_records, sheet_name, self.empty_structure_file_path)
 
             logger.info(f"valid_records: {len(validation_result.valid_records)}")
             logger.info(f"invalid_records: {len(validation_result.invalid_records)}")
@@ -272,23 +362,22 @@ class ExcelDataMigrationService:
                     details={"segment": segment_name},
                 )
             logger.info(f"valid_records: {len(validation_result.valid_records)}")
-            # Convert to model instances
-            model_instances = []
+            # Convert to model rows
+            rows = []
             for record in validation_result.valid_records:
                 try:
                     schema_obj = schema_class.model_validate(
                         record, from_attributes=False
                     )
-                    model_instance = repository.model_class(**schema_obj.model_dump())
-                    model_instances.append(model_instance)
+                    rows.append(schema_obj.model_dump())
                 except Exception as e:
                     logger.error(
                         f"Model conversion failed for {segment_name}: {str(e)}"
                     )
 
             # Bulk insert
-            logger.info(f"Model instances: {len(model_instances)}")
-            inserted_count = repository.bulk_insert(model_instances)
+            logger.info(f"Model instances: {len(rows)}")
+            inserted_count = self._load_records(repository, rows)
             logger.info(f"Inserted count: {inserted_count}")
             duration = (datetime.utcnow() - start_time).total_seconds()
 
@@ -544,15 +633,14 @@ class ExcelDataMigrationService:
             # Validate
             validation_result = self._validate_records(data, schema_class)
 
-            # Convert to models
-            model_instances = []
-            for record in validation_result.valid_records:
-                schema_obj = schema_class.model_validate(record, from_attributes=False)
-                model_instance = repository.model_class(**schema_obj.model_dump())
-                model_instances.append(model_instance)
+            # Convert to model rows
+            rows = [
+                schema_class.model_validate(record, from_attributes=False).model_dump()
+                for record in validation_result.valid_records
+            ]
 
             # Insert
-            inserted_count = repository.bulk_insert(model_instances)
+            inserted_count = self._load_records(repository, rows)
             duration = (datetime.utcnow() - start_time).total_seconds()
 
             return MigrationResult(
@@ -577,6 +665,38 @@ class ExcelDataMigrationService:
                 details={},
             )
 
+    def _load_records(self, repository, rows: List[Dict]) -> int:
+        """Insert rows, or apply them as a delta against the current table"""
+        if not self.delta:
+            returned = repository.bulk_load_returning(
+                rows, ("id", *repository.natural_key)
+            )
+            self.dimensions.update(
+                repository, {tuple(row[1:]): row[0] for row in returned}
+            )
+            return len(returned)
+
+        try:
+            result = repository.apply_delta(rows)
+        except Exception:
+            # Any failed table aborts the whole delta transaction
+            self._delta_failed = True
+            raise
+        self._stale_ids[repository.model_class] = result.stale_ids
+        # Stale rows are deleted at the end, so they must not resolve as parents
+        self.dimensions.replace(repository, result.ids)
+        return result.inserted + result.updated
+
+    def _finalize_delta(self):
+        """Delete stale rows and commit the delta, or roll it back on failure"""
+        if self._delta_failed:
+            self.repository.rollback()
+            raise RuntimeError("Delta migration aborted, no changes were applied")
+
+        deletion_counts = self.repository.delete_stale_records(self._stale_ids)
+        self.repository.commit()
+        logger.info(f"Delta migration committed. Deleted stale records: {deletion_counts}")
+
     def _extract_hierarchical_data(self, df: pd.DataFrame):
         """Extract hierarchical data structures from dataframe"""
         df = df.replace({pd.NA: None})
@@ -702,35 +822,39 @@ class ExcelDataMigrationService:
 
     def _resolve_project_relationships(self, projects: Dict):
         """Resolve foreign key relationships for projects"""
-        # Get ID mappings
-        program_mapping = self.repository.programs.get_id_mapping()
-        cost_center_mapping = self.repository.cost_centers.get_id_mapping()
-        sponsor_mapping = self.repository.sponsors.get_id_mapping()
+        if not projects:
+            return
 
-        for project_data in projects.values():
-            project_data["program_id"] = program_mapping.get(
-                project_data.get("program_id")
-            )
-            project_data["cost_center_id"] = cost_center_mapping.get(
-                project_data.get("cost_center_id")
-            )
-            project_data["sponsor_id"] = sponsor_mapping.get(
-                project_data.get("sponsor_id")
-            )
+        frame = pd.DataFrame(
+            list(projects.values()), columns=["program_id", "cost_center_id", "sponsor_id"]
+        )
+        program_ids = self.dimensions.resolve(self.repository.programs, frame["program_id"])
+        cost_center_ids = self.dimensions.resolve(
+            self.repository.cost_centers, frame["cost_center_id"]
+        )
+        sponsor_ids = self.dimensions.resolve(self.repository.sponsors, frame["sponsor_id"])
+
+        for project_data, program_id, cost_center_id, sponsor_id in zip(
+            projects.values(), program_ids, cost_center_ids, sponsor_ids, strict=True
+        ):
+            project_data["program_id"] = program_id
+            project_data["cost_center_id"] = cost_center_id
+            project_data["sponsor_id"] = sponsor_id
 
     def _update_project_context(self):
         """Update context with project ID mappings"""
-        project_id_by_number = {}
-        project_mapping = self.repository.projects.get_id_mapping()
-        for number, project_id in project_mapping.items():
-            project_id_by_number[project_id] = number
-        return project_id_by_number
+        project_mapping = self.dimensions.mapping(self.repository.projects)
+        return {project_id: number for number, project_id in project_mapping.items()}
 
     def _resolve_parent_task_relationships(self, parent_tasks: Dict):
         """Resolve parent task relationships"""
-        project_mapping = self.repository.projects.get_id_mapping()
-        for task_data in parent_tasks.values():
-            task_data["project_id"] = project_mapping.get(task_data.get("project_id"))
+        if not parent_tasks:
+            return
+
+        project_numbers = pd.Series([task["project_id"] for task in parent_tasks.values()])
+        project_ids = self.dimensions.resolve(self.repository.projects, project_numbers)
+        for task_data, project_id in zip(parent_tasks.values(), project_ids, strict=True):
+            task_data["project_id"] = project_id
 
     def _enrich_subtasks_with_financial_data(self, df: pd.DataFrame, sub_tasks: Dict):
         """Enrich sub tasks with financial summary data"""
@@ -776,24 +900,36 @@ class ExcelDataMigrationService:
         """Resolve sub task relationships"""
 
         # Get ID mappings
-        awards_by_number_map = {}
-        fund_mapping = self.repository.funds.get_id_mapping()
-        award_mapping = self.repository.awards.get_id_mapping()
-        awards_by_number_map.update(award_mapping)
-
-        # Get parent task mapping
-        parent_task_mapping = self.repository.get_parent_task_mapping(
-            project_id_by_number
+        awards_by_number_map = dict(self.dimensions.mapping(self.repository.awards))
+        if not sub_tasks:
+            return [], sub_tasks, project_id_by_number, awards_by_number_map
+
+        # Parent tasks are keyed by (project number, parent task number)
+        frame = pd.DataFrame(
+            [
+                (*sub_task_data["parent_task_id"], sub_task_data["fund_id"], sub_task_data["award_id"])
+                for sub_task_data in sub_tasks.values()
+            ],
+            columns=["project_number", "parent_task_number", "fund_number", "award_number"],
+        )
+        project_ids = self.dimensions.resolve(
+            self.repository.projects, frame["project_number"]
         )
+        parent_task_ids = self.dimensions.resolve(
+            self.repository.parent_tasks,
+            pd.DataFrame(
+                {"project_id": project_ids, "number": frame["parent_task_number"]}
+            ),
+        )
+        fund_ids = self.dimensions.resolve(self.repository.funds, frame["fund_number"])
+        award_ids = map_ids(awards_by_number_map, frame["award_number"])
 
         # Insert sub tasks
         sub_tasks_to_insert = []
-        for _, sub_task_data in sub_tasks.items():
-            parent_task_id = parent_task_mapping.get(sub_task_data["parent_task_id"])
+        for sub_task_data, parent_task_id, fund_id, award_id in zip(
+            sub_tasks.values(), parent_task_ids, fund_ids, award_ids, strict=True
+        ):
             if parent_task_id is not None:
-                fund_id = fund_mapping.get(sub_task_data["fund_id"])
-                award_id = awards_by_number_map.get(sub_task_data["award_id"])
-
                 # TODO: Uncomment this when we have a way to handle non-existent fund_id and award_id
                 # if fund_id is None:
                 #     logger.error(f"non-existent fund_id: {sub_task_data}")
@@ -812,38 +948,71 @@ class ExcelDataMigrationService:
             awards_by_number_map,
         )
 
+    def _get_sub_task_by_project_award_map(self) -> Dict[Tuple, int]:
+        """Sub task ids keyed by (project number, sub task number, award number)"""
+        project_number_by_id = {
+            project_id: number
+            for number, project_id in self.dimensions.mapping(self.repository.projects).items()
+        }
+        project_id_by_parent_task = {
+            parent_task_id: project_id
+            for (project_id, _), parent_task_id in self.dimensions.mapping(
+                self.repository.parent_tasks
+            ).items()
+        }
+        award_number_by_id = {
+            award_id: number
+            for number, award_id in self.dimensions.mapping(self.repository.awards).items()
+        }
+
+        sub_task_map = {}
+        for (parent_task_id, number, _, award_id), sub_task_id in self.dimensions.mapping(
+            self.repository.sub_tasks
+        ).items():
+            project_id = project_id_by_parent_task.get(parent_task_id)
+            if project_id is None or award_id not in award_number_by_id:
+                continue
+            key = (project_number_by_id.get(project_id), number, award_number_by_id[award_id])
+            sub_task_map[key] = sub_task_id
+        return sub_task_map
+
     def _build_transaction_data(
         self, df: pd.DataFrame, awards_by_number_map: Dict
     ) -> List[Dict]:
         """Build transaction data with relationships"""
 
-        # Get sub task mapping
-        sub_task_by_project_award_map = (
-            self.repository._get_sub_task_by_project_award_map()
+        # skip header row.
+        df = df[df.index != 0]
+
+        # Resolve sub task and award ids for the whole sheet at once
+        keys = pd.DataFrame(
+            {
+                "project_number": df["Project Number"].map(self._safe_strip),
+                "sub_task_number": df["Subtask Number"].map(
+                    lambda value: str(float(self._safe_strip(value)))
+                ),
+                "award_number": df["Award Number"].map(self._safe_strip),
+            },
+            index=df.index,
         )
+        sub_task_ids = map_ids(self._get_sub_task_by_project_award_map(), keys)
+        award_ids = map_ids(awards_by_number_map, keys["award_number"])
 
         not_found_sub_task_keys = []
         transaction_data = []
 
-        for idx, row in df.iterrows():
-            if idx == 0:
-                continue
-
-            # Sub task data
-            sub_task_key = (
-                self._safe_strip(row["Project Number"]),
-                str(float(self._safe_strip(row["Subtask Number"]))),
-                self._safe_strip(row["Award Number"]),
-            )
-            sub_task_id = sub_task_by_project_award_map.get(sub_task_key)
-
+        for (_, row), sub_task_id, award_id, sub_task_key in zip(
+            df.iterrows(),
+            sub_task_ids,
+            award_ids,
+            keys.itertuples(index=False, name=None),
+            strict=True,
+        ):
             # Insert transaction data
             if sub_task_id is not None:
                 data = {
                     "sub_task_id": sub_task_id,
-                    "award_id": awards_by_number_map.get(
-                        self._safe_strip(row["Award Number"])
-                    ),
+                    "award_id": award_id,
                     "transaction_number": self._safe_strip(row["Transaction Number"]),
                     "transaction_source": self._safe_strip(row["Transaction Source"]),
                     "expenditure_type": self._safe_strip(row["Expenditure Type"]),
@@ -923,33 +1092,6 @@ class ExcelDataMigrationService:
             return None
 
     
-    def store_invalid_records(self, invalid_data: List[Dict], sheet_name: str, excel_file_path: str) -> None:
-        # Convert data to DataFrame
-        df_to_append = pd.DataFrame(invalid_data)
-        df_to_append = df_to_append.where(pd.notna(df_to_append), None)
-
-        # Load workbook to get current row count
-        book = load_workbook(excel_file_path)
-        if sheet_name not in book.sheetnames:
-            raise ValueError(f"Sheet '{sheet_name}' not found in Excel file.")
-
-        # Determine the starting row (after last row with data)
-        start_row = book[sheet_name].max_row
-
-        # Append using modern pandas API (2.1+)
-        with pd.ExcelWriter(
-            excel_file_path,
-            engine='openpyxl',
-            mode='a',
-            if_sheet_exists='overlay'
-        ) as writer:
-            df_to_append.to_excel(
-                writer,
-                sheet_name=sheet_name,
-                index=False,
-                header=False,
-                startrow=start_row
-            )
     def create_empty_excel_with_same_structure(self, excel_file: Path) -> str:
         try:
             # Read the original Excel file to get sheet names and headers
@@ -1,11 +1,41 @@
-from typing import Callable
+from typing import Any, Callable
 
 from sqlalchemy.orm import Session
 
+from src.core.tiered_cache import invalidates
 from src.repository.workflow_status_repository import WorkflowStatusRepository
 from src.services.base_service import BaseService
 
+# Tag of cached lookups derived from workflow statuses (see ParStateService)
+WORKFLOW_STATUS_CACHE_TAG = "workflow_statuses"
+
 
 class WorkflowStatusService(BaseService):
     def __init__(self, session_factory: Callable[..., Session]):
         super().__init__(WorkflowStatusRepository(session_factory))
+
+    @invalidates(WORKFLOW_STATUS_CACHE_TAG)
+    def add(self, schema: Any) -> Any:
+        return super().add(schema)
+
+    @invalidates(WORKFLOW_STATUS_CACHE_TAG)
+    def patch(
+        self,
+        id: int,
+        schema: Any,
+        exclude_none: bool = True,
+        exclude_unset: bool = False,
+    ) -> Any:
+        return super().patch(id, schema, exclude_none, exclude_unset)
+
+    @invalidates(WORKFLOW_STATUS_CACHE_TAG)
+    def patch_attr(self, id: int, attr: str, value: Any) -> Any:
+        return super().patch_attr(id, attr, value)
+
+    @invalidates(WORKFLOW_STATUS_CACHE_TAG)
+    def put_update(self, id: int, schema: Any) -> Any:
+        return super().put_update(id, schema)
+
+    @invalidates(WORKFLOW_STATUS_CACHE_TAG)
+    def remove_by_id(self, id: int) -> Any:
+        return super().remove_by_id(id)
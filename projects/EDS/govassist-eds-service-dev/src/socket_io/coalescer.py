@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+
+def merge_workflow_delta(pending: Dict[str, Any], delta: Dict[str, Any]):
+    """Fold a state delta into a pending one; later values win, files merge per field"""
+    for key, value in delta.items():
+        if key == "files" and isinstance(value, dict):
+            files = pending.setdefault("files", {})
+            for file_id, file_changes in value.items():
+                files.setdefault(file_id, {}).update(file_changes)
+        else:
+            pending[key] = value
+
+
+class WorkflowUpdateCoalescer:
+    """
+    Coalesces bursts of workflow update events into at most
+    ``max_emits_per_second`` emits per workflow.
+
+    Deltas arriving between emits are merged, and each emit carries the
+    sequence range it covers (``from_seq``..``seq``) so clients can tell a
+    merged batch from a gap. A snapshot replaces whatever is pending.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[str, str, Dict[str, Any]], Awaitable[None]],
+        max_emits_per_second: float = 4.0,
+    ):
+        self.emit = emit
+        self.min_interval = (
+            1.0 / max_emits_per_second if max_emits_per_second > 0 else 0.0
+        )
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._last_emit: Dict[str, float] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+
+    async def add(
+        self,
+        workflow_id: str,
+        status: str,
+        data: Dict[str, Any],
+        seq: Optional[int] = None,
+        event_type: str = "delta",
+    ):
+        """Queue an update; it is emitted immediately or with the next flush"""
+        pending = self._pending.get(workflow_id)
+        if pending is None or event_type == "snapshot":
+            pending = {
+                "type": event_type,
+                "status": status,
+                "from_seq": seq,
+                "seq": seq,
+                "data": {},
+            }
+            self._pending[workflow_id] = pending
+
+        merge_workflow_delta(pending["data"], data)
+        pending["status"] = status
+        if seq is not None:
+            pending["seq"] = seq
+            if pending["from_seq"] is None:
+                pending["from_seq"] = seq
+
+        if workflow_id in self._flush_tasks:
+            return
+
+        delay = (
+            self._last_emit.get(workflow_id, 0.0) + self.min_interval - time.monotonic()
+        )
+        if delay <= 0:
+            await self._flush(workflow_id)
+        else:
+            self._flush_tasks[workflow_id] = asyncio.create_task(
+                self._flush_later(workflow_id, delay)
+            )
+
+    async def _flush_later(self, workflow_id: str, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._flush_tasks.pop(workflow_id, None)
+        await self._flush(workflow_id)
+
+    async def _flush(self, workflow_id: str):
+        pending = self._pending.pop(workflow_id, None)
+        if pending is None:
+            return
+        self._last_emit[workflow_id] = time.monotonic()
+
+        payload = {
+            **pending["data"],
+            "type": pending["type"],
+            "seq": pending["seq"],
+            "from_seq": pending["from_seq"],
+        }
+        try:
+            await self.emit(workflow_id, pending["status"], payload)
+        except Exception as e:
+            logger.error(f"Failed to emit workflow update for {workflow_id}: {e}")
+
+        # Finished workflows will not send more events, so stop tracking them
+        if pending["status"] in ("completed", "failed", "cancelled"):
+            self._last_emit.pop(workflow_id, None)
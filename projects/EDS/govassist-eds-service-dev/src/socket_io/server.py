@@ -1,10 +1,14 @@
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import socketio
 from fastapi import FastAPI
 from loguru import logger
 
 from src.core.config import configs
+from src.socket_io.coalescer import WorkflowUpdateCoalescer
+
+if TYPE_CHECKING:
+    from src.services.redis_service import RedisService
 
 
 class SocketIOService:
@@ -15,6 +19,7 @@ class SocketIOService:
         transports: list = None,
         logger: bool = False,
         engineio_logger: bool = False,
+        redis_service: Optional["RedisService"] = None,
     ):
         self.sio = socketio.AsyncServer(
             async_mode="asgi",
@@ -24,6 +29,12 @@ class SocketIOService:
             logger=logger,
             engineio_logger=engineio_logger,
         )
+        # Used to serve full workflow snapshots on request
+        self.redis_service = redis_service
+        self.update_coalescer = WorkflowUpdateCoalescer(
+            self.emit_workflow_update_to_room_only,
+            configs.WORKFLOW_UPDATES_MAX_EMITS_PER_SECOND,
+        )
 
         # Register Socket.IO event handlers
         self._register_events()
@@ -82,6 +93,39 @@ class SocketIOService:
                     to=sid,
                 )
 
+        @self.sio.event
+        async def request_workflow_snapshot(sid, data):
+            """Send the full workflow state, e.g. after a client detects a sequence gap"""
+            workflow_id = data.get("workflow_id")
+            if not workflow_id or not self.redis_service:
+                return
+            workflow = await self.redis_service.workflow.get_workflow(workflow_id)
+            await self.sio.emit(
+                "workflow_snapshot",
+                {
+                    "workflow_id": workflow_id,
+                    "type": "snapshot",
+                    "seq": workflow.event_seq if workflow else None,
+                    "data": workflow.model_dump(mode="json") if workflow else None,
+                },
+                to=sid,
+            )
+
+        @self.sio.event
+        async def read_workflow_stream(sid, data):
+            """Send logs and events recorded after the client's cursor, e.g. after a reconnect"""
+            workflow_id = data.get("workflow_id")
+            if not workflow_id or not self.redis_service:
+                return
+            entries, cursor = await self.redis_service.workflow.read_workflow_stream(
+                workflow_id, data.get("cursor"), min(int(data.get("count", 100)), 1000)
+            )
+            await self.sio.emit(
+                "workflow_stream",
+                {"workflow_id": workflow_id, "entries": entries, "cursor": cursor},
+                to=sid,
+            )
+
         @self.sio.event
         async def ping(sid, data):
             """Handle ping messages for testing"""
@@ -142,16 +186,28 @@ class SocketIOService:
             **(data if data else {}),
         }
 
-        # TODO: Uncomment this for brodcasting to specific room
-        # room = f"workflow_{workflow_id}"
-        # logger.info(f"Emitting workflow update to room: {room}")
-        # Always emit to specific workflow room
-        # await self.emit_to_room("workflow_update", room, update_data)
+        # Always emit to specific workflow room; the Redis manager reaches
+        # members connected to other replicas
+        room = f"workflow_{workflow_id}"
+        await self.emit_to_room(configs.WORKFLOW_UPDATES, room, update_data)
 
         # Only broadcast to all clients if explicitly requested
         if broadcast:
             await self.emit_broadcast(configs.WORKFLOW_UPDATES, update_data)
 
+    async def queue_workflow_update(
+        self,
+        workflow_id: str,
+        status: str,
+        data: Dict[str, Any] = None,
+        seq: Optional[int] = None,
+        event_type: str = "delta",
+    ):
+        """Rate-limited emit: bursts per workflow are merged into a single update"""
+        await self.update_coalescer.add(
+            workflow_id, status, data or {}, seq, event_type
+        )
+
     async def emit_workflow_update_to_room_only(
         self, workflow_id: str, status: str, data: Dict[str, Any] = None
     ):
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Set, Tuple
+
+import redis.asyncio as redis_async
+from loguru import logger
+from redis.exceptions import ResponseError
+
+from src.core.config import configs
+from src.core.single_flight import RELEASE_LOCK_SCRIPT, RENEW_LOCK_SCRIPT
+from src.services.workflow_redis_manager import WorkflowRedisSchema, WorkflowStream
+from src.socket_io.server import SocketIOService
+
+
+class EventIdCache:
+    """Bounded LRU of event ids this replica has already emitted"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+
+    def seen(self, event_id: str) -> bool:
+        """Record the id and report whether it had been recorded before"""
+        if event_id in self._ids:
+            self._ids.move_to_end(event_id)
+            return True
+        self._ids[event_id] = None
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+        return False
+
+
+def _rank(shard: int, consumer_name: str) -> bytes:
+    """Rendezvous weight of a consumer for a shard; the highest one reads it"""
+    return hashlib.blake2b(
+        f"{shard}:{consumer_name}".encode("utf-8"), digest_size=8
+    ).digest()
+
+
+class WorkflowEventConsumer:
+    """
+    Reads workflow events from the sharded Redis Streams and emits each only
+    to its workflow's Socket.IO room. The Socket.IO Redis manager then
+    delivers it to room members connected to any replica.
+
+    Events are sharded by workflow id, and a shard is read by one replica at
+    a time: the holder of its lease. All events of a workflow therefore pass
+    through one coalescer, in seq order. Live replicas heartbeat into a
+    sorted set and split the shards between them by rendezvous hashing; when
+    a replica stops, its shards move to others once their leases lapse, and
+    the new owner first claims the events the old one left pending.
+    """
+
+    def __init__(
+        self,
+        socket_io_service: SocketIOService,
+        redis_url: str = configs.REDIS_URL,
+        schema: WorkflowRedisSchema = None,
+        group_name: str = configs.WORKFLOW_EVENTS_CONSUMER_GROUP,
+        batch_size: int = 100,
+        block_ms: int = 2000,
+        claim_idle_ms: int = 60000,
+        lease_ms: int = configs.WORKFLOW_EVENTS_SHARD_LEASE_MS,
+    ):
+        self.socket_io_service = socket_io_service
+        self.redis_url = redis_url
+        self.schema = schema or WorkflowRedisSchema()
+        self.shards = range(configs.WORKFLOW_EVENTS_STREAM_SHARDS)
+        self.group_name = group_name
+        self.consumer_name = f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        # Leases are renewed between reads, so a read must not outlast them
+        self.block_ms = min(block_ms, lease_ms // 3)
+        self.claim_idle_ms = claim_idle_ms
+        self.lease_ms = lease_ms
+        self.owned: Set[int] = set()
+        self.seen_events = EventIdCache()
+
+    async def _ensure_groups(self, client: redis_async.Redis):
+        for shard in self.shards:
+            try:
+                await client.xgroup_create(
+                    self.schema.workflow_events_shard_key(shard),
+                    self.group_name,
+                    id="$",
+                    mkstream=True,
+                )
+            except ResponseError as e:
+                # BUSYGROUP: another replica already created it
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def _handle(
+        self,
+        client: redis_async.Redis,
+        stream_key: Any,
+        entries: List[Tuple[Any, Dict]],
+    ):
+        if isinstance(stream_key, bytes):
+            stream_key = stream_key.decode("utf-8")
+        for event_id, fields in entries:
+            event_id = (
+                event_id.decode("utf-8") if isinstance(event_id, bytes) else event_id
+            )
+            try:
+                # Ids are only unique within one shard
+                if not self.seen_events.seen(f"{stream_key}:{event_id}"):
+                    data = WorkflowStream.load_event(
+                        fields[b"event"], fields.get(b"changes")
+                    )
+                    workflow_id = data.get("workflow_id")
+                    status = data.get("status")
+                    if workflow_id and status:
+                        await self.socket_io_service.queue_workflow_update(
+                            workflow_id,
+                            status,
+                            data.get("data", {}),
+                            seq=data.get("seq"),
+                            event_type=data.get("type", "delta"),
+                        )
+            except (KeyError, json.JSONDecodeError) as e:
+                logger.error(f"Failed to parse workflow event {event_id}: {e}")
+            except Exception as e:
+                logger.error(f"Error processing workflow event {event_id}: {e}")
+            await client.xack(stream_key, self.group_name, event_id)
+
+    async def _claim(self, client: redis_async.Redis, shard: int, min_idle_ms: int):
+        """Take over events of a shard left pending by other consumers, oldest first"""
+        stream_key = self.schema.workflow_events_shard_key(shard)
+        start = "0-0"
+        while True:
+            start, entries, *_ = await client.xautoclaim(
+                stream_key,
+                self.group_name,
+                self.consumer_name,
+                min_idle_time=min_idle_ms,
+                start_id=start,
+                count=self.batch_size,
+            )
+            if not entries:
+                return
+            logger.info(f"Claimed {len(entries)} pending workflow events")
+            await self._handle(client, stream_key, entries)
+            if start in (b"0-0", "0-0"):
+                return
+
+    def _preferred_shards(self, consumers: List[str]) -> Set[int]:
+        """Shards this consumer should read: those it ranks highest for among the live ones"""
+        return {
+            shard
+            for shard in self.shards
+            if max(consumers, key=lambda name: _rank(shard, name)) == self.consumer_name
+        }
+
+    async def _balance(self, client: redis_async.Redis):
+        """Heartbeat, renew or take the leases of preferred shards and give up the rest"""
+        consumers_key = self.schema.workflow_events_consumers_key()
+        now = time.time()
+        await client.zadd(consumers_key, {self.consumer_name: now})
+        await client.zremrangebyscore(consumers_key, 0, now - self.lease_ms / 1000)
+        consumers = [
+            name.decode("utf-8") if isinstance(name, bytes) else name
+            for name in await client.zrange(consumers_key, 0, -1)
+        ]
+        preferred = self._preferred_shards(consumers or [self.consumer_name])
+
+        renew = client.register_script(RENEW_LOCK_SCRIPT)
+        for shard in self.shards:
+            lease_key = self.schema.workflow_events_lease_key(shard)
+            if shard in self.owned:
+                if shard in preferred and await renew(
+                    keys=[lease_key], args=[self.consumer_name, self.lease_ms]
+                ):
+                    continue
+                await self._release(client, shard)
+            elif shard in preferred and await client.set(
+                lease_key, self.consumer_name, nx=True, px=self.lease_ms
+            ):
+                self.owned.add(shard)
+                # Whatever the previous owner read but never acked goes first
+                await self._claim(client, shard, 0)
+
+    async def _release(self, client: redis_async.Redis, shard: int):
+        self.owned.discard(shard)
+        lease_key = self.schema.workflow_events_lease_key(shard)
+        await client.register_script(RELEASE_LOCK_SCRIPT)(
+            keys=[lease_key], args=[self.consumer_name, f"{lease_key}:released"]
+        )
+
+    async def _leave(self, client: redis_async.Redis):
+        """Give up all leases and remove this consumer from the groups"""
+        for shard in list(self.owned):
+            await self._release(client, shard)
+        await client.zrem(
+            self.schema.workflow_events_consumers_key(), self.consumer_name
+        )
+        for shard in self.shards:
+            stream_key = self.schema.workflow_events_shard_key(shard)
+            # Deleting a consumer drops its pending events; leave those to be claimed
+            if not await client.xpending_range(
+                stream_key,
+                self.group_name,
+                min="-",
+                max="+",
+                count=1,
+                consumername=self.consumer_name,
+            ):
+                await client.xgroup_delconsumer(
+                    stream_key, self.group_name, self.consumer_name
+                )
+
+    async def run(self):
+        """Consume events until cancelled"""
+        client = redis_async.from_url(self.redis_url)
+        try:
+            await self._ensure_groups(client)
+            logger.info(
+                f"Workflow event consumer {self.consumer_name} joined {self.group_name}"
+            )
+            next_balance = 0.0
+            while True:
+                if time.monotonic() >= next_balance:
+                    await self._balance(client)
+                    next_balance = time.monotonic() + self.lease_ms / 3000
+                if not self.owned:
+                    await asyncio.sleep(self.block_ms / 1000)
+                    continue
+
+                response = await client.xreadgroup(
+                    self.group_name,
+                    self.consumer_name,
+                    {
+                        self.schema.workflow_events_shard_key(shard): ">"
+                        for shard in self.owned
+                    },
+                    count=self.batch_size,
+                    block=self.block_ms,
+                )
+                for stream_key, entries in response or []:
+                    await self._handle(client, stream_key, entries)
+                if not response:
+                    # Idle: retry anything whose handling was interrupted
+                    for shard in list(self.owned):
+                        await self._claim(client, shard, self.claim_idle_ms)
+        finally:
+            try:
+                await self._leave(client)
+            except Exception as e:
+                logger.warning(f"Workflow event consumer could not leave cleanly: {e}")
+            await client.close()
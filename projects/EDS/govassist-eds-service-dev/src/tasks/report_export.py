@@ -1,78 +1,53 @@
-import json
 import logging
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC
 from datetime import datetime as dt
-
-from openpyxl import Workbook
-from sqlalchemy import text
+from typing import Any, Dict, Iterator, List, Optional, Set
 
 from src.agents.tools.es_tools import es_client
 from src.celery_app import celery_app, database, redis_client
 from src.core.config import configs
-from src.core.extensions import blob_service_client
-from src.model.report_model import ReportExport
-from src.model.sub_report_model import SubReportWorkflow
+from src.core.redis_codec import encode_cache_value, redis_codec
+from src.core.redis_namespace import REPORT_EXPORT_ARTIFACT_TTL
+from src.model.report_model import ReportExport, ReportExportFormat
+from src.model.sub_report_model import SubReport, SubReportWorkflow
 from src.services.sub_report_service import SubReportService
-from src.util.reports import make_report_redis_key
+from src.util.blob_stream import BlockBlobWriter, get_blob_client
+from src.util.export_writers import EXPORT_FORMATS, open_export_writer
 
 logger = logging.getLogger(__name__)
 
 
-def upload_file_to_blob(file_path: str, container_name: str, blob_name: str) -> str:
-    """
-    Uploads a local file to Azure Blob Storage and returns the blob URL.
-    """
-    # Ensure container exists (optional)
-    container_client = blob_service_client.get_container_client(container_name)
-    try:
-        container_client.create_container()
-    except Exception:
-        pass  # already exists
-
-    blob_client = container_client.get_blob_client(blob=blob_name)
-
-    # Upload file
-    with open(file_path, "rb") as data:
-        blob_client.upload_blob(data, overwrite=True)
-
-
-def feed_sheet_from_db(ws, session, sub_report, service):
-    redis_key = make_report_redis_key(
-        sub_report.report_configuration_id,
-        sub_report.id,
-        sub_report.config,
-    )
-    cached_result = redis_client.get(redis_key)
-    cached = json.loads(cached_result.decode("utf-8")) if cached_result else {}
-    db_query = cached.get("db_query")
-    count_query = cached.get("count_query")
-
-    if not db_query or not count_query:
-        db_query, count_query, _ = service._build_query_and_extract_field_types(
-            session, sub_report
-        )
-
-    total = service._get_total_count_from_query(session, count_query)
-    if total == 0:
-        logger.warning(f"No records found for sub-report: {sub_report.name}")
-        return
-
-    batch_size = 1000
-    offset = 0
+def unique_sheet_name(name: str, used: Set[str]) -> str:
+    """Excel sheet title (max 31 chars) not yet in ``used``; records it"""
+    title = name[:31]
+    suffix = 1
+    while title.lower() in used:
+        tag = f" ({suffix})"
+        title = f"{name[: 31 - len(tag)]}{tag}"
+        suffix += 1
+    used.add(title.lower())
+    return title
 
-    while offset < total:
-        query = f"{db_query} OFFSET {offset} ROWS FETCH NEXT {batch_size} ROWS ONLY"
-        result = session.execute(text(query))
-        rows = result.fetchall()
 
-        for row in rows:
-            ws.append(list(row))
+def iter_rows_from_db(session, sub_report, service) -> Iterator[List[Any]]:
+    db_query, _, _ = service.get_query_and_field_types(session, sub_report)
 
-        offset += batch_size
+    written = 0
+    batches = service.stream_query(session, db_query, batch_size=1000)
+    try:
+        for _, rows in batches:
+            for row in rows:
+                yield list(row)
+            written += len(rows)
+    finally:
+        batches.close()
+
+    if written == 0:
+        logger.warning(f"No records found for sub-report: {sub_report.name}")
 
 
-def feed_sheet_from_es(ws, sub_report, fields_by_uuid):
+def iter_rows_from_es(sub_report, fields_by_uuid) -> Iterator[List[Any]]:
     batch_size = 1000
     search_after = None
 
@@ -93,12 +68,57 @@ def feed_sheet_from_es(ws, sub_report, fields_by_uuid):
 
         for hit in hits:
             source = hit.get("_source", {})
-            row = [source.get(f, "") for f in fields_by_uuid if f in source]
-            ws.append(row)
+            yield [source.get(f, "") for f in fields_by_uuid if f in source]
 
         search_after = hits[-1]["sort"]
 
 
+def release_export_artifact(artifact_key: Optional[str], export_id: int):
+    """Drop the artifact record of a failed export, unless another export owns it by now"""
+    if not artifact_key:
+        return
+    record = redis_codec.decode(redis_client.get(artifact_key))
+    if isinstance(record, dict) and record.get("export_id") == export_id:
+        redis_client.delete(artifact_key)
+
+
+def write_sub_report_sheet(
+    writer: Any,
+    sheet_name: str,
+    sub_report_id: int,
+    fields_by_uuid: Dict[str, Any],
+) -> int:
+    """
+    Stream one sub-report's rows into its sheet. Runs on an export worker
+    thread, so it uses a session of its own.
+    """
+    with database.session() as session:
+        sub_report = session.get(SubReport, sub_report_id)
+        latest_workflow = (
+            session.query(SubReportWorkflow)
+            .filter(SubReportWorkflow.sub_report_id == sub_report_id)
+            .order_by(SubReportWorkflow.id.desc())
+            .first()
+        )
+
+        if (
+            not latest_workflow
+            or latest_workflow.status != "COMPLETED"
+            or not es_client.indices.exists(index=sub_report.index_name)
+        ):
+            # If the report is not published to the elasticsearch, we will have to pull the data from the sql.
+            rows = iter_rows_from_db(session, sub_report, SubReportService(session))
+        else:
+            # If the report is published to the elasticsearch, we will have to pull the data from the elasticsearch.
+            rows = iter_rows_from_es(sub_report, fields_by_uuid)
+
+        try:
+            return writer.append_rows(sheet_name, rows)
+        except Exception:
+            logger.exception(f"Export of sub-report {sub_report_id} failed")
+            raise
+
+
 @celery_app.task(
     queue="eds_default_queue_dev",
     bind=True,
@@ -108,7 +128,12 @@ def feed_sheet_from_es(ws, sub_report, fields_by_uuid):
     retry_backoff=True,
     retry_jitter=True,
 )
-def report_export(self, export_id: int):
+def report_export(
+    self,
+    export_id: int,
+    export_format: str = ReportExportFormat.XLSX.value,
+    artifact_key: Optional[str] = None,
+):
     with database.session() as session:
         export = (
             session.query(ReportExport).filter(ReportExport.id == export_id).first()
@@ -127,6 +152,7 @@ def report_export(self, export_id: int):
             export.status = "FAILED"
             export.error_message = message
             session.commit()
+            release_export_artifact(artifact_key, export_id)
             logger.error(message)
 
         try:
@@ -140,50 +166,70 @@ def report_export(self, export_id: int):
             if not sub_reports:
                 return fail_export("No sub-reports found for report")
 
+            export_format = ReportExportFormat(export_format)
+            extension, content_type = EXPORT_FORMATS[export_format]
             file_name = (
-                f"{report.name}_{dt.now(UTC).strftime('%Y-%m-%dT%H-%M-%S')}.xlsx"
+                f"{report.name}_{dt.now(UTC).strftime('%Y-%m-%dT%H-%M-%S')}.{extension}"
+            )
+            blob_name = f"report-{file_name}"
+            blob_client = get_blob_client(
+                configs.AZURE_STORAGE_CONTAINER_NAME, blob_name
             )
-            workbook = Workbook()
-            workbook.remove(workbook.active)
-
-            service = SubReportService(session)
-
-            for sub_report in sub_reports:
-                sheet_name = sub_report.name[:31]
-                ws = workbook.create_sheet(title=sheet_name)
-                latest_workflow = (
-                    session.query(SubReportWorkflow)
-                    .filter(SubReportWorkflow.sub_report_id == sub_report.id)
-                    .order_by(SubReportWorkflow.id.desc())
-                    .first()
-                )
-
-                fields_by_uuid = {c["uuid"]: c for c in sub_report.config["config"]}
-                headers = [fields_by_uuid[f]["label"] for f in fields_by_uuid]
-                ws.append(headers)
-
-                if (
-                    not latest_workflow
-                    or latest_workflow.status != "COMPLETED"
-                    or not es_client.indices.exists(index=sub_report.index_name)
-                ):
-                    # If the report is not published to the elasticsearch, we will have to pull the data from the sql.
-                    feed_sheet_from_db(ws, session, sub_report, service)
-                else:
-                    # If the report is published to the elasticsearch, we will have to pull the data from the elasticsearch.
-                    feed_sheet_from_es(ws, sub_report, fields_by_uuid)
-
-            with tempfile.NamedTemporaryFile(suffix=".xlsx") as tmp:
-                workbook.save(tmp.name)
-                blob_name = f"report-{file_name}"
-                container = configs.AZURE_STORAGE_CONTAINER_NAME
-                upload_file_to_blob(tmp.name, container, blob_name)
+
+            sheet_names: Set[str] = set()
+
+            # Rows stream from the source into on-disk parts, one per sheet,
+            # and the assembled artifact streams to blob storage in staged
+            # blocks, so memory stays flat whatever the report size.
+            # Sub-reports are fetched concurrently, each into its own part, so
+            # the export takes as long as the slowest one.
+            with BlockBlobWriter(blob_client, content_type) as output:
+                writer = open_export_writer(export_format, output)
+                with ThreadPoolExecutor(
+                    max_workers=configs.REPORT_EXPORT_WORKERS,
+                    thread_name_prefix="report-export",
+                ) as executor:
+                    futures = []
+                    for sub_report in sub_reports:
+                        sheet_name = unique_sheet_name(sub_report.name, sheet_names)
+                        fields_by_uuid = {
+                            c["uuid"]: c for c in sub_report.config["config"]
+                        }
+                        headers = [fields_by_uuid[f]["label"] for f in fields_by_uuid]
+                        # Sheets are added up front so they keep the report's order
+                        writer.add_sheet(sheet_name, headers)
+                        futures.append(
+                            executor.submit(
+                                write_sub_report_sheet,
+                                writer,
+                                sheet_name,
+                                sub_report.id,
+                                fields_by_uuid,
+                            )
+                        )
+                    for future in futures:
+                        future.result()
+                writer.close()
 
             export.status = "COMPLETED"
             export.file_name = blob_name
             session.commit()
+
             logger.info(f"Export successful for report {report.name}")
 
+            if artifact_key:
+                # Identical exports reuse this blob until the data changes
+                try:
+                    redis_client.set(
+                        artifact_key,
+                        encode_cache_value(
+                            {"export_id": export.id, "blob_name": blob_name}
+                        ),
+                        ex=REPORT_EXPORT_ARTIFACT_TTL,
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not record export artifact {blob_name}: {e}")
+
         except Exception as e:
             fail_export(str(e))
             logger.exception(f"Export task failed for report_id {export_id}")
@@ -1,17 +1,16 @@
-import json
 import os
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
+from celery.exceptions import Retry
 from loguru import logger
 
 from src.celery_app import celery_app, database, redis_client
 from src.core.workflow_handler import CeleryWorkflowManager
-from src.model.workflow import EdsWorkflowProgress
 from src.repository.workflow_repository import WorkflowRepository
 from src.schema.workflow_schema import (
     LogLevel,
-    WorkflowProgressCreate,
+    WorkflowCheckpointStage,
     WorkflowStateUpdate,
     WorkflowStatus,
     WorkflowStatusEnum,
@@ -19,7 +18,7 @@ from src.schema.workflow_schema import (
     WorkflowUpdate,
 )
 from src.services.workflow_crud_service import WorkflowCrudService
-from src.services.workflow_redis_manager import WorkflowRedisSchema
+from src.services.workflow_redis_manager import WorkflowRedisSchema, build_log_entry
 from src.services.workflow_service import ExcelDataMigrationService, MigrationResult
 
 
@@ -38,12 +37,19 @@ def process_sharepoint_workflow(
     logger.info(f"Processing SharePoint workflow: {workflow_id}")
     downloaded_files = []
     validated_sheets_data = []
+    # Temp files are kept between attempts so a retry can resume from its checkpoints
+    keep_artifacts = False
     workflow_manager = CeleryWorkflowManager(
         redis_client=redis_client,
         schema=WorkflowRedisSchema(),
         workflow_service=WorkflowCrudService(session_factory=database.session),
     )
     try:
+        checkpoints = (
+            workflow_manager.get_checkpoints(workflow_id) if self.request.retries else {}
+        )
+        resumed_stages = []
+
         # Update the workflow status to running
         workflow_obj = workflow_manager.workflow_service.get_by_id(id=workflow_db_id)
         updated_workflow = WorkflowUpdate(
@@ -53,30 +59,125 @@ def process_sharepoint_workflow(
         )
         workflow_manager.workflow_service.patch(workflow_obj.id, updated_workflow)
 
-        downloaded_files, files_failed, scaled_progres = (
-            workflow_manager.download_sharepoint_files(
-                workflow_id, processable_items, workflow_db_id
+        sheets_checkpoint = checkpoints.get(WorkflowCheckpointStage.SHEETS_VALIDATION.value)
+        if sheets_checkpoint and workflow_manager.artifacts_intact(
+            sheets_checkpoint["files"]
+        ):
+            # Download, validation and workbook splitting all survived the last attempt
+            validated_sheets_data = sheets_checkpoint["files"]
+            downloaded_files = checkpoints.get(
+                WorkflowCheckpointStage.DOWNLOAD.value, {}
+            ).get("files", validated_sheets_data)
+            files_failed = sheets_checkpoint["files_failed"]
+            scaled_progres = sheets_checkpoint["progress_percentage"]
+            resumed_stages = [
+                WorkflowCheckpointStage.DOWNLOAD.value,
+                WorkflowCheckpointStage.VALIDATION.value,
+                WorkflowCheckpointStage.SHEETS_VALIDATION.value,
+            ]
+        else:
+            download_checkpoint = checkpoints.get(WorkflowCheckpointStage.DOWNLOAD.value)
+            if download_checkpoint and workflow_manager.artifacts_intact(
+                download_checkpoint["files"]
+            ):
+                downloaded_files = download_checkpoint["files"]
+                files_failed = download_checkpoint["files_failed"]
+                scaled_progres = download_checkpoint["progress_percentage"]
+                resumed_stages.append(WorkflowCheckpointStage.DOWNLOAD.value)
+            else:
+                downloaded_files, files_failed, scaled_progres = (
+                    workflow_manager.download_sharepoint_files(
+                        workflow_id, processable_items, workflow_db_id
+                    )
+                )
+                workflow_manager.save_checkpoint(
+                    workflow_id,
+                    WorkflowCheckpointStage.DOWNLOAD,
+                    {
+                        "files": downloaded_files,
+                        "files_failed": files_failed,
+                        "progress_percentage": scaled_progres,
+                    },
+                )
+
+            updated_workflow = WorkflowUpdate(
+                progress_percentage=scaled_progres, files_failed=files_failed
             )
-        )
+            workflow_manager.workflow_service.patch(workflow_obj.id, updated_workflow)
 
-        updated_workflow = WorkflowUpdate(
-            progress_percentage=scaled_progres, files_failed=files_failed
-        )
-        workflow_manager.workflow_service.patch(workflow_obj.id, updated_workflow)
+            # Validation results only hold while the downloads they checked are reused
+            validation_checkpoint = checkpoints.get(
+                WorkflowCheckpointStage.VALIDATION.value
+            )
+            if validation_checkpoint and resumed_stages:
+                valid_file_ids = set(validation_checkpoint["valid_file_ids"])
+                valid_files = [
+                    file for file in downloaded_files if file["id"] in valid_file_ids
+                ]
+                files_failed = validation_checkpoint["files_failed"]
+                scaled_progres = validation_checkpoint["progress_percentage"]
+                resumed_stages.append(WorkflowCheckpointStage.VALIDATION.value)
+            else:
+                valid_files, files_failed, scaled_progres = (
+                    workflow_manager.validate_downloaded_files(
+                        workflow_id, downloaded_files, workflow_db_id
+                    )
+                )
+                workflow_manager.save_checkpoint(
+                    workflow_id,
+                    WorkflowCheckpointStage.VALIDATION,
+                    {
+                        "valid_file_ids": [file["id"] for file in valid_files],
+                        "files_failed": files_failed,
+                        "progress_percentage": scaled_progres,
+                    },
+                )
 
-        valid_files, files_failed, scaled_progres = workflow_manager.validate_downloaded_files(
-            workflow_id, downloaded_files, workflow_db_id
-        )
-        validated_sheets_data = workflow_manager.validate_sheets_data(valid_files)
+            validated_sheets_data = workflow_manager.validate_sheets_data(valid_files)
+            workflow_manager.save_checkpoint(
+                workflow_id,
+                WorkflowCheckpointStage.SHEETS_VALIDATION,
+                {
+                    "files": validated_sheets_data,
+                    "files_failed": files_failed,
+                    "progress_percentage": scaled_progres,
+                },
+            )
 
         updated_workflow = WorkflowUpdate(
             progress_percentage=scaled_progres, files_failed=files_failed
         )
         workflow_manager.workflow_service.patch(workflow_obj.id, updated_workflow)
 
+        # Files migrated by an earlier attempt are only skipped while their artifacts are reused
+        processing_checkpoint = checkpoints.get(WorkflowCheckpointStage.PROCESSING.value)
+        completed_files = {}
+        if (
+            processing_checkpoint
+            and WorkflowCheckpointStage.SHEETS_VALIDATION.value in resumed_stages
+        ):
+            completed_files = processing_checkpoint["files"]
+            resumed_stages.append(WorkflowCheckpointStage.PROCESSING.value)
+
+        if resumed_stages:
+            workflow_manager.update_workflow_status_sync(
+                workflow_id,
+                WorkflowStateUpdate(
+                    resumed_stages=resumed_stages, retry_count=self.request.retries
+                ),
+                logs=[
+                    build_log_entry(
+                        workflow_db_id,
+                        LogLevel.INFO,
+                        f"Resuming workflow after completed stages: {', '.join(resumed_stages)}",
+                        step=WorkflowStepEnum.INITIALIZATION.value,
+                    )
+                ],
+            )
+
         processed_results, files_failed, scaled_progres = (
             workflow_manager.process_valid_files(
-                workflow_id, validated_sheets_data, workflow_db_id
+                workflow_id, validated_sheets_data, workflow_db_id, completed_files
             )
         )
 
@@ -96,29 +197,14 @@ def process_sharepoint_workflow(
             workflow_completed_at=datetime.now(timezone.utc),
         )
 
-        workflow_logs_key = workflow_manager.schema.workflow_logs_key(workflow_id)
-        workflow_progress_logs = list(
-            reversed(workflow_manager.redis_client.lrange(workflow_logs_key, 0, -1))
-        )
-
-        workflow_progress_orm = [
-            EdsWorkflowProgress(
-                **WorkflowProgressCreate(**json.loads(log.decode("utf-8"))).model_dump(
-                    exclude={"level"}, exclude_unset=True
-                )
-            )
-            for log in workflow_progress_logs
-        ]
-
-        workflow_manager.workflow_service.bulk_add_workflow_progress(
-            workflow_progress_orm
-        )
+        workflow_manager.persist_workflow_logs(workflow_id)
 
         workflow_manager.workflow_service.patch(workflow_obj.id, updated_workflow)
         # Clear the workflow status
         workflow_manager.clear_workflow_status(workflow_id)
         workflow_manager.clear_workflow_state(workflow_id)
         workflow_manager.clear_workflow_logs(workflow_id)
+        workflow_manager.clear_workflow_checkpoints(workflow_id)
 
         return {
             "status": "completed",
@@ -129,13 +215,6 @@ def process_sharepoint_workflow(
     except Exception as e:
         logger.error(f"Workflow failed for {workflow_id}: {str(e)}")
         try:
-            workflow_manager.add_log_sync(
-                workflow_id,
-                workflow_db_id,
-                LogLevel.ERROR,
-                f"Workflow failed: {str(e)}",
-                step=WorkflowStepEnum.ERROR.value,
-            )
             workflow_manager.update_workflow_status_sync(
                 workflow_id,
                 WorkflowStateUpdate(
@@ -143,28 +222,44 @@ def process_sharepoint_workflow(
                     files_failed=len(processable_items),
                     completed_at=datetime.now(timezone.utc).isoformat(),
                 ),
+                logs=[
+                    build_log_entry(
+                        workflow_db_id,
+                        LogLevel.ERROR,
+                        f"Workflow failed: {str(e)}",
+                        step=WorkflowStepEnum.ERROR.value,
+                    )
+                ],
             )
         except Exception as log_error:
             logger.error(f"Failed to log workflow error: {log_error}")
 
         # Retry the task if we haven't exceeded max retries
+        # Follows the task's own limit, so artifacts are kept exactly as long
+        # as another attempt is coming
+        keep_artifacts = self.request.retries < self.max_retries
         try:
-            self.retry(countdown=60, max_retries=3)
+            self.retry(countdown=60)
+        except Retry:
+            raise
         except Exception as retry_error:
+            keep_artifacts = False
+            workflow_manager.clear_workflow_checkpoints(workflow_id)
             logger.error(
                 f"Max retries exceeded for workflow {workflow_id}: {retry_error}"
             )
             raise
     finally:
-        # Delete the file manually
-        if downloaded_files:
-            for file in downloaded_files:
-                if os.path.exists(file["content"]):
-                    os.remove(file["content"])
-                    logger.info("Temporary valid file deleted.")
-
-        if validated_sheets_data:
-            for file in validated_sheets_data:
-                if os.path.exists(file["file_path_of_invalid_data"]):
-                    os.remove(file["file_path_of_invalid_data"])
-                    logger.info("Temporary invalid file deleted.")
\ No newline at end of file
+        if not keep_artifacts:
+            # Delete the file manually
+            if downloaded_files:
+                for file in downloaded_files:
+                    if os.path.exists(file["content"]):
+                        os.remove(file["content"])
+                        logger.info("Temporary valid file deleted.")
+
+            if validated_sheets_data:
+                for file in validated_sheets_data:
+                    if os.path.exists(file["file_path_of_invalid_data"]):
+                        os.remove(file["file_path_of_invalid_data"])
+                        logger.info("Temporary invalid file deleted.")
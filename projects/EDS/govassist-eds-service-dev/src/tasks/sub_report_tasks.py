@@ -15,13 +15,14 @@ from src.services.sub_report_service import SubReportService
     retry_backoff=True,
     retry_jitter=True,
 )
-def migrate_sub_report_data(self, sub_report_id: int):
+def migrate_sub_report_data(self, sub_report_id: int, full: bool = False):
     """
-    Celery task to migrate sub-report data from SQL to Elasticsearch
+    Celery task to migrate sub-report data from SQL to Elasticsearch.
+    Syncs only changed rows when it can, unless ``full`` asks for a rebuild.
     """
     try:
         service = SubReportService(Container.session_factory())
-        success = service._migrate_data(sub_report_id)
+        success = service._migrate_data(sub_report_id, full)
         if success:
             logger.info(
                 f"Migration completed successfully for sub_report_id: {sub_report_id}"
@@ -0,0 +1,97 @@
+"""
+Compare the ORM ``bulk_insert`` path of the workflow repositories with
+``bulk_load`` and report rows per second.
+
+Run with ``python -m src.util.bulk_load_benchmark [rows]`` (default 100,000).
+Rows are loaded into an in-memory SQLite database, and also into MSSQL when
+``BULK_LOAD_BENCHMARK_DATABASE_URL`` is set. Point that at a scratch
+database: the fund table is created there if missing. Benchmark rows are
+numbered under a prefix unique to the run, and only rows with that prefix
+are deleted afterwards.
+"""
+
+import os
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from loguru import logger
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import Session
+
+from src.model.workflow_master_model import WorkflowMasterFund
+from src.repository.workflow_repository import BaseRepository
+
+
+def fund_columns(count: int, prefix: str) -> Dict[str, List[Any]]:
+    """Column arrays shaped like a fund sheet, numbered ``{prefix}{i}``"""
+    return {
+        "number": [f"{prefix}{i:06d}" for i in range(count)],
+        "description": [f"Fund {i}" for i in range(count)],
+        "appropriation_fund_value": [f"A{i % 97:03d}" for i in range(count)],
+        "appropriation_fund_description": [
+            f"Appropriation {i % 97}" for i in range(count)
+        ],
+        "gaap_fund_value": [f"G{i % 13:02d}" for i in range(count)],
+        "gaap_fund_description": [f"GAAP fund {i % 13}" for i in range(count)],
+    }
+
+
+def fund_objects(count: int, prefix: str) -> List[WorkflowMasterFund]:
+    columns = fund_columns(count, prefix)
+    return [
+        WorkflowMasterFund(**{name: values[i] for name, values in columns.items()})
+        for i in range(count)
+    ]
+
+
+def timed(
+    session: Session, prefix: str, load: Callable[[BaseRepository], int]
+) -> float:
+    """Rows per second of one load; the rows numbered under ``prefix`` are deleted afterwards"""
+    repository = BaseRepository(session, WorkflowMasterFund)
+    try:
+        start = time.perf_counter()
+        loaded = load(repository)
+        seconds = time.perf_counter() - start
+    finally:
+        session.rollback()
+        session.execute(
+            delete(WorkflowMasterFund).where(
+                WorkflowMasterFund.number.startswith(prefix, autoescape=True)
+            )
+        )
+        session.commit()
+    return loaded / seconds
+
+
+def run_on(label: str, url: str, rows: int):
+    engine = create_engine(url)
+    # Only the fund table, so the benchmark needs none of the others
+    WorkflowMasterFund.__table__.create(engine, checkfirst=True)
+    with Session(engine) as session:
+        prefix = f"BENCH-{uuid.uuid4().hex[:8]}-"
+        # ORM objects are built inside the timing, as migrations build them
+        orm = timed(
+            session, prefix, lambda repo: repo.bulk_insert(fund_objects(rows, prefix))
+        )
+        core = timed(
+            session, prefix, lambda repo: repo.bulk_load(fund_columns(rows, prefix))
+        )
+    engine.dispose()
+
+    logger.info(f"{label:<8} bulk_insert {orm:>12,.0f} rows/s")
+    logger.info(f"{label:<8} bulk_load   {core:>12,.0f} rows/s ({core / orm:.1f}x)")
+
+
+def run(rows: int = 100_000):
+    logger.info(f"rows        {rows:,}")
+    run_on("sqlite", "sqlite://", rows)
+    url = os.getenv("BULK_LOAD_BENCHMARK_DATABASE_URL")
+    if url:
+        run_on("mssql", url, rows)
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:2]))
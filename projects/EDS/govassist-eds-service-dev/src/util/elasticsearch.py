@@ -5,6 +5,7 @@ from loguru import logger
 
 from src.core.exceptions import InternalServerError
 from src.elasticsearch.constants import FieldType
+from src.elasticsearch.index_versions import mapping_for
 from src.elasticsearch.service import es_service
 
 
@@ -25,12 +26,16 @@ async def get_field_mapping(index_name: str, field_name: str) -> Optional[Dict]:
         # This is compatible with Elasticsearch serverless mode
         mapping = await es_service.client.indices.get_mapping(index=index_name)
 
-        if not mapping or index_name not in mapping:
+        try:
+            index_mapping = mapping_for(mapping, index_name)
+        except KeyError:
             logger.warning(f"Index {index_name} not found in mapping response")
-            raise HTTPException(status_code=404, detail=f"Index {index_name} not found")
+            raise HTTPException(
+                status_code=404, detail=f"Index {index_name} not found"
+            ) from None
 
         # Navigate through the mapping to find the field
-        mappings = mapping[index_name]["mappings"]["properties"]
+        mappings = index_mapping["mappings"]["properties"]
 
         # Handle nested fields
         field_path = field_name.split(".")
@@ -102,10 +107,12 @@ async def get_index_mappings(index_name: str) -> Dict:
             )
 
         mapping = await es_service.client.indices.get_mapping(index=index_name)
-        if not mapping or index_name not in mapping:
-            raise HTTPException(status_code=404, detail=f"Index {index_name} not found")
-
-        return mapping[index_name]["mappings"]["properties"]
+        try:
+            return mapping_for(mapping, index_name)["mappings"]["properties"]
+        except KeyError:
+            raise HTTPException(
+                status_code=404, detail=f"Index {index_name} not found"
+            ) from None
 
     except Exception as e:
         logger.error(f"Error getting index mappings: {str(e)}")
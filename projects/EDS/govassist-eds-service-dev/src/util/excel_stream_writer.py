@@ -0,0 +1,174 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils.indexed_list import IndexedList
+
+# Workbook tables that cells add to as they are styled (dates get a number format)
+_STYLE_TABLES = (
+    "_fonts",
+    "_alignments",
+    "_borders",
+    "_fills",
+    "_number_formats",
+    "_protections",
+    "_cell_styles",
+)
+
+
+class _LockedIndexedList(IndexedList):
+    """IndexedList whose check-then-append runs under a lock"""
+
+    def __init__(self, iterable=None, lock: Optional[threading.Lock] = None):
+        super().__init__(iterable)
+        self._lock = lock or threading.Lock()
+
+    def add(self, value):
+        with self._lock:
+            return super().add(value)
+
+
+class StreamingWorkbookWriter:
+    """
+    Write-only workbook that rows are appended to sheet by sheet.
+
+    Rows are flushed to disk as they are appended, so memory stays bounded
+    regardless of how many rows are written. The file is only written to
+    ``path`` on ``close``. ``path`` may also be a writable binary stream,
+    which the workbook is zipped into directly (it need not be seekable).
+
+    Each sheet spools to its own temporary part, which ``close`` assembles
+    into the workbook, so different threads may append to different sheets
+    at the same time once those sheets have been added.
+    """
+
+    def __init__(self, path: Union[str, Path, BinaryIO]):
+        self.path = path if hasattr(path, "write") else str(path)
+        self.workbook = Workbook(write_only=True)
+        style_lock = threading.Lock()
+        for table in _STYLE_TABLES:
+            setattr(
+                self.workbook,
+                table,
+                _LockedIndexedList(getattr(self.workbook, table), style_lock),
+            )
+        self._sheets = {}
+        self.row_counts: Dict[str, int] = {}
+
+    def add_sheet(self, sheet_name: str, header: List[Any]):
+        """Create a sheet with a bold header row"""
+        worksheet = self.workbook.create_sheet(title=sheet_name[:31])
+        cells = []
+        for value in header:
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        worksheet.append(cells)
+
+        self._sheets[sheet_name] = worksheet
+        self.row_counts[sheet_name] = 0
+
+    def append(self, sheet_name: str, values: Iterable[Any]):
+        """Append one row of values to an existing sheet"""
+        self._sheets[sheet_name].append(list(values))
+        self.row_counts[sheet_name] += 1
+
+    def append_rows(self, sheet_name: str, rows: Iterable[Iterable[Any]]) -> int:
+        """Append every row an iterator yields; returns how many were written"""
+        worksheet = self._sheets[sheet_name]
+        count = 0
+        for values in rows:
+            worksheet.append(list(values))
+            count += 1
+        self.row_counts[sheet_name] += count
+        return count
+
+    def close(self):
+        """Write the workbook to ``path``, replacing any existing file atomically"""
+        if not isinstance(self.path, str):
+            self.workbook.save(self.path)
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile(
+            dir=directory, suffix=".xlsx", delete=False
+        ) as tmp_file:
+            tmp_path = tmp_file.name
+        try:
+            self.workbook.save(tmp_path)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+def split_workbook_rows(
+    source_path: Union[str, Path],
+    invalid_rows_by_sheet: Dict[str, Iterable[int]],
+    valid_path: Union[str, Path],
+    invalid_path: Union[str, Path],
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Split a workbook into a valid-rows and an invalid-rows workbook in one
+    streaming pass over the source.
+
+    Row indexes are 0-based data rows under the header, the way pandas numbers
+    them with ``header=0``. ``valid_path`` may be the source file itself.
+    Returns ``{sheet_name: (valid_count, invalid_count)}``.
+    """
+    invalid_rows_by_sheet = {
+        sheet_name: set(row_indexes)
+        for sheet_name, row_indexes in invalid_rows_by_sheet.items()
+    }
+
+    valid_writer = StreamingWorkbookWriter(valid_path)
+    invalid_writer = StreamingWorkbookWriter(invalid_path)
+
+    source = load_workbook(source_path, read_only=True, data_only=True)
+    try:
+        for worksheet in source.worksheets:
+            sheet_name = worksheet.title
+            invalid_rows = invalid_rows_by_sheet.get(sheet_name, set())
+            rows = worksheet.iter_rows(values_only=True)
+
+            header = list(next(rows, ()))
+            valid_writer.add_sheet(sheet_name, header)
+            invalid_writer.add_sheet(sheet_name, header)
+
+            for idx, values in enumerate(rows):
+                # Blank rows still count towards the index but are not copied
+                if all(value is None for value in values):
+                    continue
+                if idx in invalid_rows:
+                    invalid_writer.append(sheet_name, values)
+                else:
+                    valid_writer.append(sheet_name, values)
+    finally:
+        source.close()
+
+    valid_writer.close()
+    invalid_writer.close()
+
+    counts = {
+        sheet_name: (
+            valid_writer.row_counts[sheet_name],
+            invalid_writer.row_counts[sheet_name],
+        )
+        for sheet_name in valid_writer.row_counts
+    }
+    logger.info(f"Split workbook into valid and invalid rows: {counts}")
+    return counts
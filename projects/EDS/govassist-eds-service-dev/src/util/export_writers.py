@@ -0,0 +1,317 @@
+import csv
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from decimal import Decimal
+from typing import Any, BinaryIO, Dict, Iterable, List, Tuple
+
+from src.model.report_model import ReportExportFormat
+from src.util.blob_stream import XLSX_CONTENT_TYPE
+from src.util.excel_stream_writer import StreamingWorkbookWriter
+
+# Optional; only Parquet exports need it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+# (file extension, content type) of each export format's artifact
+EXPORT_FORMATS: Dict[ReportExportFormat, Tuple[str, str]] = {
+    ReportExportFormat.XLSX: ("xlsx", XLSX_CONTENT_TYPE),
+    ReportExportFormat.CSV_ZIP: ("zip", "application/zip"),
+    ReportExportFormat.CSV_GZIP: ("tar.gz", "application/gzip"),
+    ReportExportFormat.PARQUET: ("parquet.zip", "application/zip"),
+}
+
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+
+def safe_file_name(name: str) -> str:
+    """Archive member name for a sheet, without path separators or odd characters"""
+    return re.sub(r"[^\w\-. ()]", "_", name).strip() or "sheet"
+
+
+def write_zip(output: BinaryIO, parts: List[Tuple[str, str]], compression: int):
+    """Zip ``(member_name, path)`` parts into ``output``, which need not be seekable"""
+    with zipfile.ZipFile(output, "w", compression=compression) as archive:
+        for member_name, path in parts:
+            with open(path, "rb") as part, archive.open(
+                member_name, "w", force_zip64=True
+            ) as entry:
+                shutil.copyfileobj(part, entry, 1024 * 1024)
+
+
+class SpooledPartsWriter:
+    """
+    Base for exports that hold one file per sheet. Each sheet is written to
+    its own temporary part as rows arrive, so threads may append to
+    different sheets at the same time; ``close`` assembles the parts into
+    ``output`` in the order the sheets were added, then removes them.
+
+    Same interface as StreamingWorkbookWriter: ``add_sheet``,
+    ``append_rows``, ``row_counts`` and ``close``.
+    """
+
+    suffix = ""
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.row_counts: Dict[str, int] = {}
+        self._parts: Dict[str, str] = {}
+        self._member_names: Dict[str, str] = {}
+        self._headers: Dict[str, List[Any]] = {}
+
+    def add_sheet(self, sheet_name: str, header: List[Any]):
+        fd, path = tempfile.mkstemp(suffix=self.suffix)
+        os.close(fd)
+        self._parts[sheet_name] = path
+        self._headers[sheet_name] = header
+        self.row_counts[sheet_name] = 0
+        self._member_names[sheet_name] = self._unique_member_name(sheet_name)
+
+    def _unique_member_name(self, sheet_name: str) -> str:
+        base = safe_file_name(sheet_name)
+        used = {name.lower() for name in self._member_names.values()}
+        name, suffix = f"{base}{self.suffix}", 1
+        while name.lower() in used:
+            name = f"{base} ({suffix}){self.suffix}"
+            suffix += 1
+        return name
+
+    def append_rows(self, sheet_name: str, rows: Iterable[Iterable[Any]]) -> int:
+        count = self._write_part(
+            self._parts[sheet_name], self._headers[sheet_name], rows
+        )
+        self.row_counts[sheet_name] += count
+        return count
+
+    def _write_part(
+        self, path: str, header: List[Any], rows: Iterable[Iterable[Any]]
+    ) -> int:
+        raise NotImplementedError
+
+    def _assemble(self, parts: List[Tuple[str, str]]):
+        raise NotImplementedError
+
+    def close(self):
+        parts = [
+            (self._member_names[sheet_name], path)
+            for sheet_name, path in self._parts.items()
+        ]
+        try:
+            self._assemble(parts)
+        finally:
+            for _, path in parts:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class CsvPartsWriter(SpooledPartsWriter):
+    """Parts are UTF-8 CSV files with the header as the first row"""
+
+    suffix = ".csv"
+
+    def _write_part(self, path, header, rows) -> int:
+        count = 0
+        # Appending keeps a single header if a sheet's rows come in more than one call
+        new_file = os.path.getsize(path) == 0
+        with open(path, "a", encoding="utf-8", newline="") as part:
+            writer = csv.writer(part)
+            if new_file:
+                writer.writerow(header)
+            for values in rows:
+                writer.writerow(values)
+                count += 1
+        return count
+
+
+class CsvZipWriter(CsvPartsWriter):
+    """Zip archive with one deflated CSV per sheet"""
+
+    def _assemble(self, parts):
+        # zipfile writes data descriptors, so the output need not be seekable
+        write_zip(self.output, parts, zipfile.ZIP_DEFLATED)
+
+
+class CsvTarGzipWriter(CsvPartsWriter):
+    """Gzipped tar stream with one CSV per sheet"""
+
+    def _assemble(self, parts):
+        with tarfile.open(fileobj=self.output, mode="w|gz") as archive:
+            for member_name, path in parts:
+                info = tarfile.TarInfo(member_name)
+                info.size = os.path.getsize(path)
+                with open(path, "rb") as part:
+                    archive.addfile(info, part)
+
+
+class ParquetPart:
+    """Open Parquet writer of one sheet and the schema its rows are written with"""
+
+    def __init__(self, path: str, names: List[str]):
+        self.path = path
+        self.names = names
+        self.schema = None
+        self.writer = None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class ParquetZipWriter(SpooledPartsWriter):
+    """
+    Zip archive with one Parquet file per sheet, each written by one
+    ParquetWriter across all of the sheet's ``append_rows`` calls.
+
+    Column types are inferred from the first row group, with integers
+    written as doubles so a later fractional value still fits. Columns that
+    are empty or mixed there are written as strings. If a later value fits
+    no better than as a string, the column is widened to string and the rows
+    written so far are rewritten once.
+    """
+
+    suffix = ".parquet"
+
+    def __init__(self, output: BinaryIO, row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        if pa is None:
+            raise RuntimeError("Parquet exports need the pyarrow package")
+        super().__init__(output)
+        self.row_group_size = row_group_size
+        self._sheet_parts: Dict[str, ParquetPart] = {}
+
+    def add_sheet(self, sheet_name: str, header: List[Any]):
+        super().add_sheet(sheet_name, header)
+        path = self._parts[sheet_name]
+        self._sheet_parts[path] = ParquetPart(path, self._column_names(header))
+
+    @staticmethod
+    def _column_names(header: List[Any]) -> List[str]:
+        names, seen = [], {}
+        for label in header:
+            name = str(label)
+            seen[name] = seen.get(name, 0) + 1
+            names.append(name if seen[name] == 1 else f"{name} ({seen[name] - 1})")
+        return names
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        # Decimal precision varies row to row, which Arrow can't fit to one
+        # type, and Elasticsearch rows use "" for missing fields
+        if isinstance(value, Decimal):
+            return float(value)
+        return None if value == "" else value
+
+    @staticmethod
+    def _string_array(column: List[Any]):
+        return pa.array(
+            [None if value is None else str(value) for value in column],
+            type=pa.string(),
+        )
+
+    @staticmethod
+    def _infer_type(column: List[Any]):
+        try:
+            inferred = pa.array(column).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.string()
+        if pa.types.is_null(inferred):
+            return pa.string()
+        if pa.types.is_integer(inferred):
+            return pa.float64()
+        return inferred
+
+    def _write_part(self, path, header, rows) -> int:
+        part = self._sheet_parts[path]
+        width = len(part.names)
+        count = 0
+        batch: List[List[Any]] = []
+        for values in rows:
+            # Columns are built from rows, so short rows are padded to the header
+            row = [self._normalize(value) for value in values][:width]
+            row += [None] * (width - len(row))
+            batch.append(row)
+            if len(batch) >= self.row_group_size:
+                self._write_batch(part, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._write_batch(part, batch)
+            count += len(batch)
+        return count
+
+    def _write_batch(self, part: ParquetPart, batch: List[List[Any]]):
+        if batch:
+            columns = [list(column) for column in zip(*batch, strict=True)]
+        else:
+            columns = [[] for _ in part.names]
+        if part.schema is None:
+            part.schema = pa.schema(
+                pa.field(name, self._infer_type(column))
+                for name, column in zip(part.names, columns, strict=True)
+            )
+            part.writer = pq.ParquetWriter(part.path, part.schema, compression="zstd")
+
+        arrays = []
+        for index, column in enumerate(columns):
+            field = part.schema.field(index)
+            if pa.types.is_string(field.type):
+                arrays.append(self._string_array(column))
+                continue
+            try:
+                arrays.append(pa.array(column, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                self._widen_to_string(part, index)
+                arrays.append(self._string_array(column))
+        part.writer.write_table(pa.Table.from_arrays(arrays, schema=part.schema))
+
+    def _widen_to_string(self, part: ParquetPart, index: int):
+        """Make a column a string column, rewriting the row groups already written"""
+        part.close()
+        previous = f"{part.path}.previous"
+        os.replace(part.path, previous)
+        try:
+            schema = part.schema.set(index, pa.field(part.names[index], pa.string()))
+            part.writer = pq.ParquetWriter(part.path, schema, compression="zstd")
+            source = pq.ParquetFile(previous)
+            for group in range(source.num_row_groups):
+                table = source.read_row_group(group)
+                part.writer.write_table(
+                    table.set_column(
+                        index,
+                        schema.field(index),
+                        table.column(index).cast(pa.string()),
+                    )
+                )
+            source.close()
+            part.schema = schema
+        finally:
+            os.remove(previous)
+
+    def close(self):
+        for part in self._sheet_parts.values():
+            if part.writer is None:
+                # No rows, but the sheet still gets a file with its columns
+                self._write_batch(part, [])
+            part.close()
+        super().close()
+
+    def _assemble(self, parts):
+        # Parquet pages are already compressed, so entries are stored as-is
+        write_zip(self.output, parts, zipfile.ZIP_STORED)
+
+
+def open_export_writer(export_format: ReportExportFormat, output: BinaryIO):
+    """Streaming writer for ``export_format`` that writes its artifact to ``output``"""
+    if export_format == ReportExportFormat.CSV_ZIP:
+        return CsvZipWriter(output)
+    if export_format == ReportExportFormat.CSV_GZIP:
+        return CsvTarGzipWriter(output)
+    if export_format == ReportExportFormat.PARQUET:
+        return ParquetZipWriter(output)
+    return StreamingWorkbookWriter(output)
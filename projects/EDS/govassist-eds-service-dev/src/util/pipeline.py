@@ -0,0 +1,50 @@
+import queue
+import threading
+from typing import Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def run_pipelined(
+    items: Iterable[T],
+    consume: Callable[[T], None],
+    depth: int = 2,
+    stop: Optional[threading.Event] = None,
+):
+    """
+    Iterate ``items`` on the calling thread while ``consume`` handles them on
+    another, through a queue of at most ``depth`` items, so producing the next
+    item overlaps consuming the previous one and neither side runs far ahead.
+
+    Stops early once ``stop`` is set. An error on either side stops both
+    and is raised here.
+    """
+    pending: "queue.Queue" = queue.Queue(maxsize=depth)
+    errors = []
+
+    def consumer():
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                return
+            if errors:
+                continue  # keep draining so the producer never blocks
+            try:
+                consume(item)
+            except BaseException as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=consumer, name="pipeline-consumer", daemon=True)
+    thread.start()
+    try:
+        for item in items:
+            if errors or (stop is not None and stop.is_set()):
+                break
+            pending.put(item)
+    finally:
+        pending.put(_DONE)
+        thread.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,124 @@
+"""
+Compare the legacy JSON encoding of cached Redis values with RedisCodec.
+
+Run with ``python -m src.util.redis_codec_benchmark``. For each representative
+payload it prints encode/decode time per value and the bytes saved.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from src.core.redis_codec import RedisCodec
+
+
+def report_query_payload(columns: int = 120) -> Dict[str, Any]:
+    """Shape of the SQL/field-type cache stored under make_report_redis_key"""
+    select = ", ".join(
+        f"[eds_transaction].[column_{i}] AS [Column {i}]" for i in range(columns)
+    )
+    joins = " ".join(
+        f"LEFT OUTER JOIN [eds_dim_{i}] ON [eds_dim_{i}].[id] = [eds_transaction].[dim_{i}_id]"
+        for i in range(12)
+    )
+    db_query = f"SELECT {select} FROM [eds_transaction] {joins} ORDER BY [eds_transaction].[id]"
+    return {
+        "db_query": db_query,
+        "count_query": f"SELECT COUNT(*) FROM ({db_query}) AS subquery",
+        "field_types": {
+            f"Column {i}": ["string", "number", "date"][i % 3] for i in range(columns)
+        },
+    }
+
+
+def widget_config_payload(widgets: int = 40) -> List[Dict[str, Any]]:
+    """A dashboard's widget configs"""
+    return [
+        {
+            "id": i,
+            "type": "bar_chart",
+            "title": f"Budget by fund {i}",
+            "config": {
+                "x_axis": {"field": "fund_code", "label": "Fund"},
+                "y_axis": [{"field": "amount", "aggregate": "sum", "label": "Amount"}],
+                "filters": [
+                    {"field": "fiscal_year", "operator": "eq", "value": 2024},
+                    {"field": "status", "operator": "in", "value": ["open", "pending"]},
+                ],
+                "colors": ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728"],
+            },
+            "position": {"x": i % 4, "y": i // 4, "w": 3, "h": 2},
+        }
+        for i in range(widgets)
+    ]
+
+
+def workflow_state_payload(files: int = 25) -> Dict[str, Any]:
+    """A workflow state snapshot with its files"""
+    return {
+        "workflow_id": "01ABCDEF",
+        "status": "running",
+        "progress_percentage": 42.5,
+        "total_files": files,
+        "files": {
+            f"file-{i}": {
+                "file_id": f"file-{i}",
+                "file_name": f"Transactions_{i}.xlsx",
+                "status": "processed",
+                "progress_percentage": 100.0,
+                "validation_errors": [f"Row {r}: invalid amount" for r in range(20)],
+                "validation_warnings": [],
+                "valid_rows_count": 9800,
+                "invalid_rows_count": 20,
+                "total_rows": 9820,
+            }
+            for i in range(files)
+        },
+    }
+
+
+def _time_per_call(fn: Callable[[Any], Any], arg: Any, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def benchmark(payloads: Dict[str, Any], repeat: int = 200) -> List[Dict[str, Any]]:
+    codec = RedisCodec()
+    results = []
+    for name, payload in payloads.items():
+        legacy = json.dumps(payload).encode("utf-8")
+        encoded = codec.encode(payload)
+        assert codec.decode(encoded) == json.loads(legacy)
+        results.append(
+            {
+                "payload": name,
+                "json_bytes": len(legacy),
+                "codec_bytes": len(encoded),
+                "saved_pct": 100 * (1 - len(encoded) / len(legacy)),
+                "json_encode_us": _time_per_call(json.dumps, payload, repeat),
+                "json_decode_us": _time_per_call(json.loads, legacy, repeat),
+                "codec_encode_us": _time_per_call(codec.encode, payload, repeat),
+                "codec_decode_us": _time_per_call(codec.decode, encoded, repeat),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    codec = RedisCodec()
+    print(f"codec id={codec.codec_id} compression id={codec.compression_id}")
+    for row in benchmark(
+        {
+            "report_query": report_query_payload(),
+            "widget_configs": widget_config_payload(),
+            "workflow_state": workflow_state_payload(),
+        }
+    ):
+        print(
+            f"{row['payload']:<16} "
+            f"bytes {row['json_bytes']:>7} -> {row['codec_bytes']:>7} ({row['saved_pct']:5.1f}% saved)  "
+            f"encode {row['json_encode_us']:8.1f} -> {row['codec_encode_us']:8.1f} us  "
+            f"decode {row['json_decode_us']:8.1f} -> {row['codec_decode_us']:8.1f} us"
+        )
@@ -0,0 +1,106 @@
+"""
+Export a synthetic report through the streaming XLSX pipeline and report
+throughput and peak memory.
+
+Run with ``python -m src.util.report_export_benchmark [rows] [sheets]``
+(default 1,000,000 rows over 4 sheets). Blocks go to Azurite when
+``AZURITE_CONNECTION_STRING`` is set, otherwise to a local filesystem
+stand-in under the temp directory. Peak RSS is sampled as rows are written;
+it should stay flat as the row count grows.
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any, Iterator, List
+
+from src.util.blob_stream import (
+    XLSX_CONTENT_TYPE,
+    BlockBlobWriter,
+    LocalBlockBlobClient,
+)
+from src.util.excel_stream_writer import StreamingWorkbookWriter
+
+HEADERS = [
+    "Transaction Id",
+    "Fund Code",
+    "Project Number",
+    "Cost Center",
+    "Posted Date",
+    "Amount",
+    "Description",
+    "Status",
+]
+
+
+def synthetic_rows(count: int, seed: int = 0) -> Iterator[List[Any]]:
+    """Rows shaped like a transactional sub-report"""
+    start = date(2024, 1, 1)
+    for i in range(count):
+        n = seed + i
+        yield [
+            n,
+            f"F{n % 97:04d}",
+            f"P-{n % 5003:06d}",
+            f"CC{n % 211:03d}",
+            start + timedelta(days=n % 365),
+            round((n * 7919) % 1000000 / 100, 2),
+            f"Payment batch {n % 1000} for project {n % 5003}",
+            ("open", "pending", "closed")[n % 3],
+        ]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def blob_client(blob_name: str):
+    connection_string = os.getenv("AZURITE_CONNECTION_STRING")
+    if connection_string:
+        from azure.storage.blob import BlobServiceClient
+
+        service = BlobServiceClient.from_connection_string(connection_string)
+        container = service.get_container_client("benchmark")
+        try:
+            container.create_container()
+        except Exception:
+            pass
+        return container.get_blob_client(blob_name), f"azurite:benchmark/{blob_name}"
+    path = os.path.join(tempfile.gettempdir(), blob_name)
+    return LocalBlockBlobClient(path), path
+
+
+def run(rows: int = 1_000_000, sheets: int = 4):
+    client, location = blob_client("report-export-benchmark.xlsx")
+    per_sheet = rows // sheets
+    samples = []
+    start = time.perf_counter()
+
+    with BlockBlobWriter(client, XLSX_CONTENT_TYPE) as output:
+        writer = StreamingWorkbookWriter(output)
+        for sheet in range(sheets):
+            sheet_name = f"Sub-report {sheet + 1}"
+            writer.add_sheet(sheet_name, HEADERS)
+            writer.append_rows(sheet_name, synthetic_rows(per_sheet, sheet * per_sheet))
+            samples.append((sum(writer.row_counts.values()), peak_rss_mb()))
+        write_seconds = time.perf_counter() - start
+        writer.close()
+        size = output.tell()
+
+    total_seconds = time.perf_counter() - start
+    written = sum(writer.row_counts.values())
+    print(f"target      {location}")
+    print(f"rows        {written:,} over {sheets} sheets")
+    print(f"rows/s      {written / write_seconds:,.0f} (rows only)")
+    print(f"total       {total_seconds:.1f}s, {size / 1024 / 1024:.1f} MiB uploaded")
+    for rows_so_far, rss in samples:
+        print(f"peak RSS    {rss:8.1f} MiB after {rows_so_far:,} rows")
+    print(f"peak RSS    {peak_rss_mb():8.1f} MiB after upload")
+
+
+if __name__ == "__main__":
+    run(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,169 @@
+"""
+Compiled report plans: everything derived from a sub-report's config before
+any filter is applied, built once and shared by preview, publish and export.
+
+A plan holds the validated config, the resolved join chain and the
+unfiltered SQLAlchemy statements. Plans are
+keyed by a hash of the config without its filters, so every page and every
+filter of a preview reuses the same plan. Filters are applied as bound
+parameters, and statements run through ``CompiledReportPlan.execute`` share
+a per-plan compiled cache: a new filter value, page or page size is rebound
+into SQL that was already compiled, and only a new shape of filter compiles.
+
+Only preview executes statements that way. Publish and export reuse the
+plan but still take SQL strings with values inlined (``compile_sql``),
+since those strings are cached and streamed by the Celery tasks.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.util import LRUCache
+
+from src.core.config import configs
+from src.core.tiered_cache import LocalLRU
+from src.schema.report_schema import (
+    ReportFilter,
+    SubReportConfigBaseSchema,
+    validate_filter_uuids,
+)
+from src.util.report_sync import config_hash
+from src.util.reports import (
+    build_filter_condition,
+    build_sqlalchemy_query,
+    resolve_join_chain,
+)
+
+# Compiled statements kept per plan, one per filter shape (the structure of
+# the conditions, not their values) and statement kind
+COMPILED_STATEMENTS_PER_PLAN = 64
+
+
+@dataclass(frozen=True)
+class CompiledReportPlan:
+    plan_hash: str
+    config: Dict[str, Any]
+    base: Any
+    join_plan: Any
+    stmt: Select
+    count_stmt: Select
+    data_type_map: Dict[str, str]
+    formula_map: Dict[str, Any]
+    compiled_cache: LRUCache = field(
+        default_factory=lambda: LRUCache(COMPILED_STATEMENTS_PER_PLAN),
+        compare=False,
+        repr=False,
+    )
+
+    def validate_filters(self, filters: Optional[Dict[str, Any]]):
+        """Raise if ``filters`` is malformed or refers to a field the plan doesn't have"""
+        report_filter = ReportFilter.model_validate({"filters": filters})
+        if report_filter.filters:
+            validate_filter_uuids(
+                report_filter.filters,
+                {str(item["uuid"]) for item in self.config["config"]},
+            )
+
+    def statements(
+        self, filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Select, Select]:
+        """Data and count statements with ``filters`` applied as bound parameters"""
+        stmt, count_stmt = self.stmt, self.count_stmt
+        if filters:
+            filter_expr = build_filter_condition(
+                filters, self.data_type_map, self.formula_map
+            )
+            if filter_expr is not None:
+                stmt = stmt.where(filter_expr)
+                count_stmt = count_stmt.where(filter_expr)
+        return stmt, count_stmt
+
+    def count_statement(self, filters: Optional[Dict[str, Any]] = None) -> Select:
+        _, count_stmt = self.statements(filters)
+        return select(func.count()).select_from(count_stmt.subquery())
+
+    def execute(self, session: Session, statement: Select) -> Result:
+        """Execute a statement derived from this plan, reusing its compiled SQL"""
+        return session.execute(
+            statement, execution_options={"compiled_cache": self.compiled_cache}
+        )
+
+    def compile_sql(self, filters: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """Data and count SQL with values inlined, for callers that store or stream SQL strings"""
+        stmt, count_stmt = self.statements(filters)
+        db_query = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+        count_query = f"SELECT COUNT(*) FROM ({count_stmt.compile(compile_kwargs={'literal_binds': True})}) AS subquery"
+        return db_query, count_query
+
+
+_plans = LocalLRU(configs.REPORT_PLAN_CACHE_MAX_ENTRIES)
+
+
+def report_plan_hash(config: Dict[str, Any]) -> str:
+    """Fingerprint of everything in a sub-report config except its filters"""
+    return config_hash(
+        {key: value for key, value in config.items() if key != "filters"}
+    )
+
+
+def report_filters_hash(filters: Optional[Dict[str, Any]]) -> str:
+    return config_hash({"filters": filters or None})
+
+
+def report_export_hash(report_name: str, sub_reports: Iterable[Any]) -> str:
+    """Fingerprint of what an export of a report contains: each sub-report's sheet name, plan and filters, in order"""
+    return config_hash(
+        {
+            "name": report_name,
+            "sub_reports": [
+                [
+                    sub_report.id,
+                    sub_report.name,
+                    report_plan_hash(sub_report.config or {}),
+                    report_filters_hash((sub_report.config or {}).get("filters")),
+                ]
+                for sub_report in sub_reports
+            ],
+        }
+    )
+
+
+def compile_report_plan(
+    session: Session, config: Dict[str, Any], plan_hash: Optional[str] = None
+) -> CompiledReportPlan:
+    """Validate a sub-report config and build its plan; raises on an invalid config"""
+    unfiltered = {**config, "filters": None}
+    SubReportConfigBaseSchema.model_validate(unfiltered)
+
+    base, join_plan = resolve_join_chain(
+        unfiltered["config"], unfiltered.get("group_by") or []
+    )
+    stmt, count_stmt, data_type_map, formula_map = build_sqlalchemy_query(
+        session, unfiltered, base, join_plan, None
+    )
+    return CompiledReportPlan(
+        plan_hash=plan_hash or report_plan_hash(config),
+        config=unfiltered,
+        base=base,
+        join_plan=join_plan,
+        stmt=stmt,
+        count_stmt=count_stmt,
+        data_type_map=data_type_map,
+        formula_map=formula_map,
+    )
+
+
+def get_report_plan(session: Session, config: Dict[str, Any]) -> CompiledReportPlan:
+    """The plan of a sub-report config, compiled on first use in this process"""
+    plan_hash = report_plan_hash(config)
+    found, plan = _plans.get(plan_hash)
+    if found:
+        return plan
+    plan = compile_report_plan(session, config, plan_hash)
+    # Keyed by content, so entries never go stale; the TTL only bounds memory
+    _plans.set(plan_hash, plan, configs.REPORT_PLAN_CACHE_TTL, ())
+    return plan
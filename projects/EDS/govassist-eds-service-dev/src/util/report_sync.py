@@ -0,0 +1,173 @@
+"""
+Helpers for syncing a published sub-report index with its SQL query
+incrementally, instead of rebuilding it.
+
+Documents are keyed by the ids of the source rows they were built from.
+Every source table carries ``updated_at``, so the rows changed since the
+last publish (the watermark) can be selected directly, and a key-only
+version of the query tells which documents no longer match.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, and_, func, literal_column, or_
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import Alias, FromClause, Join, TableClause
+
+# Rows are re-selected from a little before the watermark, so rows written
+# while the last publish was starting are not missed; upserts are idempotent
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+KEY_COLUMN_PREFIX = "_sync_key_"
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Fingerprint of a sub-report config; an index synced under another config must be rebuilt"""
+    return hashlib.sha256(
+        json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def source_tables(stmt: Select) -> Optional[List[FromClause]]:
+    """
+    Tables (or table aliases) a query joins, ordered by name, or None when
+    the query reads something rows can't be keyed by: a subquery, or a table
+    without ``id`` and ``updated_at``.
+    """
+    tables: Dict[str, FromClause] = {}
+
+    def collect(from_clause: FromClause) -> bool:
+        if isinstance(from_clause, Join):
+            return collect(from_clause.left) and collect(from_clause.right)
+        is_table = isinstance(from_clause, TableClause) or (
+            isinstance(from_clause, Alias)
+            and isinstance(from_clause.element, TableClause)
+        )
+        if not is_table or not {"id", "updated_at"} <= set(from_clause.c.keys()):
+            return False
+        tables[from_clause.name] = from_clause
+        return True
+
+    froms = stmt.get_final_froms()
+    if not froms or not all(collect(from_clause) for from_clause in froms):
+        return None
+    return [tables[name] for name in sorted(tables)]
+
+
+def root_table(stmt: Select) -> Optional[FromClause]:
+    """The table a query's joins start from; its rows are never null-extended"""
+    froms = stmt.get_final_froms()
+    if not froms:
+        return None
+    from_clause = froms[0]
+    while isinstance(from_clause, Join):
+        from_clause = from_clause.left
+    return from_clause
+
+
+def key_ranges(start: int, end: int, count: int) -> List[Tuple[int, int]]:
+    """Split ``[start, end)`` into at most ``count`` contiguous, non-empty ranges"""
+    count = max(1, min(count, end - start))
+    step, remainder = divmod(end - start, count)
+    ranges, low = [], start
+    for position in range(count):
+        high = low + step + (1 if position < remainder else 0)
+        ranges.append((low, high))
+        low = high
+    return ranges
+
+
+def _compile(stmt: Select) -> str:
+    return str(stmt.compile(compile_kwargs={"literal_binds": True}))
+
+
+def build_sync_queries(
+    stmt: Select, config: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Queries for keyed and incremental publishing of ``stmt``, or None when
+    its rows can't be keyed (grouped rows have no single source row):
+
+    - ``publish_query``: every row, with the key columns appended
+    - ``changed_query``: rows with a source row updated after ``:watermark``,
+      and ``changed_count_query`` for how many there are
+    - ``keys_query``: only the key columns of every row
+    - ``slice_query``: ``publish_query`` limited to root table ids in
+      ``[:slice_start, :slice_end)``, and ``bounds_query`` for the lowest and
+      highest of those ids; both None unless the root table has integer ids
+    """
+    if config.get("group_by"):
+        return None
+    tables = source_tables(stmt)
+    if not tables:
+        return None
+
+    key_columns = [
+        table.c.id.label(f"{KEY_COLUMN_PREFIX}{position}")
+        for position, table in enumerate(tables)
+    ]
+    keyed = stmt.add_columns(*key_columns)
+    # Bound at execution time, so the compiled query can be reused
+    watermark = literal_column(":watermark")
+    changed = keyed.where(or_(*(table.c.updated_at > watermark for table in tables)))
+    keys = stmt.with_only_columns(*key_columns, maintain_column_froms=True).order_by(
+        None
+    )
+
+    slice_query = bounds_query = None
+    root = root_table(stmt)
+    if root is not None and isinstance(root.c.id.type, Integer):
+        slice_query = _compile(
+            keyed.where(
+                and_(
+                    root.c.id >= literal_column(":slice_start"),
+                    root.c.id < literal_column(":slice_end"),
+                )
+            )
+        )
+        bounds_query = _compile(
+            stmt.with_only_columns(
+                func.min(root.c.id), func.max(root.c.id), maintain_column_froms=True
+            ).order_by(None)
+        )
+
+    return {
+        "config_hash": config_hash(config),
+        "key_columns": [column.name for column in key_columns],
+        "publish_query": _compile(keyed),
+        "changed_query": _compile(changed),
+        "changed_count_query": _compile(
+            changed.with_only_columns(
+                func.count(), maintain_column_froms=True
+            ).order_by(None)
+        ),
+        "keys_query": _compile(keys),
+        "slice_query": slice_query,
+        "bounds_query": bounds_query,
+    }
+
+
+def key_positions(columns: Sequence[str], key_columns: Iterable[str]) -> List[int]:
+    return [list(columns).index(column) for column in key_columns]
+
+
+def document_id(row: Sequence[Any], positions: Sequence[int]) -> str:
+    """Document id from a row's key columns; outer joins may leave keys empty"""
+    return ":".join("" if row[i] is None else str(row[i]) for i in positions)
+
+
+def raise_for_bulk_errors(response: Dict[str, Any]):
+    """Raise if any item of a bulk response failed; deleting a missing document is not a failure"""
+    if not response.get("errors"):
+        return
+    for item in response.get("items", []):
+        action, result = next(iter(item.items()))
+        if action == "delete" and result.get("status") == 404:
+            continue
+        if result.get("error"):
+            raise RuntimeError(
+                f"Bulk {action} of document {result.get('_id')} failed: {result['error']}"
+            )